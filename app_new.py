@@ -5,8 +5,22 @@ from datetime import datetime
 from pathlib import Path
 import base64
 import tempfile
-import os
-from pdf_generator_enhanced import generate_player_pdf
+import time
+from lazy_imports import lazy_import
+import scouting_aggregates
+import scouting_store
+from canonical_entities import FIELDS as ENTITY_FIELDS, EntityDictionary
+from contract_index import ContractIndex
+from field_bundles import BundleError, export_bundle, format_summary, import_bundle
+from image_processing import InvalidImageError, check_image, get_image_processor
+from render_cache import CacheManager
+from saved_searches import SavedSearches, cohort_keys, normalize_spec
+from scouting_warmup import WarmUp
+from shared_table import SharedTable, scouting_publishers
+from scouting_schema import (
+    COLUMNS, STATUS_ARCHIVED, active_reports, read_long_text_csv, read_players_csv,
+    report_status, stored_reports, to_record
+)
 
 # ====================================
 # CONFIGURACIÓN DE PÁGINA
@@ -21,6 +35,16 @@ st.set_page_config(
 # CONSTANTES
 # ====================================
 DATABASE_FILE = "scouting_database.csv"
+DETAIL_CACHE_ENTRIES = 256
+# Cuotas de las cachés en memoria (el presupuesto común se fija con SCOUTING_CACHE_MB)
+HTML_CACHE_BYTES = 32 * 1024 * 1024
+PHOTO_CACHE_BYTES = 64 * 1024 * 1024
+PDF_CACHE_BYTES = 64 * 1024 * 1024
+COMPARISON_MAX_PLAYERS = 10
+LOGO_AUDAX = "AudaxEscudo.png"
+LOGO_LIGA = "ligachile1.png"
+# Si el calentamiento tarda más, la sesión sigue y hace en frío lo que falte
+WARMUP_WAIT_SECONDS = 120
 
 # ====================================
 # FUNCIONES DE BASE DE DATOS
@@ -32,77 +56,167 @@ def create_initial_database():
     os.makedirs("jugadores_img", exist_ok=True)
     
     if not os.path.exists("scouting_database.csv"):
-        columns = [
-            "fecha_creacion", "jugador", "edad", "talla", "fecha_nacimiento", 
-            "nacionalidad", "pie", "club_actual", "fin_contrato", 
-            "agente", "telefono_agente", "posicion_principal", "posicion_secundaria",
-            "descripcion_general", "rendimiento", "potencial", "adaptabilidad",
-            "evaluacion_tecnica", "evaluacion_tactica", "evaluacion_fisica", 
-            "evaluacion_mental", "observaciones_tecnica", "observaciones_tactica",
-            "observaciones_fisica", "observaciones_mental", "referencias", 
-            "historial_lesiones", "estado_lesiones", "veredicto", "imagen_path"
-        ]
-        df_empty = pd.DataFrame(columns=columns)
+        df_empty = pd.DataFrame(columns=COLUMNS)
         df_empty.to_csv("scouting_database.csv", index=False)
 
-def save_uploaded_file(uploaded_file, player_name):
-    """Guarda el archivo subido y devuelve la ruta relativa"""
-    try:
-        # Crear un nombre de archivo seguro a partir del nombre del jugador
-        safe_name = "".join(c if c.isalnum() else "_" for c in player_name).strip("_")
-        file_ext = os.path.splitext(uploaded_file.name)[1]
-        filename = f"{safe_name}_{int(datetime.now().timestamp())}{file_ext}"
-        filepath = os.path.join("jugadores_img", filename)
-        
-        # Guardar el archivo
-        with open(filepath, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        return filepath
-    except Exception as e:
-        st.error(f"Error al guardar la imagen: {str(e)}")
+@st.cache_resource(show_spinner=False)
+def get_store():
+    """Almacén de informes del proceso, con las cachés en memoria conectadas
+
+    Agregados e índice de contratos consumen el registro de cambios del almacén
+    al leerse; aquí solo se mantienen las cachés propias de este proceso.
+    """
+    store = scouting_store.get_store()
+    
+    def update_process_caches(entry, previous_size, new_size):
+        if entry.get("op") == "compact":
+            return
+        previous = entry.get("previous")
+        if previous is not None:
+            get_detail_html_cache().pop((entry["record"]['report_id'], previous.get('version')))
+    
+    store.add_listener(update_process_caches)
+    # Si este proceso es el escritor, publica las tablas que mapean los demás
+    for publisher in scouting_publishers(DATABASE_FILE):
+        store.add_publisher(publisher)
+    store.start()
+    return store
+
+def prepare_uploaded_image(uploaded_file):
+    """Encola la foto subida para verificarla, girarla, reducirla y recodificarla
+
+    Devuelve el Future de ``image_processing`` sin esperarlo: el almacén lo
+    resuelve al incorporar el informe. Sin foto devuelve None; si la cabecera
+    no es de una imagen válida lanza ``InvalidImageError``.
+    """
+    if uploaded_file is None:
         return None
+    data = uploaded_file.getvalue()
+    check_image(data)
+    return get_image_processor().submit(data)
 
 def save_player(player_data, uploaded_file=None):
-    """Guarda los datos de un jugador en la base de datos"""
+    """Guarda los datos de un jugador en la base de datos
+
+    El informe y la imagen se registran en el diario del almacén y un escritor en
+    segundo plano los incorpora al CSV, así que la llamada retorna de inmediato.
+    """
     try:
         if not os.path.exists("scouting_database.csv"):
             create_initial_database()
         
-        # Guardar la imagen si se proporcionó una
-        if uploaded_file is not None:
-            filepath = save_uploaded_file(uploaded_file, player_data.get('jugador', 'jugador'))
-            if filepath:
-                player_data['imagen_path'] = filepath
+        # Validar la imagen si se proporcionó una; se normaliza en segundo plano
+        image_future = prepare_uploaded_image(uploaded_file)
         
-        df = pd.read_csv("scouting_database.csv")
-        df = pd.concat([df, pd.DataFrame([player_data])], ignore_index=True)
-        df.to_csv("scouting_database.csv", index=False)
+        get_store().submit(player_data, image_future=image_future)
         return True
+    except InvalidImageError as e:
+        st.error(f"La foto no es válida: {str(e)}")
+        return False
     except Exception as e:
         st.error(f"Error al guardar el jugador: {str(e)}")
         return False
 
-def load_players():
-    """Carga todos los jugadores de la base de datos"""
+def update_player(player_data, previous, uploaded_file=None):
+    """Guarda una nueva versión de un informe existente
+
+    ``previous`` es el informe tal como se abrió para editarlo. Si otra persona
+    lo modificó entretanto no se sobrescribe su cambio. Devuelve la versión
+    nueva, o None si no se pudo guardar (el motivo se muestra en pantalla).
+    """
+    try:
+        image_future = prepare_uploaded_image(uploaded_file)
+        
+        return get_store().update(player_data, previous['version'], previous, image_future=image_future)
+    except InvalidImageError as e:
+        st.error(f"La foto no es válida: {str(e)}")
+    except scouting_store.VersionConflictError as e:
+        st.error(f"No se guardaron los cambios: {str(e)}. Vuelva a abrir el informe para ver la versión actual.")
+    except Exception as e:
+        st.error(f"Error al actualizar el informe: {str(e)}")
+    return None
+
+@st.cache_resource(show_spinner=False)
+def get_players_table():
+    """Tabla tipada compartida entre sesiones y procesos (mapeada desde la publicación del escritor)"""
+    return SharedTable("players", read_players_csv, slice_views={active_reports: "active", stored_reports: "stored"})
+
+@st.cache_resource(show_spinner=False)
+def get_long_text_table():
+    """Textos largos de los informes; se cargan solo al abrir un informe"""
+    return SharedTable("long_text", read_long_text_csv)
+
+def load_player_record(df, index):
+    """Devuelve un informe completo, incluyendo los textos largos cargados bajo demanda"""
+    record = to_record(df.loc[index])
+    try:
+        textos = get_long_text_table().get(DATABASE_FILE)
+        if index in textos.index:
+            record.update(to_record(textos.loc[index]))
+    except Exception as e:
+        st.warning(f"No se pudieron cargar las observaciones del informe: {str(e)}")
+    return record
+
+def database_version():
+    """Identifica la versión actual del CSV (cambia con cada escritura)"""
+    try:
+        stat = os.stat(DATABASE_FILE)
+    except OSError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_players(include_archived=False):
+    """Carga los jugadores de la base de datos (solo lectura, no modificar)
+
+    Por defecto solo los informes activos; con ``include_archived`` también los
+    archivados. Los eliminados no se devuelven nunca.
+    """
     if not os.path.exists("scouting_database.csv"):
         return pd.DataFrame()
     try:
-        return pd.read_csv("scouting_database.csv")
+        return get_players_table().get(DATABASE_FILE, view=stored_reports if include_archived else active_reports)
     except Exception as e:
         st.error(f"Error al cargar los jugadores: {str(e)}")
         return pd.DataFrame()
 
+@st.cache_resource(show_spinner=False)
+def get_contract_index():
+    """Índice de fin de contrato compartido entre sesiones"""
+    return ContractIndex()
+
+def load_contract_index():
+    """Devuelve el índice de contratos al día con el registro de cambios"""
+    return get_contract_index().refresh(get_store().events, DATABASE_FILE, load_players)
+
+def audax_scores(df):
+    """Puntuación AUDAX ((R + P + A) / 18) × 10 calculada para toda la tabla"""
+    suma = sum(
+        pd.to_numeric(df[campo], errors="coerce").fillna(0).clip(0, 10).astype("float64")
+        for campo in ["rendimiento", "potencial", "adaptabilidad"]
+    )
+    return ((suma / 18) * 10).clip(0, 10)
+
 # ====================================
 # FUNCIÓN PARA CARGAR POSICIONES
 # ====================================
 
+@st.cache_data(show_spinner=False)
 def load_positions():
     """Carga las posiciones desde el archivo Excel o usa valores por defecto"""
     try:
         if os.path.exists("ItemsPosiciones.xlsx"):
-            df = pd.read_excel("ItemsPosiciones.xlsx")
-            if 'Posición' in df.columns:
-                return df['Posición'].dropna().unique().tolist()
+            # openpyxl solo se carga cuando se necesita el libro de posiciones
+            openpyxl = lazy_import("openpyxl")
+            wb = openpyxl.load_workbook("ItemsPosiciones.xlsx", read_only=True, data_only=True)
+            try:
+                rows = wb.worksheets[0].iter_rows(values_only=True)
+                header = next(rows, ())
+                if 'Posición' in header:
+                    idx = header.index('Posición')
+                    valores = (row[idx] for row in rows if idx < len(row) and row[idx] is not None)
+                    return list(dict.fromkeys(valores))
+            finally:
+                wb.close()
     except Exception as e:
         st.warning(f"No se pudo cargar el archivo de posiciones: {str(e)}")
     
@@ -114,18 +228,88 @@ def load_positions():
         'Mediapunta', 'Delantero Centro', 'Segundo Delantero'
     ]
 
+# ====================================
+# VALORES CANÓNICOS (CLUB, LIGA, NACIONALIDAD)
+# ====================================
+
+@st.cache_resource(show_spinner=False)
+def get_entity_dictionary():
+    """Entidades canónicas de club, liga y nacionalidad, compartidas entre sesiones"""
+    return EntityDictionary()
+
+def _stored_values(campo):
+    df = load_players(include_archived=True)
+    return df[campo].tolist() if campo in df.columns else []
+
+def entity_options(campo):
+    """Formas canónicas de un campo para el autocompletado del formulario"""
+    try:
+        return get_entity_dictionary().entities(campo, _stored_values(campo), database_version()).options
+    except Exception as e:
+        print(f"No se pudieron cargar las opciones de {campo}: {e}")
+        return []
+
+def canonicalize_report(datos):
+    """Sustituye club, liga y nacionalidad por su forma canónica si se reconocen"""
+    try:
+        datos, cambios = get_entity_dictionary().canonicalize_record(datos, _stored_values, database_version())
+    except Exception as e:
+        print(f"No se pudieron normalizar los valores del informe: {e}")
+        return datos
+    for antes, despues in cambios.values():
+        st.toast(f"'{antes}' se guardó como '{despues}'")
+    return datos
+
 # ====================================
 # PÁGINA: NUEVO INFORME
 # ====================================
 
-def show_new_report_page():
-    """Muestra el formulario para crear un nuevo informe"""
-    st.title("Nuevo Informe de Jugador")
+def _valor_inicial(valores, campo, por_defecto):
+    """Valor de un campo para precargar el formulario, o el valor por defecto"""
+    valor = valores.get(campo)
+    if valor is None or valor is pd.NA or (isinstance(valor, float) and pd.isna(valor)) or str(valor).strip() == "":
+        return por_defecto
+    return valor
+
+def _entero_inicial(valores, campo, por_defecto, minimo, maximo):
+    """Entero inicial y rango ampliado para incluirlo (no se recorta un dato guardado)"""
+    try:
+        valor = int(float(_valor_inicial(valores, campo, por_defecto)))
+    except (TypeError, ValueError):
+        valor = por_defecto
+    return valor, min(minimo, valor), max(maximo, valor)
+
+def _indice_opcion(opciones, valor):
+    return opciones.index(valor) if valor in opciones else 0
+
+def show_report_form(form_key, posiciones, valores=None, key_prefix="", submit_label="💾 Guardar Jugador"):
+    """Formulario de informe, vacío o precargado con ``valores``
+
+    Devuelve ``(datos, foto)`` al enviarse con los campos obligatorios completos y
+    ``(None, None)`` en otro caso. ``key_prefix`` separa los widgets de varios
+    formularios en la misma página.
+    """
+    valores = valores or {}
     
-    # Cargar posiciones
-    posiciones = load_positions()
+    def clave(nombre):
+        return f"{key_prefix}{nombre}"
+    
+    def texto(campo):
+        return str(_valor_inicial(valores, campo, ""))
+    
+    def puntuacion(campo):
+        return _entero_inicial(valores, campo, 1, 1, 6)[0]
+    
+    def entidad(etiqueta, campo):
+        # Autocompleta con las formas canónicas; se puede escribir un valor nuevo
+        opciones = entity_options(campo)
+        actual = texto(campo)
+        if actual and actual not in opciones:
+            opciones = opciones + [actual]
+        return st.selectbox(etiqueta, opciones, index=opciones.index(actual) if actual else None,
+                            accept_new_options=True, placeholder="Escriba o elija...", key=clave(campo)) or ""
     
-    with st.form("nuevo_informe_form"):
+    with st.form(form_key):
         # 1. INFORMACIÓN GENERAL
         st.header("1. INFORMACIÓN GENERAL")
         
@@ -133,40 +317,55 @@ def show_new_report_page():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            jugador = st.text_input("Nombre del jugador*")
-            edad = st.number_input("Edad*", min_value=16, max_value=45, step=1, value=16)
-            talla = st.number_input("Talla (cm)*", min_value=150, max_value=220, step=1, value=180)
-            posicion_principal = st.selectbox("Posición principal*", [""] + posiciones)
+            jugador = st.text_input("Nombre del jugador*", texto("jugador"), key=clave("jugador"))
+            valor, minimo, maximo = _entero_inicial(valores, "edad", 16, 16, 45)
+            edad = st.number_input("Edad*", min_value=minimo, max_value=maximo, step=1, value=valor, key=clave("edad"))
+            valor, minimo, maximo = _entero_inicial(valores, "talla", 180, 150, 220)
+            talla = st.number_input("Talla (cm)*", min_value=minimo, max_value=maximo, step=1, value=valor, key=clave("talla"))
+            opciones = [""] + posiciones
+            posicion_principal = st.selectbox("Posición principal*", opciones,
+                                              index=_indice_opcion(opciones, texto("posicion_principal")),
+                                              key=clave("posicion_principal"))
             
         with col2:
-            club_actual = st.text_input("Club actual*")
-            liga = st.text_input("Liga*")
-            pie = st.selectbox("Pie hábil*", ["", "Derecho", "Izquierdo", "Ambidiestro"])
-            posicion_secundaria = st.selectbox("Posición secundaria", ["No especificada"] + posiciones)
+            club_actual = entidad("Club actual*", "club_actual")
+            liga = entidad("Liga*", "liga")
+            opciones = ["", "Derecho", "Izquierdo", "Ambidiestro"]
+            pie = st.selectbox("Pie hábil*", opciones, index=_indice_opcion(opciones, texto("pie")), key=clave("pie"))
+            opciones = ["No especificada"] + posiciones
+            posicion_secundaria = st.selectbox("Posición secundaria", opciones,
+                                               index=_indice_opcion(opciones, texto("posicion_secundaria")),
+                                               key=clave("posicion_secundaria"))
             
         with col3:
-            nacionalidad = st.text_input("Nacionalidad*")
-            agente = st.text_input("Agente")
-            telefono_agente = st.text_input("Teléfono de agente")
+            nacionalidad = entidad("Nacionalidad*", "nacionalidad")
+            agente = st.text_input("Agente", texto("agente"), key=clave("agente"))
+            telefono_agente = st.text_input("Teléfono de agente", texto("telefono_agente"), key=clave("telefono_agente"))
+            ojeador = st.text_input("Ojeador", texto("ojeador"), key=clave("ojeador"))
         
         # Segunda fila (3 columnas)
         col4, col5, col6 = st.columns([1, 1, 2])
         
         with col4:
-            fecha_nacimiento = st.number_input("Año nacimiento", min_value=1950, max_value=2010, step=1, value=1990)
+            valor, minimo, maximo = _entero_inicial(valores, "fecha_nacimiento", 1990, 1950, 2010)
+            fecha_nacimiento = st.number_input("Año nacimiento", min_value=minimo, max_value=maximo, step=1, value=valor,
+                                               key=clave("fecha_nacimiento"))
         
         with col5:
-            fin_contrato = st.number_input("Año fin contrato", min_value=2024, max_value=2035, step=1, value=2025)
+            valor, minimo, maximo = _entero_inicial(valores, "fin_contrato", 2025, 2024, 2035)
+            fin_contrato = st.number_input("Año fin contrato", min_value=minimo, max_value=maximo, step=1, value=valor,
+                                           key=clave("fin_contrato"))
         
         with col6:
             # Widget para subir imagen
-            uploaded_file = st.file_uploader("Foto del jugador", type=['png', 'jpg', 'jpeg'])
+            uploaded_file = st.file_uploader("Foto del jugador", type=['png', 'jpg', 'jpeg'], key=clave("foto"))
             if uploaded_file is not None:
                 # Mostrar vista previa de la imagen
                 st.image(uploaded_file, caption='Vista previa', width=150)
         
         # Descripción general
-        descripcion_general = st.text_area("Descripción general", height=100)
+        descripcion_general = st.text_area("Descripción general", texto("descripcion_general"), height=100,
+                                           key=clave("descripcion_general"))
         
         # 2. EVALUACIÓN ESPECÍFICA
         st.markdown("---")
@@ -176,13 +375,13 @@ def show_new_report_page():
         col6, col7, col8 = st.columns(3)
         
         with col6:
-            rendimiento = st.slider("Rendimiento actual", 1, 6, 1)
+            rendimiento = st.slider("Rendimiento actual", 1, 6, puntuacion("rendimiento"), key=clave("rendimiento"))
         
         with col7:
-            potencial = st.slider("Potencial de crecimiento", 1, 6, 1)
+            potencial = st.slider("Potencial de crecimiento", 1, 6, puntuacion("potencial"), key=clave("potencial"))
         
         with col8:
-            adaptabilidad = st.slider("Adaptabilidad al equipo", 1, 6, 1)
+            adaptabilidad = st.slider("Adaptabilidad al equipo", 1, 6, puntuacion("adaptabilidad"), key=clave("adaptabilidad"))
         
         # Segunda fila (4 columnas para evaluaciones detalladas)
         st.markdown("### Evaluaciones detalladas (1-6)")
@@ -190,37 +389,41 @@ def show_new_report_page():
         col9, col10, col11, col12 = st.columns(4)
         
         with col9:
-            evaluacion_tecnica = st.slider("Técnica", 1, 6, 1, key="tecnica")
-            obs_tecnica = st.text_area("Obs. técnicas", height=60, key="obs_tecnica")
+            evaluacion_tecnica = st.slider("Técnica", 1, 6, puntuacion("evaluacion_tecnica"), key=clave("tecnica"))
+            obs_tecnica = st.text_area("Obs. técnicas", texto("observaciones_tecnica"), height=60, key=clave("obs_tecnica"))
         
         with col10:
-            evaluacion_tactica = st.slider("Táctica", 1, 6, 1, key="tactica")
-            obs_tactica = st.text_area("Obs. tácticas", height=60, key="obs_tactica")
+            evaluacion_tactica = st.slider("Táctica", 1, 6, puntuacion("evaluacion_tactica"), key=clave("tactica"))
+            obs_tactica = st.text_area("Obs. tácticas", texto("observaciones_tactica"), height=60, key=clave("obs_tactica"))
         
         with col11:
-            evaluacion_fisica = st.slider("Físico", 1, 6, 1, key="fisica")
-            obs_fisica = st.text_area("Obs. físicas", height=60, key="obs_fisica")
+            evaluacion_fisica = st.slider("Físico", 1, 6, puntuacion("evaluacion_fisica"), key=clave("fisica"))
+            obs_fisica = st.text_area("Obs. físicas", texto("observaciones_fisica"), height=60, key=clave("obs_fisica"))
         
         with col12:
-            evaluacion_mental = st.slider("Mental", 1, 6, 1, key="mental")
-            obs_mental = st.text_area("Obs. mentales", height=60, key="obs_mental")
+            evaluacion_mental = st.slider("Mental", 1, 6, puntuacion("evaluacion_mental"), key=clave("mental"))
+            obs_mental = st.text_area("Obs. mentales", texto("observaciones_mental"), height=60, key=clave("obs_mental"))
         
         # 3. REFERENCIAS
         st.markdown("---")
         st.header("3. REFERENCIAS")
-        referencias = st.text_area("Referencias adicionales", height=100)
+        referencias = st.text_area("Referencias adicionales", texto("referencias"), height=100, key=clave("referencias"))
         
         # 4. HISTORIAL Y ESTADO DE LESIONES
         st.markdown("---")
         st.header("4. HISTORIAL Y ESTADO DE LESIONES")
         
         # Historial de lesiones
-        historial_lesiones = st.text_area("Detalle el historial de lesiones", height=100)
+        historial_lesiones = st.text_area("Detalle el historial de lesiones", texto("historial_lesiones"), height=100,
+                                          key=clave("historial_lesiones"))
         
         # Estado de lesiones
+        opciones = ["NO", "REVISAR", "ÚLTIMOS 3 AÑOS LESIONES RELEVANTES"]
         estado_lesiones = st.selectbox(
             "Estado de lesiones",
-            ["NO", "REVISAR", "ÚLTIMOS 3 AÑOS LESIONES RELEVANTES"]
+            opciones,
+            index=_indice_opcion(opciones, texto("estado_lesiones")),
+            key=clave("estado_lesiones")
         )
         
         # 5. VEREDICTO FINAL
@@ -228,89 +431,110 @@ def show_new_report_page():
         st.header("5. VEREDICTO FINAL")
         
         # Veredicto final
+        opciones = [
+            "FIRMAR – Mejora plantilla", 
+            "SEGUIR DE CERCA – Nivel de plantilla", 
+            "SEGUIR – Complemento de plantilla", 
+            "NO INTERESA – No cumple con los requisitos"
+        ]
         veredicto = st.radio(
             "Veredicto final:",
-            [
-                "FIRMAR – Mejora plantilla", 
-                "SEGUIR DE CERCA – Nivel de plantilla", 
-                "SEGUIR – Complemento de plantilla", 
-                "NO INTERESA – No cumple con los requisitos"
-            ]
+            opciones,
+            index=_indice_opcion(opciones, texto("veredicto")),
+            key=clave("veredicto")
         )
         
         # Botón de envío
-        submitted = st.form_submit_button("💾 Guardar Jugador", use_container_width=True)
-        
-        if submitted:
-            # Validar campos obligatorios
-            campos_obligatorios = {
-                "Nombre del jugador": jugador,
-                "Edad": edad,
-                "Talla": talla,
-                "Posición principal": posicion_principal,
-                "Club actual": club_actual,
-                "Pie hábil": pie,
-                "Nacionalidad": nacionalidad
-            }
-            
-            campos_faltantes = [campo for campo, valor in campos_obligatorios.items() if not valor]
-            
-            if campos_faltantes:
-                st.error(f"Por favor complete los siguientes campos obligatorios: {', '.join(campos_faltantes)}")
-            else:
-                # Crear diccionario con los datos del jugador
-                jugador_data = {
-                    "fecha_creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "jugador": jugador,
-                    "edad": edad,
-                    "liga": liga,
-                    "talla": talla,
-                    "fecha_nacimiento": fecha_nacimiento,
-                    "nacionalidad": nacionalidad,
-                    "pie": pie,
-                    "club_actual": club_actual,
-                    "fin_contrato": fin_contrato,
-                    "agente": agente if agente else "",
-                    "telefono_agente": telefono_agente if telefono_agente else "",
-                    "posicion_principal": posicion_principal,
-                    "posicion_secundaria": posicion_secundaria if posicion_secundaria != "No especificada" else "",
-                    "descripcion_general": descripcion_general,
-                    "rendimiento": rendimiento,
-                    "potencial": potencial,
-                    "adaptabilidad": adaptabilidad,
-                    "evaluacion_tecnica": evaluacion_tecnica,
-                    "evaluacion_tactica": evaluacion_tactica,
-                    "evaluacion_fisica": evaluacion_fisica,
-                    "evaluacion_mental": evaluacion_mental,
-                    "observaciones_tecnica": obs_tecnica,
-                    "observaciones_tactica": obs_tactica,
-                    "observaciones_fisica": obs_fisica,
-                    "observaciones_mental": obs_mental,
-                    "referencias": referencias,
-                    "historial_lesiones": historial_lesiones,
-                    "estado_lesiones": estado_lesiones,
-                    "veredicto": veredicto
-                }
-                
-                # Guardar los datos del jugador
-                if save_player(jugador_data, uploaded_file):
-                    st.success("¡Jugador guardado correctamente!")
-                    st.balloons()
-                else:
-                    st.error("Ocurrió un error al guardar el jugador. Por favor, intente nuevamente.")
+        submitted = st.form_submit_button(submit_label, use_container_width=True)
+        
+        if not submitted:
+            return None, None
+        
+        # Validar campos obligatorios
+        campos_obligatorios = {
+            "Nombre del jugador": jugador,
+            "Edad": edad,
+            "Talla": talla,
+            "Posición principal": posicion_principal,
+            "Club actual": club_actual,
+            "Pie hábil": pie,
+            "Nacionalidad": nacionalidad
+        }
+        
+        campos_faltantes = [campo for campo, valor in campos_obligatorios.items() if not valor]
+        
+        if campos_faltantes:
+            st.error(f"Por favor complete los siguientes campos obligatorios: {', '.join(campos_faltantes)}")
+            return None, None
+        
+        # Crear diccionario con los datos del jugador
+        jugador_data = {
+            "jugador": jugador,
+            "edad": edad,
+            "liga": liga,
+            "talla": talla,
+            "fecha_nacimiento": fecha_nacimiento,
+            "nacionalidad": nacionalidad,
+            "pie": pie,
+            "club_actual": club_actual,
+            "fin_contrato": fin_contrato,
+            "agente": agente if agente else "",
+            "telefono_agente": telefono_agente if telefono_agente else "",
+            "posicion_principal": posicion_principal,
+            "posicion_secundaria": posicion_secundaria if posicion_secundaria != "No especificada" else "",
+            "descripcion_general": descripcion_general,
+            "rendimiento": rendimiento,
+            "potencial": potencial,
+            "adaptabilidad": adaptabilidad,
+            "evaluacion_tecnica": evaluacion_tecnica,
+            "evaluacion_tactica": evaluacion_tactica,
+            "evaluacion_fisica": evaluacion_fisica,
+            "evaluacion_mental": evaluacion_mental,
+            "observaciones_tecnica": obs_tecnica,
+            "observaciones_tactica": obs_tactica,
+            "observaciones_fisica": obs_fisica,
+            "observaciones_mental": obs_mental,
+            "referencias": referencias,
+            "historial_lesiones": historial_lesiones,
+            "estado_lesiones": estado_lesiones,
+            "veredicto": veredicto,
+            "ojeador": ojeador if ojeador else ""
+        }
+        return canonicalize_report(jugador_data), uploaded_file
+
+def show_new_report_page():
+    """Muestra el formulario para crear un nuevo informe"""
+    st.title("Nuevo Informe de Jugador")
+    
+    # Cargar posiciones
+    posiciones = load_positions()
+    
+    jugador_data, uploaded_file = show_report_form("nuevo_informe_form", posiciones)
+    if jugador_data is None:
+        return
+    
+    jugador_data = {"fecha_creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **jugador_data}
+    
+    # Guardar los datos del jugador
+    if save_player(jugador_data, uploaded_file):
+        st.success("¡Jugador guardado correctamente!")
+        st.balloons()
+    else:
+        st.error("Ocurrió un error al guardar el jugador. Por favor, intente nuevamente.")
 
 # PÁGINA: BASE DE DATOS JUGADORES
 # ====================================
 
 def generate_pdf_report(jugador_data):
-    """Genera un PDF con la información del jugador usando el generador mejorado"""
+    """Genera el PDF completo de un jugador con el generador por secciones"""
     try:
         # Crear archivo temporal para el PDF
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
             output_path = tmp_file.name
         
-        # Generar el PDF usando el generador mejorado
-        success, error_message = generate_player_pdf(jugador_data, output_path)
+        # Generar el PDF (fpdf2 se carga en la primera impresión)
+        pdf_module = lazy_import("pdf_generator_enhanced")
+        success, error_message = pdf_module.generate_player_pdf(jugador_data, output_path)
         
         if not success:
             raise Exception(error_message)
@@ -321,6 +545,23 @@ def generate_pdf_report(jugador_data):
         st.error(f"Error al generar el PDF: {str(e)}")
         return None
 
+def get_player_pdf(jugador):
+    """PDF de un informe (bytes), en caché por report_id y versión; None si falló"""
+    key = (jugador.get('report_id'), jugador.get('version'))
+    cache = get_cache_manager().cache("pdf", max_bytes=PDF_CACHE_BYTES)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf_file = generate_pdf_report(jugador)
+        if not pdf_file:
+            return None
+        try:
+            with open(pdf_file, "rb") as f:
+                pdf = f.read()
+        finally:
+            os.remove(pdf_file)
+        cache.put(key, pdf)
+    return pdf
+
 def create_download_button(pdf_file):
     """Crea un botón de descarga para el PDF"""
     if not pdf_file or not os.path.exists(pdf_file):
@@ -329,33 +570,11 @@ def create_download_button(pdf_file):
         
     try:
         with open(pdf_file, "rb") as f:
-            base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+            pdf = f.read()
         
         # Crear un nombre de archivo más amigable
         player_name = pdf_file.split('_')[-1].replace('.pdf', '')
-        download_filename = f"Informe_{player_name}.pdf"
-        
-        # Botón de descarga con estilo mejorado
-        st.markdown(
-            f'''
-            <a href="data:application/octet-stream;base64,{base64_pdf}" 
-               download="{download_filename}"
-               style="
-                   display: inline-block;
-                   padding: 0.5em 1em;
-                   background-color: #0d6efd;
-                   color: white;
-                   text-decoration: none;
-                   border-radius: 5px;
-                   font-weight: bold;
-                   text-align: center;
-                   margin: 10px 0;
-               ">
-                📥 Descargar Informe PDF
-            </a>
-            ''',
-            unsafe_allow_html=True
-        )
+        show_download_link(pdf, f"Informe_{player_name}.pdf")
         
     except Exception as e:
         st.error(f"Error al preparar la descarga: {str(e)}")
@@ -366,20 +585,211 @@ def create_download_button(pdf_file):
         except Exception as e:
             print(f"Error al eliminar archivo temporal: {e}")
 
-def show_database_page():
-    st.title("📊 BASE DE DATOS JUGADORES")
+def show_download_link(pdf, download_filename):
+    """Enlace de descarga con estilo de botón para un PDF ya generado"""
+    base64_pdf = base64.b64encode(pdf).decode('utf-8')
     
-    # Cargar datos
-    if not os.path.exists(DATABASE_FILE):
-        st.warning("No se encontró la base de datos de jugadores. Por favor, cree al menos un informe.")
-        return
+    # Botón de descarga con estilo mejorado
+    st.markdown(
+        f'''
+        <a href="data:application/octet-stream;base64,{base64_pdf}" 
+           download="{download_filename}"
+           style="
+               display: inline-block;
+               padding: 0.5em 1em;
+               background-color: #0d6efd;
+               color: white;
+               text-decoration: none;
+               border-radius: 5px;
+               font-weight: bold;
+               text-align: center;
+               margin: 10px 0;
+           ">
+            📥 Descargar Informe PDF
+        </a>
+        ''',
+        unsafe_allow_html=True
+    )
+
+def filter_players(df, liga="Todas", equipo="Todos", posicion="Todas", nacionalidad="Todas", nombre="",
+                   veredicto="Todos"):
+    """Aplica la cadena de filtros de la página de base de datos"""
+    df_filtrado = df.copy()
+    
+    if liga != "Todas" and 'liga' in df_filtrado.columns:
+        df_filtrado = df_filtrado[df_filtrado['liga'] == liga]
+        
+    if equipo != "Todos":
+        df_filtrado = df_filtrado[df_filtrado['club_actual'] == equipo]
         
-    df = pd.read_csv(DATABASE_FILE)
+    if posicion != "Todas":
+        df_filtrado = df_filtrado[
+            (df_filtrado['posicion_principal'] == posicion) |
+            (df_filtrado['posicion_secundaria'] == posicion)
+        ]
+        
+    if nacionalidad != "Todas":
+        df_filtrado = df_filtrado[df_filtrado['nacionalidad'] == nacionalidad]
+        
+    if veredicto != "Todos" and 'veredicto' in df_filtrado.columns:
+        df_filtrado = df_filtrado[df_filtrado['veredicto'] == veredicto]
+        
+    if nombre:
+        df_filtrado = df_filtrado[
+            df_filtrado['jugador'].str.contains(nombre, case=False, na=False)
+        ]
     
-    # Verificar si el DataFrame está vacío
-    if df.empty:
-        st.info("No hay jugadores registrados en la base de datos.")
+    return df_filtrado
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _filter_options(version, include_archived=False):
+    """Opciones de los filtros para una versión de la base de datos"""
+    df = load_players(include_archived)
+    
+    def opciones(columna, todas):
+        return [todas] + sorted(df[columna].dropna().unique().tolist()) if columna in df.columns else [todas]
+    
+    return {
+        "liga": opciones('liga', "Todas"),
+        "equipo": opciones('club_actual', "Todos"),
+        "posicion": opciones('posicion_principal', "Todas"),
+        "nacionalidad": opciones('nacionalidad', "Todas"),
+        "veredicto": opciones('veredicto', "Todos")
+    }
+
+GRUPOS_PERCENTIL = {
+    "Posición": "posicion_principal",
+    "Liga": "liga"
+}
+
+def load_cohort_aggregates():
+    """Agregados al día con los histogramas por posición y liga (para percentiles)"""
+    return scouting_aggregates.load_aggregates(DATABASE_FILE, load_players, get_store().events)
+
+def apply_search(spec):
+    """Aplica la cadena de filtros de una búsqueda; devuelve los informes y sus candidatos
+
+    Los candidatos son los informes que cumplen los filtros sin el percentil.
+    """
+    candidatos = filter_players(
+        load_players(spec["incluir_archivados"]),
+        liga=spec["liga"],
+        equipo=spec["equipo"],
+        posicion=spec["posicion"],
+        nacionalidad=spec["nacionalidad"],
+        nombre=spec["nombre"],
+        veredicto=spec["veredicto"]
+    )
+    df_filtrado = candidatos
+    if spec["percentil_campo"] and spec["percentil_minimo"] > 0:
+        percentiles = scouting_aggregates.percentiles_series(
+            load_cohort_aggregates(), candidatos, spec["percentil_grupo"], spec["percentil_campo"]
+        )
+        df_filtrado = candidatos[percentiles >= spec["percentil_minimo"]]
+    return df_filtrado, candidatos
+
+def _player_names(df):
+    return sorted(df['jugador'].dropna().unique().tolist())
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _filtered_player_names(version, spec_items):
+    """Nombres de jugadores que cumplen los filtros (memoizado por versión y filtros)"""
+    df_filtrado, _ = apply_search(dict(spec_items))
+    return _player_names(df_filtrado)
+
+# ---------- Búsquedas guardadas ----------
+
+@st.cache_resource(show_spinner=False)
+def get_saved_searches():
+    """Búsquedas guardadas y sus resultados, compartidos entre sesiones"""
+    return SavedSearches()
+
+def _evaluate_saved_search(spec):
+    df_filtrado, candidatos = apply_search(spec)
+    cohortes = cohort_keys(candidatos[spec["percentil_grupo"]]) if spec["percentil_campo"] else ()
+    return df_filtrado['report_id'].tolist(), cohortes
+
+def saved_search_names(nombre):
+    """Jugadores de una búsqueda guardada desde su resultado en caché"""
+    busquedas = get_saved_searches().refresh(get_store().events, DATABASE_FILE)
+    ids = busquedas.ids(nombre, _evaluate_saved_search)
+    spec = busquedas.spec(nombre)
+    if ids is None or spec is None:
+        return None
+    df = load_players(spec["incluir_archivados"])
+    return _player_names(df[df['report_id'].isin(ids)])
+
+# Clave de cada filtro en el estado de la sesión
+CLAVES_FILTRO = {
+    "liga": "filtro_liga",
+    "equipo": "filtro_equipo",
+    "posicion": "filtro_posicion",
+    "nacionalidad": "filtro_nacionalidad",
+    "veredicto": "filtro_veredicto",
+    "nombre": "busqueda_nombre",
+    "incluir_archivados": "filtro_archivados",
+    "percentil_minimo": "filtro_percentil_minimo",
+}
+
+def _load_saved_search():
+    """Pone en los filtros los valores de la búsqueda guardada elegida"""
+    nombre = st.session_state.get("busqueda_guardada", "")
+    spec = get_saved_searches().spec(nombre) if nombre else None
+    if spec is None:
         return
+    opciones = _filter_options(database_version(), spec["incluir_archivados"])
+    for campo, clave in CLAVES_FILTRO.items():
+        # Un valor que ya no está en la base de datos no se puede elegir en el selector
+        if campo in opciones and spec[campo] not in opciones[campo]:
+            continue
+        st.session_state[clave] = spec[campo]
+    metricas = {campo: etiqueta for etiqueta, campo in PUNTUACIONES_ANALITICA.items()}
+    grupos = {campo: etiqueta for etiqueta, campo in GRUPOS_PERCENTIL.items()}
+    st.session_state["filtro_percentil_metrica"] = metricas.get(spec["percentil_campo"], "Ninguno")
+    st.session_state["filtro_percentil_grupo"] = grupos.get(spec["percentil_grupo"], "Posición")
+
+def show_saved_searches(spec):
+    """Elegir, guardar o borrar búsquedas; devuelve la búsqueda guardada vigente"""
+    busquedas = get_saved_searches()
+    # La búsqueda recién guardada queda elegida (antes de crear el selector)
+    pendiente = st.session_state.pop("busqueda_guardada_pendiente", None)
+    if pendiente:
+        st.session_state["busqueda_guardada"] = pendiente
+    with st.expander("⭐ Búsquedas guardadas"):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            nombre = st.selectbox("Abrir búsqueda:", [""] + busquedas.names(), key="busqueda_guardada",
+                                  on_change=_load_saved_search)
+        with col2:
+            st.write("")
+            if st.button("🗑️ Borrar", key="borrar_busqueda_btn", disabled=not nombre):
+                busquedas.delete(nombre)
+                st.session_state.pop("busqueda_guardada", None)
+                st.rerun()
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            nuevo_nombre = st.text_input("Guardar filtros actuales como:", key="nombre_busqueda_nueva")
+        with col2:
+            st.write("")
+            if st.button("💾 Guardar", key="guardar_busqueda_btn"):
+                try:
+                    nombre = busquedas.save(nuevo_nombre, spec)
+                except ValueError as e:
+                    st.error(f"No se guardó la búsqueda: {str(e)}")
+                else:
+                    st.session_state["busqueda_guardada_pendiente"] = nombre
+                    st.rerun()
+    
+    # Solo se usa el resultado guardado mientras los filtros coincidan con la búsqueda
+    return nombre if nombre and busquedas.spec(nombre) == spec else ""
+
+@st.fragment
+def show_database_filters():
+    """Filtros y lista de resultados; un cambio de filtro solo vuelve a ejecutar este bloque"""
+    version = database_version()
+    incluir_archivados = st.session_state.get("filtro_archivados", False)
+    opciones = _filter_options(version, incluir_archivados)
     
     # Filtros de búsqueda
     st.subheader("Filtros de Búsqueda")
@@ -388,438 +798,932 @@ def show_database_page():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        # Filtro por liga (asumiendo que hay una columna 'liga' en el DataFrame)
-        ligas = ["Todas"] + sorted(df['liga'].dropna().unique().tolist()) if 'liga' in df.columns else ["Todas"]
-        liga_seleccionada = st.selectbox("Liga:", ligas, key="filtro_liga")
+        liga_seleccionada = st.selectbox("Liga:", opciones["liga"], key="filtro_liga")
         
     with col2:
-        # Filtro por equipo
-        equipos = ["Todos"] + sorted(df['club_actual'].dropna().unique().tolist())
-        equipo_seleccionado = st.selectbox("Equipo:", equipos, key="filtro_equipo")
+        equipo_seleccionado = st.selectbox("Equipo:", opciones["equipo"], key="filtro_equipo")
         
     with col3:
-        # Filtro por posición
-        posiciones = ["Todas"] + sorted(df['posicion_principal'].dropna().unique().tolist())
-        posicion_seleccionada = st.selectbox("Posición:", posiciones, key="filtro_posicion")
+        posicion_seleccionada = st.selectbox("Posición:", opciones["posicion"], key="filtro_posicion")
         
     with col4:
-        # Filtro por nacionalidad
-        nacionalidades = ["Todas"] + sorted(df['nacionalidad'].dropna().unique().tolist())
-        nacionalidad_seleccionada = st.selectbox("Nacionalidad:", nacionalidades, key="filtro_nacionalidad")
+        nacionalidad_seleccionada = st.selectbox("Nacionalidad:", opciones["nacionalidad"], key="filtro_nacionalidad")
     
     # Filtro por nombre (búsqueda)
-    busqueda_nombre = st.text_input("Buscar por nombre:", "", key="busqueda_nombre")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        busqueda_nombre = st.text_input("Buscar por nombre:", key="busqueda_nombre")
+    with col2:
+        veredicto_seleccionado = st.selectbox("Veredicto:", opciones["veredicto"], key="filtro_veredicto")
+    st.checkbox("Incluir informes archivados", key="filtro_archivados")
     
-    # Aplicar filtros al DataFrame
-    df_filtrado = df.copy()
+    # Filtro por percentil dentro de la posición o la liga del jugador
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        percentil_label = st.selectbox("Percentil de:", ["Ninguno"] + list(PUNTUACIONES_ANALITICA), key="filtro_percentil_metrica")
+    with col2:
+        grupo_label = st.selectbox("Dentro de su:", list(GRUPOS_PERCENTIL), key="filtro_percentil_grupo")
+    with col3:
+        percentil_minimo = st.slider("Percentil mínimo:", 0, 100, step=5, key="filtro_percentil_minimo",
+                                     disabled=percentil_label == "Ninguno")
     
-    if liga_seleccionada != "Todas" and 'liga' in df_filtrado.columns:
-        df_filtrado = df_filtrado[df_filtrado['liga'] == liga_seleccionada]
-        
-    if equipo_seleccionado != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['club_actual'] == equipo_seleccionado]
-        
-    if posicion_seleccionada != "Todas":
-        df_filtrado = df_filtrado[
-            (df_filtrado['posicion_principal'] == posicion_seleccionada) |
-            (df_filtrado['posicion_secundaria'] == posicion_seleccionada)
-        ]
-        
-    if nacionalidad_seleccionada != "Todas":
-        df_filtrado = df_filtrado[df_filtrado['nacionalidad'] == nacionalidad_seleccionada]
-        
-    if busqueda_nombre:
-        df_filtrado = df_filtrado[
-            df_filtrado['jugador'].str.contains(busqueda_nombre, case=False, na=False)
-        ]
+    spec = normalize_spec({
+        "liga": liga_seleccionada,
+        "equipo": equipo_seleccionado,
+        "posicion": posicion_seleccionada,
+        "nacionalidad": nacionalidad_seleccionada,
+        "veredicto": veredicto_seleccionado,
+        "nombre": busqueda_nombre,
+        "incluir_archivados": incluir_archivados,
+        "percentil_campo": PUNTUACIONES_ANALITICA.get(percentil_label),
+        "percentil_grupo": GRUPOS_PERCENTIL[grupo_label],
+        "percentil_minimo": percentil_minimo
+    })
+    busqueda_guardada = show_saved_searches(spec)
     
     # Mostrar selector de jugador con la lista filtrada
-    jugadores = [""] + sorted(df_filtrado['jugador'].dropna().unique().tolist())
+    try:
+        nombres = saved_search_names(busqueda_guardada) if busqueda_guardada else None
+        if nombres is None:
+            nombres = _filtered_player_names(version, tuple(spec.items()))
+        jugadores = [""] + nombres
+    except Exception as e:
+        st.error(f"Error al aplicar los filtros: {str(e)}")
+        jugadores = [""]
+    # Tras editar o archivar un informe se ajusta la selección
+    pendiente = st.session_state.pop("jugador_pendiente", None)
+    if pendiente in jugadores:
+        st.session_state["jugador_selector"] = pendiente
     jugador_seleccionado = st.selectbox("Seleccionar jugador:", jugadores, key="jugador_selector")
     
-    if jugador_seleccionado:
-        jugador = df[df['jugador'] == jugador_seleccionado].iloc[0].to_dict()
-        
-        # Botón para generar PDF
-        if st.button("🖨️ IMPRIMIR INFORME EN PDF", key="generar_pdf_btn"):
-            with st.spinner('Generando informe PDF...'):
-                pdf_file = generate_pdf_report(jugador)
-                if pdf_file:
-                    create_download_button(pdf_file)
-        
-        # Mostrar la información del jugadores según el veredicto
-        veredicto = jugador.get('veredicto', '').upper()
-        if "FIRMAR" in veredicto:
-            st.success(f"## {jugador['jugador']} - {veredicto}")
-        elif "SEGUIR DE CERCA" in veredicto:
-            st.info(f"## {jugador['jugador']} - {veredicto}")
-        elif "SEGUIR" in veredicto and "CERCA" not in veredicto:
-            st.warning(f"## {jugador['jugador']} - {veredicto}")
-        elif "NO INTERESA" in veredicto:
-            st.error(f"## {jugador['jugador']} - {veredicto}")
-        else:
-            st.write(f"## {jugador['jugador']} - {veredicto}")
-        
-        # Crear layout de 4 columnas: Imagen + 3 columnas de información
-        col_img, col_info, col_club, col_pos = st.columns([1, 2, 2, 2])
-        
-        # Columna 1: Imagen del jugador
-        with col_img:
-            # Obtener la ruta de la imagen del CSV
-            img_path = str(jugador.get('imagen_path', '')).strip()
-            
-            # Si la ruta está vacía, usar None
-            if not img_path or pd.isna(img_path):
-                valid_path = None
-                img_url = None
-            else:
-                # Obtener el directorio base de la aplicación
-                base_dir = os.path.dirname(os.path.abspath(__file__))
-                
-                # Construir la ruta completa
-                full_path = os.path.join(base_dir, img_path)
-                
-                # Verificar si la ruta existe
-                valid_path = full_path if os.path.exists(full_path) else None
-                img_url = img_path  # Usar la ruta relativa para la URL
-            
-            # Debug: Mostrar información de la ruta (oculto)
-            if False:  # Cambiar a True para depuración
-                debug_info = f"""
-                <div style='display: none;'>
-                    Ruta del CSV: {img_path}<br>
-                    Ruta completa: {full_path if 'full_path' in locals() else 'N/A'}<br>
-                    ¿Existe?: {'Sí' if valid_path else 'No'}<br>
-                    Directorio actual: {os.getcwd()}
+    # El detalle está fuera del fragmento: solo se vuelve a pintar si cambia el jugador
+    if jugador_seleccionado != st.session_state.get("jugador_detalle", ""):
+        st.session_state["jugador_detalle"] = jugador_seleccionado
+        st.rerun()
+
+@st.fragment
+def show_pdf_action(jugador):
+    """Botón de impresión; pulsarlo no vuelve a pintar la ficha del jugador"""
+    if st.button("🖨️ IMPRIMIR INFORME EN PDF", key="generar_pdf_btn"):
+        with st.spinner('Generando informe PDF...'):
+            pdf = get_player_pdf(jugador)
+            if pdf:
+                show_download_link(pdf, f"Informe_{jugador.get('jugador') or 'jugador'}.pdf")
+
+def show_edit_report(jugador):
+    """Formulario precargado para editar el informe abierto"""
+    with st.expander("✏️ EDITAR INFORME"):
+        # Las claves incluyen la versión: tras guardar, el formulario se precarga de nuevo
+        datos, foto = show_report_form(
+            "editar_informe_form",
+            load_positions(),
+            valores=jugador,
+            key_prefix=f"editar_{jugador['report_id']}_{jugador['version']}_",
+            submit_label="💾 Guardar cambios"
+        )
+        if datos is None:
+            return
+        
+        datos.update({
+            "fecha_creacion": jugador.get('fecha_creacion'),
+            "report_id": jugador['report_id'],
+            "imagen_path": jugador.get('imagen_path')
+        })
+        # Editar un informe archivado no lo devuelve a los activos
+        if report_status(jugador) == STATUS_ARCHIVED:
+            datos['estado'] = STATUS_ARCHIVED
+        if update_player(datos, jugador, foto) is None:
+            return
+        
+        # Esperar al escritor para que la ficha muestre ya la versión nueva
+        get_store().flush(timeout=5.0)
+        st.session_state["mensaje_informe"] = f"¡Informe de {datos['jugador']} actualizado correctamente!"
+        st.session_state["jugador_pendiente"] = datos['jugador']
+        st.session_state["jugador_detalle"] = datos['jugador']
+        st.rerun()
+
+def change_report_status(jugador, accion, mensaje):
+    """Archiva, restaura o elimina un informe y vuelve a pintar la página"""
+    store = get_store()
+    try:
+        getattr(store, accion)(jugador)
+    except scouting_store.VersionConflictError as e:
+        st.error(f"No se cambió el estado: {str(e)}. Vuelva a abrir el informe para ver la versión actual.")
+        return
+    except Exception as e:
+        st.error(f"Error al cambiar el estado del informe: {str(e)}")
+        return
+    
+    store.flush(timeout=5.0)
+    st.session_state["mensaje_informe"] = mensaje
+    # Un informe restaurado sigue seleccionado; uno archivado o eliminado sale de la lista
+    seleccion = jugador['jugador'] if accion == "restore" else ""
+    st.session_state["jugador_pendiente"] = seleccion
+    st.session_state["jugador_detalle"] = seleccion
+    st.rerun()
+
+def show_status_actions(jugador):
+    """Botones para archivar o restaurar y para eliminar el informe abierto"""
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if report_status(jugador) == STATUS_ARCHIVED:
+            if st.button("♻️ RESTAURAR INFORME", key="restaurar_btn"):
+                change_report_status(jugador, "restore", f"Informe de {jugador['jugador']} restaurado")
+        elif st.button("🗄️ ARCHIVAR INFORME", key="archivar_btn"):
+            change_report_status(jugador, "archive", f"Informe de {jugador['jugador']} archivado")
+    
+    with col2:
+        confirmar = st.checkbox("Confirmo que quiero eliminar este informe", key=f"confirmar_eliminar_{jugador['report_id']}")
+        if st.button("🗑️ ELIMINAR INFORME", key="eliminar_btn", disabled=not confirmar):
+            change_report_status(jugador, "delete", f"Informe de {jugador['jugador']} eliminado")
+
+def show_database_page():
+    st.title("📊 BASE DE DATOS JUGADORES")
+    
+    # Cargar datos
+    if not os.path.exists(DATABASE_FILE):
+        st.warning("No se encontró la base de datos de jugadores. Por favor, cree al menos un informe.")
+        return
+        
+    # Los archivados solo se consultan si se piden en los filtros
+    df = load_players(include_archived=True)
+    
+    # Verificar si el DataFrame está vacío
+    if df.empty:
+        st.info("No hay jugadores registrados en la base de datos.")
+        return
+    
+    mensaje = st.session_state.pop("mensaje_informe", None)
+    if mensaje:
+        st.success(mensaje)
+    
+    show_database_filters()
+    
+    if not st.session_state.get("filtro_archivados", False):
+        df = load_players()
+    
+    jugador_seleccionado = st.session_state.get("jugador_detalle", "")
+    coincidencias = df.index[df['jugador'] == jugador_seleccionado] if jugador_seleccionado else []
+    if len(coincidencias):
+        jugador = load_player_record(df, coincidencias[0])
+        if report_status(jugador) == STATUS_ARCHIVED:
+            st.info("Este informe está archivado: no aparece en las búsquedas, contratos ni analítica.", icon="🗄️")
+        show_pdf_action(jugador)
+        show_edit_report(jugador)
+        show_status_actions(jugador)
+        show_player_detail(jugador)
+
+@st.cache_resource(show_spinner=False)
+def get_cache_manager():
+    """Presupuesto de memoria común a las cachés de fichas, fotos y PDF del proceso"""
+    manager = CacheManager()
+    # La copia local de las tablas (cambios aún sin publicar) no se puede desalojar
+    manager.reserve("tabla de jugadores", lambda: get_players_table().private_bytes())
+    manager.reserve("textos largos", lambda: get_long_text_table().private_bytes())
+    return manager
+
+def get_detail_html_cache():
+    """Fragmentos HTML de las fichas, compartidos entre sesiones con desalojo LRU"""
+    return get_cache_manager().cache("fichas", max_bytes=HTML_CACHE_BYTES, max_entries=DETAIL_CACHE_ENTRIES)
+
+def render_photo_html(jugador):
+    """HTML de la foto circular (o del marcador si no hay foto) y posible error"""
+    # Obtener la ruta de la imagen del CSV
+    img_path = str(jugador.get('imagen_path', '') or '').strip()
+    
+    valid_path = None
+    if img_path and img_path.lower() != 'nan':
+        # Construir la ruta completa desde el directorio de la aplicación
+        full_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), img_path)
+        valid_path = full_path if os.path.exists(full_path) else None
+    
+    if not valid_path:
+        # Placeholder si no hay imagen
+        return f"""
+            <div style='display: flex; flex-direction: column; align-items: center; margin-bottom: 20px;'>
+                <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; box-shadow: 0 4px 8px rgba(0,0,0,0.1); 
+                             margin-bottom: 10px; background: #f0f0f0; display: flex; align-items: center; justify-content: center;'>
+                    <div style='font-size: 40px; color: #999;'>👤</div>
                 </div>
-                """
-                st.markdown(debug_info, unsafe_allow_html=True)
-            
-            # Usar la ruta válida si se encontró alguna
-            if valid_path:
-                # Usar st.image con formato circular
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    # Crear un contenedor circular con CSS
-                    st.markdown(
-                        """
-                        <style>
-                        .circular-image {
-                            width: 150px;
-                            height: 150px;
-                            border-radius: 50%;
-                            overflow: hidden;
-                            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-                            margin: 0 auto 10px auto;
-                            background: #f0f0f0;
-                        }
-                        .circular-image img {
-                            width: 100%;
-                            height: 100%;
-                            object-fit: cover;
-                        }
-                        </style>
-                        """,
-                        unsafe_allow_html=True
-                    )
-                    
-                    # Mostrar la imagen usando st.image con base64
-                    try:
-                        import base64
-                        
-                        def get_image_base64(path):
-                            with open(path, 'rb') as img_file:
-                                return base64.b64encode(img_file.read()).decode('utf-8')
-                        
-                        # Convertir la imagen a base64
-                        img_base64 = get_image_base64(img_path)
-                        
-                        # Mostrar la imagen con HTML
-                        st.markdown(
-                            f"""
-                            <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; 
-                                         margin: 0 auto 10px auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);'>
-                                <img src='data:image/png;base64,{img_base64}' 
-                                     style='width: 100%; height: 100%; object-fit: cover;' 
-                                     alt='{jugador['jugador']}'>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
-                        )
-                    except Exception as e:
-                        st.error(f"Error al cargar la imagen: {str(e)}")
-                        # Mostrar placeholder en caso de error
-                        st.markdown(
-                            f"""
-                            <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; 
-                                         margin: 0 auto 10px auto; background: #f0f0f0; display: flex; 
-                                         align-items: center; justify-content: center;'>
-                                <div style='font-size: 40px; color: #999;'>👤</div>
-                            </div>
-                            <h4 style='text-align: center; margin: 5px 0;'>{jugador['jugador']}</h4>
-                            """,
-                            unsafe_allow_html=True
-                        )
-            else:
-                # Mostrar placeholder si no hay imagen
-                st.markdown(
-                    f"""
-                    <div style='display: flex; flex-direction: column; align-items: center; margin-bottom: 20px;'>
-                        <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; box-shadow: 0 4px 8px rgba(0,0,0,0.1); 
-                                     margin-bottom: 10px; background: #f0f0f0; display: flex; align-items: center; justify-content: center;'>
-                            <div style='font-size: 40px; color: #999;'>👤</div>
-                        </div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-        
-        # Columna 2: Información Personal
-        with col_info:
-            with st.container():
-                st.markdown("### 📋 Información Personal")
-                st.markdown(
-                    f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📅</span> <strong>Edad:</strong> {jugador.get('edad', 'No especificada')} años</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>{'🇦🇷' if 'argen' in str(jugador.get('nacionalidad', '')).lower() else '🌐'}</span> <strong>Nacionalidad:</strong> {jugador.get('nacionalidad', 'No especificada')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>⚽</span> <strong>Pie hábil:</strong> {jugador.get('pie', 'No especificado')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📏</span> <strong>Talla:</strong> {jugador.get('talla', 'No especificada')} cm</div>"
-                    f"</div>",
-                    unsafe_allow_html=True
-                )
-        
-        # Columna 3: Club y Contrato
-        with col_club:
-            with st.container():
-                st.markdown("### ⚽ Club y Contrato")
-                st.markdown(
-                    f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>👕</span> <strong>Club actual:</strong> {jugador.get('club_actual', 'Sin club')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>🏆</span> <strong>Liga:</strong> {jugador.get('liga', 'No especificada')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📅</span> <strong>Fin de contrato:</strong> {jugador.get('fin_contrato', 'No especificado')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>👤</span> <strong>Agente:</strong> {jugador.get('agente', 'No especificado')}</div>"
-                    f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📞</span> <strong>Teléfono:</strong> {jugador.get('telefono_agente', 'No especificado')}</div>"
-                    f"</div>",
-                    unsafe_allow_html=True
-                )
-        
-        # Columna 4: Posiciones
-        with col_pos:
-            with st.container():
-                st.markdown("### 🏷️ Posiciones")
-                st.markdown(
-                    f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
-                    f"<div style='margin: 15px 0;'><span style='font-size: 20px;'>⭐</span> <strong>Principal:</strong><br>{jugador.get('posicion_principal', 'No especificada')}</div>"
-                    f"<div style='margin: 15px 0;'><span style='font-size: 20px;'>🔹</span> <strong>Secundaria:</strong><br>{jugador.get('posicion_secundaria', 'No especificada')}</div>"
-                    f"</div>",
-                    unsafe_allow_html=True
-                )
-        
-        st.divider()
-        
-        st.divider()
-        
-        # ====================================
-        # SECCIÓN: ANÁLISIS DETALLADO
-        # ====================================
-        st.header("Análisis Detallado")
-        
-        # Calcular evaluación AUDAX
-        
-        # Sección 4 - Evaluación AUDAX
-        st.divider()
-        
-        # Calcular evaluación AUDAX: ((Rendimiento + Potencial + Adaptabilidad) / 18) * 10
-        rendimiento = float(jugador.get('rendimiento', 0)) if jugador.get('rendimiento') else 0
-        potencial = float(jugador.get('potencial', 0)) if jugador.get('potencial') else 0
-        adaptabilidad = float(jugador.get('adaptabilidad', 0)) if jugador.get('adaptabilidad') else 0
-        
-        # Asegurarse de que los valores estén en el rango correcto (0-10)
-        rendimiento = max(0, min(10, rendimiento))
-        potencial = max(0, min(10, potencial))
-        adaptabilidad = max(0, min(10, adaptabilidad))
-        
-        # Calcular puntuación AUDAX según la fórmula ((R + P + A) / 18) * 10
-        suma_valores = rendimiento + potencial + adaptabilidad
-        puntuacion_audax = (suma_valores / 18) * 10
-        puntuacion_audax = max(0, min(10, puntuacion_audax))  # Asegurar que esté entre 0 y 10
-        
-        # Crear layout horizontal para la evaluación AUDAX y métricas
-        col_audax, col_metrics = st.columns([2, 3])
-        
-        with col_audax:
-            # Mostrar evaluación AUDAX
-            st.markdown("### 📊 Evaluación AUDAX")
-            st.markdown(f"**Puntuación: {puntuacion_audax:.1f}/10**")
-            st.markdown(
-                f"<div style='height: 24px; width: 100%; background: #f0f2f6; border-radius: 12px; margin: 5px 0;'>"
-                f"<div style='height: 100%; width: {puntuacion_audax * 10}%; background: #1f77b4; border-radius: 12px; display: flex; align-items: center; justify-content: flex-end; padding-right: 10px; color: white; font-weight: bold;'>{puntuacion_audax:.1f}</div>"
-                f"</div>"
-                f"<div style='font-size: 0.9em; color: #666; margin-bottom: 10px;'>"
-                f"(({rendimiento} + {potencial} + {adaptabilidad}) / 18) × 10 = {puntuacion_audax:.1f}"
-                f"</div>",
-                unsafe_allow_html=True
-            )
+            </div>
+            """, None
+    
+    try:
+        img_base64 = get_image_base64(valid_path)
+    except Exception as e:
+        # Placeholder en caso de error
+        return f"""
+            <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; 
+                         margin: 0 auto 10px auto; background: #f0f0f0; display: flex; 
+                         align-items: center; justify-content: center;'>
+                <div style='font-size: 40px; color: #999;'>👤</div>
+            </div>
+            <h4 style='text-align: center; margin: 5px 0;'>{jugador['jugador']}</h4>
+            """, f"Error al cargar la imagen: {str(e)}"
+    
+    return f"""
+        <div style='width: 150px; height: 150px; border-radius: 50%; overflow: hidden; 
+                     margin: 0 auto 10px auto; box-shadow: 0 4px 8px rgba(0,0,0,0.1);'>
+            <img src='data:image/png;base64,{img_base64}' 
+                 style='width: 100%; height: 100%; object-fit: cover;' 
+                 alt='{jugador['jugador']}'>
+        </div>
+        """, None
+
+def render_info_cards_html(jugador):
+    """HTML de las tarjetas de información personal, club y posiciones"""
+    personal = (
+        f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📅</span> <strong>Edad:</strong> {jugador.get('edad', 'No especificada')} años</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>{'🇦🇷' if 'argen' in str(jugador.get('nacionalidad', '')).lower() else '🌐'}</span> <strong>Nacionalidad:</strong> {jugador.get('nacionalidad', 'No especificada')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>⚽</span> <strong>Pie hábil:</strong> {jugador.get('pie', 'No especificado')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📏</span> <strong>Talla:</strong> {jugador.get('talla', 'No especificada')} cm</div>"
+        f"</div>"
+    )
+    club = (
+        f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>👕</span> <strong>Club actual:</strong> {jugador.get('club_actual', 'Sin club')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>🏆</span> <strong>Liga:</strong> {jugador.get('liga', 'No especificada')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📅</span> <strong>Fin de contrato:</strong> {jugador.get('fin_contrato', 'No especificado')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>👤</span> <strong>Agente:</strong> {jugador.get('agente', 'No especificado')}</div>"
+        f"<div style='margin: 8px 0;'><span style='font-size: 20px;'>📞</span> <strong>Teléfono:</strong> {jugador.get('telefono_agente', 'No especificado')}</div>"
+        f"</div>"
+    )
+    posiciones = (
+        f"<div style='background-color: #f8f9fa; border-radius: 10px; padding: 15px; margin-bottom: 15px; height: 100%;'>"
+        f"<div style='margin: 15px 0;'><span style='font-size: 20px;'>⭐</span> <strong>Principal:</strong><br>{jugador.get('posicion_principal', 'No especificada')}</div>"
+        f"<div style='margin: 15px 0;'><span style='font-size: 20px;'>🔹</span> <strong>Secundaria:</strong><br>{jugador.get('posicion_secundaria', 'No especificada')}</div>"
+        f"</div>"
+    )
+    return personal, club, posiciones
+
+def audax_components(jugador):
+    """Rendimiento, potencial, adaptabilidad y puntuación AUDAX de un informe"""
+    # Calcular evaluación AUDAX: ((Rendimiento + Potencial + Adaptabilidad) / 18) * 10
+    rendimiento = float(jugador.get('rendimiento', 0)) if jugador.get('rendimiento') else 0
+    potencial = float(jugador.get('potencial', 0)) if jugador.get('potencial') else 0
+    adaptabilidad = float(jugador.get('adaptabilidad', 0)) if jugador.get('adaptabilidad') else 0
+    
+    # Asegurarse de que los valores estén en el rango correcto (0-10)
+    rendimiento = max(0, min(10, rendimiento))
+    potencial = max(0, min(10, potencial))
+    adaptabilidad = max(0, min(10, adaptabilidad))
+    
+    # Calcular puntuación AUDAX según la fórmula ((R + P + A) / 18) * 10
+    suma_valores = rendimiento + potencial + adaptabilidad
+    puntuacion_audax = (suma_valores / 18) * 10
+    puntuacion_audax = max(0, min(10, puntuacion_audax))  # Asegurar que esté entre 0 y 10
+    return rendimiento, potencial, adaptabilidad, puntuacion_audax
+
+def render_audax_html(rendimiento, potencial, adaptabilidad, puntuacion_audax):
+    """HTML de la barra de evaluación AUDAX"""
+    return (
+        f"<div style='height: 24px; width: 100%; background: #f0f2f6; border-radius: 12px; margin: 5px 0;'>"
+        f"<div style='height: 100%; width: {puntuacion_audax * 10}%; background: #1f77b4; border-radius: 12px; display: flex; align-items: center; justify-content: flex-end; padding-right: 10px; color: white; font-weight: bold;'>{puntuacion_audax:.1f}</div>"
+        f"</div>"
+        f"<div style='font-size: 0.9em; color: #666; margin-bottom: 10px;'>"
+        f"(({rendimiento} + {potencial} + {adaptabilidad}) / 18) × 10 = {puntuacion_audax:.1f}"
+        f"</div>"
+    )
+
+def render_evaluation_bar_html(valor):
+    """HTML de la barra de progreso de una evaluación 1-6"""
+    return (
+        f"<div style='height: 20px; width: 100%; background: #f0f2f6; border-radius: 10px; margin: 5px 0;'>"
+        f"<div style='height: 100%; width: {(valor/6)*100}%; background: #1f77b4; border-radius: 10px;'></div>"
+        f"</div>"
+        f"<div style='text-align: center; font-weight: bold;'>{valor}/6</div>"
+    )
+
+def render_detail_html(jugador):
+    """Genera todos los fragmentos HTML de la ficha de un informe"""
+    photo_html, photo_error = render_photo_html(jugador)
+    audax = audax_components(jugador)
+    return {
+        "photo": photo_html,
+        "photo_error": photo_error,
+        "cards": render_info_cards_html(jugador),
+        "audax": audax,
+        "audax_html": render_audax_html(*audax),
+        "evaluations": {
+            campo: render_evaluation_bar_html(int(jugador.get(campo, 0)))
+            for campo in ["evaluacion_tecnica", "evaluacion_tactica", "evaluacion_fisica", "evaluacion_mental"]
+        }
+    }
+
+def get_detail_html(jugador):
+    """Fragmentos HTML de la ficha, memoizados por report_id y versión"""
+    key = (jugador.get('report_id'), jugador.get('version'))
+    cache = get_detail_html_cache()
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = render_detail_html(jugador)
+        # Los errores de imagen pueden ser transitorios: no se guardan en caché
+        if not rendered["photo_error"]:
+            cache.put(key, rendered)
+    return rendered
+
+def get_metric_description(tipo, valor):
+    """Descripción de una métrica según su valor"""
+    valor = int(round(valor))
+    if tipo == 'rendimiento':
+        descripciones = [
+            "Muy por debajo del nivel de 1ª división de Chile.",
+            "Jugador de rol en equipos débiles de 1ª división o válido para 2ª división.",
+            "Cumple en equipos de media tabla baja en 1ª división de Chile o ligas equivalentes.",
+            "Buen rendimiento en 1ª división de Chile / titular fiable en Sudamérica competitiva.",
+            "Jugador diferencial en Sudamérica o titular en ligas europeas secundarias.",
+            "Rendimiento top nivel europeo, listo para competir en ligas Big 5 y torneos internacionales."
+        ]
+        return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
+    elif tipo == 'potencial':
+        descripciones = [
+            "No da nivel para 1ª división de Chile.",
+            "Jugador válido solo para ligas menores sudamericanas o 2ª división.",
+            "Jugador de nivel bajo/medio en 1ª división de Chile o ligas similares.",
+            "Jugador sólido en 1ª división de Chile / competitivo en ligas top sudamericanas.",
+            "Jugador con nivel para destacar en Sudamérica y con proyección de salto a ligas europeas secundarias.",
+            "Jugador con potencial claro para ligas top de Europa y competiciones internacionales."
+        ]
+        return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
+    else:  # adaptabilidad
+        descripciones = [
+            "Adaptación muy complicada: limitaciones de mentalidad, idioma o carácter.",
+            "Adaptación lenta, con riesgo de bajo rendimiento fuera de Sudamérica.",
+            "Adaptación posible con acompañamiento y tiempo de aclimatación.",
+            "Adaptación rápida en ligas sudamericanas y progresiva en Europa.",
+            "Adaptación sólida a corto plazo incluso en contextos europeos exigentes.",
+            "Adaptación inmediata: mentalidad profesional, sin barreras de idioma/cultura."
+        ]
+        return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
+
+def show_player_percentiles(jugador):
+    """Percentiles de las puntuaciones del informe dentro de su posición o su liga"""
+    st.divider()
+    col_titulo, col_grupo = st.columns([3, 1])
+    with col_titulo:
+        st.markdown("### 📐 Percentiles")
+    with col_grupo:
+        grupo_label = st.radio("Comparar con su:", list(GRUPOS_PERCENTIL), horizontal=True, key="detalle_percentil_grupo")
+    grupo = GRUPOS_PERCENTIL[grupo_label]
+    
+    try:
+        percentiles = scouting_aggregates.record_percentiles(load_cohort_aggregates(), jugador, grupo)
+    except Exception as e:
+        st.warning(f"No se pudieron calcular los percentiles: {str(e)}")
+        return
+    
+    st.caption(f"Posición del informe entre los de su {grupo_label.lower()} ({jugador.get(grupo) or 'Sin especificar'}), de 0 a 100")
+    columnas = st.columns(len(PUNTUACIONES_ANALITICA))
+    for col, (titulo, campo) in zip(columnas, PUNTUACIONES_ANALITICA.items()):
+        with col:
+            percentil = percentiles.get(campo)
+            st.metric(titulo, "N/A" if percentil is None else f"{percentil:.0f}")
+
+def show_player_detail(jugador):
+    """Ficha completa de un informe"""
+    html = get_detail_html(jugador)
+    
+    # Mostrar la información del jugadores según el veredicto
+    veredicto = (jugador.get('veredicto') or '').upper()
+    if "FIRMAR" in veredicto:
+        st.success(f"## {jugador['jugador']} - {veredicto}")
+    elif "SEGUIR DE CERCA" in veredicto:
+        st.info(f"## {jugador['jugador']} - {veredicto}")
+    elif "SEGUIR" in veredicto and "CERCA" not in veredicto:
+        st.warning(f"## {jugador['jugador']} - {veredicto}")
+    elif "NO INTERESA" in veredicto:
+        st.error(f"## {jugador['jugador']} - {veredicto}")
+    else:
+        st.write(f"## {jugador['jugador']} - {veredicto}")
+    
+    # Crear layout de 4 columnas: Imagen + 3 columnas de información
+    col_img, col_info, col_club, col_pos = st.columns([1, 2, 2, 2])
+    
+    # Columna 1: Imagen del jugador
+    with col_img:
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            if html["photo_error"]:
+                st.error(html["photo_error"])
+            st.markdown(html["photo"], unsafe_allow_html=True)
+    
+    card_personal, card_club, card_posiciones = html["cards"]
+    
+    # Columna 2: Información Personal
+    with col_info:
+        with st.container():
+            st.markdown("### 📋 Información Personal")
+            st.markdown(card_personal, unsafe_allow_html=True)
+    
+    # Columna 3: Club y Contrato
+    with col_club:
+        with st.container():
+            st.markdown("### ⚽ Club y Contrato")
+            st.markdown(card_club, unsafe_allow_html=True)
+    
+    # Columna 4: Posiciones
+    with col_pos:
+        with st.container():
+            st.markdown("### 🏷️ Posiciones")
+            st.markdown(card_posiciones, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    st.divider()
+    
+    # ====================================
+    # SECCIÓN: ANÁLISIS DETALLADO
+    # ====================================
+    st.header("Análisis Detallado")
+    
+    # Sección 4 - Evaluación AUDAX
+    st.divider()
+    
+    rendimiento, potencial, adaptabilidad, puntuacion_audax = html["audax"]
+    
+    # Crear layout horizontal para la evaluación AUDAX y métricas
+    col_audax, col_metrics = st.columns([2, 3])
+    
+    with col_audax:
+        # Mostrar evaluación AUDAX
+        st.markdown("### 📊 Evaluación AUDAX")
+        st.markdown(f"**Puntuación: {puntuacion_audax:.1f}/10**")
+        st.markdown(html["audax_html"], unsafe_allow_html=True)
+    
+    with col_metrics:
+        # Crear 3 columnas para las métricas
+        col1, col2, col3 = st.columns(3)
         
-        with col_metrics:
-            # Función para obtener la descripción según el valor
-            def get_metric_description(tipo, valor):
-                valor = int(round(valor))
-                if tipo == 'rendimiento':
-                    descripciones = [
-                        "Muy por debajo del nivel de 1ª división de Chile.",
-                        "Jugador de rol en equipos débiles de 1ª división o válido para 2ª división.",
-                        "Cumple en equipos de media tabla baja en 1ª división de Chile o ligas equivalentes.",
-                        "Buen rendimiento en 1ª división de Chile / titular fiable en Sudamérica competitiva.",
-                        "Jugador diferencial en Sudamérica o titular en ligas europeas secundarias.",
-                        "Rendimiento top nivel europeo, listo para competir en ligas Big 5 y torneos internacionales."
-                    ]
-                    return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
-                elif tipo == 'potencial':
-                    descripciones = [
-                        "No da nivel para 1ª división de Chile.",
-                        "Jugador válido solo para ligas menores sudamericanas o 2ª división.",
-                        "Jugador de nivel bajo/medio en 1ª división de Chile o ligas similares.",
-                        "Jugador sólido en 1ª división de Chile / competitivo en ligas top sudamericanas.",
-                        "Jugador con nivel para destacar en Sudamérica y con proyección de salto a ligas europeas secundarias.",
-                        "Jugador con potencial claro para ligas top de Europa y competiciones internacionales."
-                    ]
-                    return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
-                else:  # adaptabilidad
-                    descripciones = [
-                        "Adaptación muy complicada: limitaciones de mentalidad, idioma o carácter.",
-                        "Adaptación lenta, con riesgo de bajo rendimiento fuera de Sudamérica.",
-                        "Adaptación posible con acompañamiento y tiempo de aclimatación.",
-                        "Adaptación rápida en ligas sudamericanas y progresiva en Europa.",
-                        "Adaptación sólida a corto plazo incluso en contextos europeos exigentes.",
-                        "Adaptación inmediata: mentalidad profesional, sin barreras de idioma/cultura."
-                    ]
-                    return descripciones[valor-1] if 1 <= valor <= 6 else 'N/A'
+        with col1:
+            valor = int(round(rendimiento))
+            st.metric("RENDIMIENTO", f"{valor}")
+            st.caption(get_metric_description('rendimiento', rendimiento))
             
-            # Crear 3 columnas para las métricas
-            col1, col2, col3 = st.columns(3)
+        with col2:
+            valor = int(round(potencial))
+            st.metric("POTENCIAL", f"{valor}")
+            st.caption(get_metric_description('potencial', potencial))
             
-            with col1:
-                valor = int(round(rendimiento))
-                st.metric("RENDIMIENTO", f"{valor}")
-                st.caption(get_metric_description('rendimiento', rendimiento))
-                
-            with col2:
-                valor = int(round(potencial))
-                st.metric("POTENCIAL", f"{valor}")
-                st.caption(get_metric_description('potencial', potencial))
-                
-            with col3:
-                valor = int(round(adaptabilidad))
-                st.metric("ADAPTABILIDAD", f"{valor}")
-                st.caption(get_metric_description('adaptabilidad', adaptabilidad))
-        
-        
-        # Sección 5 - Evaluaciones Técnicas
-        st.divider()
-        st.markdown("### ⚙️ Evaluaciones Técnicas")
-        
-        # Crear 4 columnas para las evaluaciones
-        col1, col2, col3, col4 = st.columns(4)
-        
-        # Función para crear una tarjeta de evaluación
-        def crear_tarjeta_evaluacion(col, titulo, valor, observaciones):
-            with col:
-                st.markdown(f"**{titulo}**")
-                # Barra de progreso personalizada
-                st.markdown(
-                    f"<div style='height: 20px; width: 100%; background: #f0f2f6; border-radius: 10px; margin: 5px 0;'>"
-                    f"<div style='height: 100%; width: {(valor/6)*100}%; background: #1f77b4; border-radius: 10px;'></div>"
-                    f"</div>"
-                    f"<div style='text-align: center; font-weight: bold;'>{valor}/6</div>",
-                    unsafe_allow_html=True
-                )
-                if observaciones and str(observaciones).lower() != 'nan':
-                    st.caption(f"*{observaciones}*")
-        
-        # Mostrar cada evaluación en su columna correspondiente
-        crear_tarjeta_evaluacion(
-            col1, 
-            "Técnica", 
-            int(jugador.get('evaluacion_tecnica', 0)), 
-            jugador.get('observaciones_tecnica', '')
-        )
-        
-        crear_tarjeta_evaluacion(
-            col2, 
-            "Táctica", 
-            int(jugador.get('evaluacion_tactica', 0)), 
-            jugador.get('observaciones_tactica', '')
+        with col3:
+            valor = int(round(adaptabilidad))
+            st.metric("ADAPTABILIDAD", f"{valor}")
+            st.caption(get_metric_description('adaptabilidad', adaptabilidad))
+    
+    
+    # Sección 5 - Evaluaciones Técnicas
+    st.divider()
+    st.markdown("### ⚙️ Evaluaciones Técnicas")
+    
+    # Crear 4 columnas para las evaluaciones
+    col1, col2, col3, col4 = st.columns(4)
+    
+    # Función para crear una tarjeta de evaluación
+    def crear_tarjeta_evaluacion(col, titulo, campo, observaciones):
+        with col:
+            st.markdown(f"**{titulo}**")
+            # Barra de progreso personalizada
+            st.markdown(html["evaluations"][campo], unsafe_allow_html=True)
+            if observaciones and str(observaciones).lower() != 'nan':
+                st.caption(f"*{observaciones}*")
+    
+    # Mostrar cada evaluación en su columna correspondiente
+    crear_tarjeta_evaluacion(col1, "Técnica", 'evaluacion_tecnica', jugador.get('observaciones_tecnica', ''))
+    crear_tarjeta_evaluacion(col2, "Táctica", 'evaluacion_tactica', jugador.get('observaciones_tactica', ''))
+    crear_tarjeta_evaluacion(col3, "Física", 'evaluacion_fisica', jugador.get('observaciones_fisica', ''))
+    crear_tarjeta_evaluacion(col4, "Mental", 'evaluacion_mental', jugador.get('observaciones_mental', ''))
+    
+    show_player_percentiles(jugador)
+    
+    # ====================================
+    # SECCIÓN: CONCLUSIONES
+    # ====================================
+    st.divider()
+    st.subheader("📝 CONCLUSIONES")
+    
+    # Obtener datos del jugador
+    descripcion = jugador.get('descripcion_general', 'Sin información disponible')
+    historial = jugador.get('historial_medico', 'Sin información disponible')
+    referencias = jugador.get('referencias_adicionales', 'Sin información disponible')
+    
+    # Crear 3 columnas
+    col1, col2, col3 = st.columns(3)
+    
+    # Columna 1: Descripción General
+    with col1:
+        st.markdown("**Descripción General**")
+        st.info(
+            f"{descripcion if pd.notna(descripcion) and str(descripcion).lower() != 'nan' else 'Sin información disponible'}",
+            icon="ℹ️"
         )
-        
-        crear_tarjeta_evaluacion(
-            col3, 
-            "Física", 
-            int(jugador.get('evaluacion_fisica', 0)), 
-            jugador.get('observaciones_fisica', '')
+    
+    # Columna 2: Historial Médico
+    with col2:
+        st.markdown("**Historial Médico**")
+        st.warning(
+            f"{historial if pd.notna(historial) and str(historial).lower() != 'nan' else 'Sin información disponible'}",
+            icon="⚠️"
         )
-        
-        crear_tarjeta_evaluacion(
-            col4, 
-            "Mental", 
-            int(jugador.get('evaluacion_mental', 0)), 
-            jugador.get('observaciones_mental', '')
+    
+    # Columna 3: Referencias Adicionales
+    with col3:
+        st.markdown("**Referencias Adicionales**")
+        st.info(
+            f"{referencias if pd.notna(referencias) and str(referencias).lower() != 'nan' else 'Sin información disponible'}",
+            icon="📌"
         )
+    
+    st.divider()
+
+# ====================================
+# PÁGINA: CONTRATOS POR VENCER
+# ====================================
+
+def show_contracts_page():
+    """Muestra los jugadores cuyo contrato termina dentro de las próximas temporadas"""
+    st.title("📅 CONTRATOS POR VENCER")
+    
+    df = load_players()
+    if df.empty:
+        st.info("No hay jugadores registrados en la base de datos.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        temporadas = st.number_input("Terminan en las próximas temporadas:", min_value=0, max_value=10, value=1, step=1, key="contratos_temporadas")
+    
+    with col2:
+        veredictos = sorted(df['veredicto'].dropna().unique().tolist())
+        veredictos_seleccionados = st.multiselect("Veredicto:", veredictos, key="contratos_veredicto")
+    
+    with col3:
+        posiciones = sorted(df['posicion_principal'].dropna().unique().tolist())
+        posiciones_seleccionadas = st.multiselect("Posición:", posiciones, key="contratos_posicion")
+    
+    with col4:
+        audax_minimo = st.slider("AUDAX mínimo:", 0.0, 10.0, 0.0, 0.5, key="contratos_audax")
+    
+    # Consulta por rango sobre el índice ordenado de fin de contrato
+    anio_actual = datetime.now().year
+    report_ids = load_contract_index().between(anio_actual, anio_actual + int(temporadas))
+    resultado = df.loc[df.index.intersection(report_ids)]
+    
+    if veredictos_seleccionados:
+        resultado = resultado[resultado['veredicto'].isin(veredictos_seleccionados)]
+    if posiciones_seleccionadas:
+        resultado = resultado[
+            resultado['posicion_principal'].isin(posiciones_seleccionadas) |
+            resultado['posicion_secundaria'].isin(posiciones_seleccionadas)
+        ]
+    
+    resultado = resultado.assign(audax=audax_scores(resultado).round(1))
+    resultado = resultado[resultado['audax'] >= audax_minimo]
+    
+    st.markdown(f"**{len(resultado)} jugadores** con contrato hasta {anio_actual + int(temporadas)}")
+    columnas = ['jugador', 'club_actual', 'liga', 'fin_contrato', 'posicion_principal', 'veredicto', 'audax']
+    st.dataframe(
+        resultado[[c for c in columnas if c in resultado.columns]].sort_values(['fin_contrato', 'audax'], ascending=[True, False]),
+        use_container_width=True,
+        hide_index=True
+    )
+
+# ====================================
+# PÁGINA: COMPARAR JUGADORES
+# ====================================
+
+PUNTUACIONES_COMPARACION = ["rendimiento", "potencial", "adaptabilidad"]
+EVALUACIONES_COMPARACION = {
+    "Técnica": "evaluacion_tecnica",
+    "Táctica": "evaluacion_tactica",
+    "Física": "evaluacion_fisica",
+    "Mental": "evaluacion_mental"
+}
+DATOS_COMPARACION = {
+    "Club": "club_actual",
+    "Liga": "liga",
+    "Edad": "edad",
+    "Nacionalidad": "nacionalidad",
+    "Posición": "posicion_principal",
+    "Pie": "pie",
+    "Talla": "talla",
+    "Fin contrato": "fin_contrato",
+    "Veredicto": "veredicto"
+}
+
+def comparison_frame(df, report_ids):
+    """Informes seleccionados, en el orden elegido, con las puntuaciones derivadas
+
+    Una sola consulta por índice trae todas las filas; AUDAX y la media de
+    evaluaciones se calculan por columnas para todos los jugadores a la vez.
+    """
+    ids = [report_id for report_id in report_ids if report_id in df.index]
+    seleccion = df.loc[ids]
+    puntuaciones = seleccion[PUNTUACIONES_COMPARACION].apply(pd.to_numeric, errors="coerce").fillna(0).clip(0, 10)
+    evaluaciones = seleccion[list(EVALUACIONES_COMPARACION.values())].apply(pd.to_numeric, errors="coerce").fillna(0).clip(0, 6)
+    return seleccion.assign(
+        **{campo: puntuaciones[campo] for campo in PUNTUACIONES_COMPARACION},
+        **{campo: evaluaciones[campo].astype("int64") for campo in EVALUACIONES_COMPARACION.values()},
+        audax=audax_scores(seleccion).round(1),
+        media_evaluaciones=evaluaciones.mean(axis=1).round(1)
+    )
+
+def comparison_table(comparacion):
+    """Tabla con un jugador por columna y los datos alineados por filas"""
+    filas = {**DATOS_COMPARACION, "AUDAX": "audax"}
+    filas.update({campo.capitalize(): campo for campo in PUNTUACIONES_COMPARACION})
+    filas.update(EVALUACIONES_COMPARACION)
+    filas["Media evaluaciones"] = "media_evaluaciones"
+    tabla = comparacion[list(filas.values())].astype(object).fillna("").astype(str).T
+    tabla.index = list(filas)
+    tabla.columns = comparacion['jugador'].astype(str).tolist()
+    return tabla
+
+def generate_comparison_pdf_report(jugadores):
+    """Genera un único PDF con la comparativa y el resumen de una página de cada jugador"""
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='_comparativa.pdf') as tmp_file:
+            output_path = tmp_file.name
         
-        # ====================================
-        # SECCIÓN: CONCLUSIONES
-        # ====================================
-        st.divider()
-        st.subheader("📝 CONCLUSIONES")
-        
-        # Obtener datos del jugador
-        descripcion = jugador.get('descripcion_general', 'Sin información disponible')
-        historial = jugador.get('historial_medico', 'Sin información disponible')
-        referencias = jugador.get('referencias_adicionales', 'Sin información disponible')
-        
-        # Crear 3 columnas
-        col1, col2, col3 = st.columns(3)
-        
-        # Columna 1: Descripción General
-        with col1:
-            st.markdown("**Descripción General**")
-            st.info(
-                f"{descripcion if pd.notna(descripcion) and str(descripcion).lower() != 'nan' else 'Sin información disponible'}",
-                icon="ℹ️"
-            )
+        pdf_module = lazy_import("pdf_generator_enhanced")
+        success, error_message = pdf_module.generate_players_pdf(jugadores, output_path)
         
-        # Columna 2: Historial Médico
-        with col2:
-            st.markdown("**Historial Médico**")
-            st.warning(
-                f"{historial if pd.notna(historial) and str(historial).lower() != 'nan' else 'Sin información disponible'}",
-                icon="⚠️"
-            )
+        if not success:
+            raise Exception(error_message)
+            
+        return output_path
         
-        # Columna 3: Referencias Adicionales
-        with col3:
-            st.markdown("**Referencias Adicionales**")
-            st.info(
-                f"{referencias if pd.notna(referencias) and str(referencias).lower() != 'nan' else 'Sin información disponible'}",
-                icon="📌"
+    except Exception as e:
+        st.error(f"Error al generar el PDF: {str(e)}")
+        return None
+
+@st.fragment
+def show_comparison_pdf_action(comparacion):
+    """Botón de impresión de la comparativa; no vuelve a pintar la página"""
+    if st.button("🖨️ IMPRIMIR COMPARATIVA EN PDF", key="comparar_pdf_btn"):
+        with st.spinner('Generando comparativa PDF...'):
+            jugadores = [to_record(fila) for _, fila in comparacion.iterrows()]
+            pdf_file = generate_comparison_pdf_report(jugadores)
+            if pdf_file:
+                create_download_button(pdf_file)
+
+def show_comparison_page():
+    """Compara lado a lado hasta COMPARISON_MAX_PLAYERS informes"""
+    st.title("⚖️ COMPARAR JUGADORES")
+    
+    df = load_players()
+    if df.empty:
+        st.info("No hay jugadores registrados en la base de datos.")
+        return
+    
+    etiquetas = (df['jugador'].astype(str) + " (" + df['club_actual'].astype(str) + ")").to_dict()
+    seleccionados = st.multiselect(
+        f"Seleccione hasta {COMPARISON_MAX_PLAYERS} jugadores:",
+        df.index.tolist(),
+        format_func=lambda report_id: etiquetas.get(report_id, report_id),
+        max_selections=COMPARISON_MAX_PLAYERS,
+        key="comparar_jugadores"
+    )
+    if len(seleccionados) < 2:
+        st.info("Seleccione al menos dos jugadores para compararlos.")
+        return
+    
+    comparacion = comparison_frame(df, seleccionados)
+    
+    st.dataframe(comparison_table(comparacion), use_container_width=True)
+    
+    # Barras alineadas: una columna por jugador
+    st.divider()
+    columnas = st.columns(len(comparacion))
+    for col, (_, fila) in zip(columnas, comparacion.iterrows()):
+        with col:
+            st.markdown(f"**{fila['jugador']}**")
+            st.caption(str(fila['veredicto']))
+            st.markdown(
+                render_audax_html(*(fila[campo] for campo in PUNTUACIONES_COMPARACION), fila['audax']),
+                unsafe_allow_html=True
             )
-        
-        st.divider()
+            for titulo, campo in EVALUACIONES_COMPARACION.items():
+                st.markdown(f"**{titulo}**")
+                st.markdown(render_evaluation_bar_html(int(fila[campo])), unsafe_allow_html=True)
+    
+    st.divider()
+    show_comparison_pdf_action(comparacion)
+
+# ====================================
+# PÁGINA: ANALÍTICA
+# ====================================
+
+DIMENSIONES_ANALITICA = {
+    "Liga": "liga",
+    "Posición": "posicion_principal",
+    "Veredicto": "veredicto",
+    "Nacionalidad": "nacionalidad"
+}
+
+PUNTUACIONES_ANALITICA = {
+    "Rendimiento": "rendimiento",
+    "Potencial": "potencial",
+    "Adaptabilidad": "adaptabilidad",
+    "Técnica": "evaluacion_tecnica",
+    "Táctica": "evaluacion_tactica",
+    "Física": "evaluacion_fisica",
+    "Mental": "evaluacion_mental"
+}
+
+def show_analytics_page():
+    """Muestra conteos y distribuciones a partir de los agregados materializados"""
+    st.title("📈 ANALÍTICA")
+    
+    if not os.path.exists(DATABASE_FILE):
+        st.warning("No se encontró la base de datos de jugadores. Por favor, cree al menos un informe.")
+        return
+    
+    try:
+        aggregates = scouting_aggregates.load_aggregates(DATABASE_FILE, load_players, get_store().events)
+    except Exception as e:
+        st.error(f"Error al cargar la analítica: {str(e)}")
+        return
+    
+    if not aggregates["total"]:
+        st.info("No hay jugadores registrados en la base de datos.")
+        return
+    
+    st.metric("Informes registrados", aggregates["total"])
+    
+    # Conteos por dimensión
+    st.subheader("Informes por categoría")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        dimension_label = st.selectbox("Agrupar por:", list(DIMENSIONES_ANALITICA), key="analitica_dimension")
+    dimension = DIMENSIONES_ANALITICA[dimension_label]
+    with col2:
+        st.bar_chart(scouting_aggregates.counts_frame(aggregates, dimension))
+    
+    # Distribución de puntuaciones
+    st.divider()
+    st.subheader("Distribución de puntuaciones (1-6)")
+    puntuacion_label = st.selectbox("Puntuación:", list(PUNTUACIONES_ANALITICA), key="analitica_puntuacion")
+    distribucion = scouting_aggregates.score_distribution_frame(
+        aggregates, dimension, PUNTUACIONES_ANALITICA[puntuacion_label]
+    )
+    st.dataframe(distribucion, use_container_width=True)
+    
+    # Informes por ojeador y mes
+    st.divider()
+    st.subheader("Informes por ojeador y mes")
+    st.dataframe(scouting_aggregates.scout_month_frame(aggregates), use_container_width=True)
+    
+    # Uso de memoria de las cachés de este proceso
+    with st.expander("Memoria de las cachés"):
+        manager = get_cache_manager()
+        stats = manager.stats()
+        st.caption(
+            f"Presupuesto {stats['budget_bytes'] / 2**20:.0f} MB · en uso {stats['used_bytes'] / 2**20:.1f} MB · "
+            f"reservado {stats['reserved_bytes'] / 2**20:.1f} MB · desalojos por presupuesto {stats['budget_evictions']}"
+        )
+        st.dataframe(manager.stats_frame(), use_container_width=True)
+
+# ====================================
+# PÁGINA: PAQUETES SIN CONEXIÓN
+# ====================================
+
+def show_bundle_export():
+    """Descarga de un paquete con los informes de esta instancia"""
+    st.subheader("📤 Exportar informes de esta instancia")
+    col1, col2 = st.columns(2)
+    with col1:
+        origen = st.text_input("Ojeador o viaje:", key="paquete_origen")
+    with col2:
+        desde = st.date_input("Informes creados desde:", value=None, key="paquete_desde")
+    if st.button("📦 GENERAR PAQUETE", key="paquete_exportar_btn"):
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
+            ruta = tmp.name
+        try:
+            get_store().flush(timeout=5.0)
+            manifiesto = export_bundle(ruta, DATABASE_FILE, since=desde.isoformat() if desde else None,
+                                       source=origen or None)
+            with open(ruta, "rb") as f:
+                datos = f.read()
+        except Exception as e:
+            st.error(f"Error al generar el paquete: {str(e)}")
+            return
+        finally:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+        st.success(f"Paquete con {manifiesto['reports']} informes y {manifiesto['images']} fotos")
+        st.download_button("⬇️ Descargar paquete", datos, file_name=f"informes_{datetime.now():%Y%m%d_%H%M}.zip",
+                           mime="application/zip", key="paquete_descargar_btn")
+
+def show_bundle_import():
+    """Importación de un paquete en esta base de datos como una sola transacción"""
+    st.subheader("📥 Importar un paquete")
+    paquete = st.file_uploader("Paquete de informes (.zip)", type=["zip"], key="paquete_importar")
+    if paquete is None or not st.button("📥 IMPORTAR PAQUETE", key="paquete_importar_btn"):
+        return
+    store = get_store()
+    try:
+        with st.spinner("Importando informes..."):
+            resumen = import_bundle(paquete.getvalue(), store, DATABASE_FILE)
+            store.flush(timeout=60.0)
+    except BundleError as e:
+        st.error(f"El paquete no es válido: {str(e)}")
+        return
+    except scouting_store.VersionConflictError as e:
+        st.error(f"No se importó nada: {str(e)}. Vuelva a importar el paquete.")
+        return
+    except Exception as e:
+        st.error(f"Error al importar el paquete: {str(e)}")
+        return
+    
+    st.success(f"Paquete de {resumen['origen']}: {format_summary(resumen)}")
+    if resumen["conflictos"]:
+        st.warning("Informes editados también en la central; se conservó la versión de la central:")
+        st.dataframe(
+            pd.DataFrame(resumen["conflictos"], columns=["report_id", "jugador", "versión paquete", "versión central"]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+def show_bundles_page():
+    st.title("📦 PAQUETES SIN CONEXIÓN")
+    st.markdown("Los informes creados sin conexión se exportan en un paquete con sus fotos y se importan "
+                "en la base de datos central de una sola vez.")
+    show_bundle_export()
+    st.markdown("---")
+    show_bundle_import()
+
+# ====================================
+# CALENTAMIENTO AL ARRANCAR
+# ====================================
+
+def warm_pdf_fonts():
+    """Importa fpdf2, analiza las fuentes y compila las plantillas generando PDF en memoria"""
+    pdf_module = lazy_import("pdf_generator_enhanced")
+    for sections in (pdf_module.FULL_SECTIONS, pdf_module.SUMMARY_SECTIONS):
+        renderer = pdf_module.ReportRenderer(sections)
+        renderer.add_player({"jugador": "Calentamiento"})
+        renderer.pdf.output()
+
+def warmup_steps():
+    """Trabajo que haría en frío la primera sesión, en el orden en que lo necesita"""
+    return [
+        ("Almacén de informes", get_store),
+        ("Tabla de jugadores", lambda: (load_players(), load_players(include_archived=True))),
+        ("Opciones de filtros", lambda: [_filter_options(database_version(), archivados) for archivados in (False, True)]),
+        ("Valores canónicos", lambda: [entity_options(campo) for campo in ENTITY_FIELDS]),
+        ("Búsquedas guardadas", lambda: get_saved_searches().refresh(get_store().events, DATABASE_FILE)),
+        ("Agregados por cohorte", load_cohort_aggregates),
+        ("Índice de contratos", load_contract_index),
+        ("Textos largos", lambda: get_long_text_table().get(DATABASE_FILE)),
+        ("Posiciones", load_positions),
+        ("Logos", lambda: [get_image_base64(logo) for logo in (LOGO_AUDAX, LOGO_LIGA)]),
+        ("Fuentes del PDF", warm_pdf_fonts),
+    ]
+
+@st.cache_resource(show_spinner=False)
+def get_warmup():
+    """Calentamiento del proceso: lo inicia la primera sesión y lo comparten todas"""
+    return WarmUp(warmup_steps()).start()
+
+def wait_for_warmup():
+    """Muestra el progreso del calentamiento hasta que termine (o se agote la espera)"""
+    warmup = get_warmup()
+    if warmup.ready:
+        return
+    barra = st.progress(0.0, text="Preparando la aplicación...")
+    limite = time.monotonic() + WARMUP_WAIT_SECONDS
+    while not warmup.wait(0.25) and time.monotonic() < limite:
+        hechos, total, actual = warmup.progress()
+        barra.progress(hechos / total, text=f"Preparando la aplicación: {actual or 'terminando'}...")
+    barra.empty()
 
 # ====================================
 # FUNCIÓN PRINCIPAL
 # ====================================
 
 def get_image_base64(image_path):
-    import base64
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode('utf-8')
+    """Imagen en base64, en caché por ruta y fecha de modificación"""
+    stat = os.stat(image_path)
+    key = (image_path, stat.st_mtime_ns, stat.st_size)
+    cache = get_cache_manager().cache("fotos", max_bytes=PHOTO_CACHE_BYTES)
+    encoded = cache.get(key)
+    if encoded is None:
+        with open(image_path, "rb") as img_file:
+            encoded = base64.b64encode(img_file.read()).decode('utf-8')
+        cache.put(key, encoded)
+    return encoded
 
 def main():
+    wait_for_warmup()
+    
     # Sidebar para navegación
     try:
-        audax_logo = get_image_base64("AudaxEscudo.png")
-        liga_logo = get_image_base64("ligachile1.png")
+        audax_logo = get_image_base64(LOGO_AUDAX)
+        liga_logo = get_image_base64(LOGO_LIGA)
         st.sidebar.markdown(f'<img src="data:image/png;base64,{audax_logo}" width="80">', unsafe_allow_html=True)
     except Exception as e:
         st.sidebar.error("Error cargando logos")
@@ -827,7 +1731,8 @@ def main():
     st.sidebar.title("Navegación")
     page = st.sidebar.selectbox(
         "Seleccione una página:",
-        ["NUEVO INFORME", "BASE DE DATOS JUGADORES"]
+        ["NUEVO INFORME", "BASE DE DATOS JUGADORES", "COMPARAR JUGADORES", "CONTRATOS POR VENCER", "ANALÍTICA",
+         "PAQUETES SIN CONEXIÓN"]
     )
     
     # Header principal
@@ -857,6 +1762,14 @@ def main():
         show_new_report_page()
     elif page == "BASE DE DATOS JUGADORES":
         show_database_page()
+    elif page == "COMPARAR JUGADORES":
+        show_comparison_page()
+    elif page == "CONTRATOS POR VENCER":
+        show_contracts_page()
+    elif page == "ANALÍTICA":
+        show_analytics_page()
+    elif page == "PAQUETES SIN CONEXIÓN":
+        show_bundles_page()
 
 # Ejecutar la aplicación
 if __name__ == "__main__":
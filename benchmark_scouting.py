@@ -0,0 +1,385 @@
+"""
+Benchmark del sistema de scouting con datos sintéticos.
+
+Genera bases de datos sintéticas con el esquema de ``create_initial_database``
+(incluyendo imágenes y observaciones largas) y mide las rutas críticas de la
+aplicación: ``load_players``, la cadena de filtros de ``show_database_page``,
+``save_player``, ``load_positions`` y ``generate_player_pdf``.
+
+Uso:
+    python benchmark_scouting.py
+    python benchmark_scouting.py --sizes 1000 10000 --output resultados.json
+    python benchmark_scouting.py --compare benchmark_baseline.json --threshold 1.25
+
+Los resultados se escriben en JSON. Con ``--compare`` el script termina con
+código 1 si alguna operación es más lenta que la referencia por encima del
+umbral, para poder usarlo como control antes de desplegar.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import app_new
+import scouting_store
+from field_bundles import export_bundle, import_bundle
+from pdf_generator_enhanced import SUMMARY_SECTIONS, generate_player_pdf, generate_players_pdf
+from scouting_digest import generate_digest
+from scouting_snapshots import SnapshotManager
+
+# ====================================
+# CONSTANTES
+# ====================================
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+NOMBRES = ["Lucas", "Lautaro", "Matías", "Diego", "Sebastián", "Nicolás", "Joaquín", "Tomás",
+           "Benjamín", "Vicente", "Martín", "Felipe", "Ignacio", "Cristóbal", "Agustín", "Bruno"]
+APELLIDOS = ["Rivero", "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras",
+             "Silva", "Martínez", "Sepúlveda", "Morales", "Fernández", "Vargas", "Castillo"]
+CLUBES = ["River Plate", "Boca Juniors", "Colo-Colo", "Universidad de Chile", "Universidad Católica",
+          "Palmeiras", "Flamengo", "Peñarol", "Nacional", "Racing Club", "Independiente",
+          "Cobreloa", "Huachipato", "Everton", "Unión Española", "Defensor Sporting"]
+LIGAS = ["Liga Argentina", "Liga de Primera Chile", "Brasileirão", "Liga Uruguaya",
+         "Primera B Chile", "Liga Colombiana", "Liga Paraguaya"]
+NACIONALIDADES = ["Chile", "Argentina", "Uruguay", "Brasil", "Colombia", "Paraguay", "España", "Perú"]
+POSICIONES = [
+    'Portero', 'Lateral Izquierdo', 'Lateral Derecho', 'Defensa Central',
+    'Pivote', 'Mediocentro', 'Mediocentro Defensivo', 'Mediocentro Ofensivo',
+    'Interior Izquierdo', 'Interior Derecho', 'Extremo Izquierdo', 'Extremo Derecho',
+    'Mediapunta', 'Delantero Centro', 'Segundo Delantero'
+]
+PIES = ["Derecho", "Izquierdo", "Ambidiestro"]
+ESTADOS_LESIONES = ["NO", "REVISAR", "ÚLTIMOS 3 AÑOS LESIONES RELEVANTES"]
+VEREDICTOS = [
+    "FIRMAR – Mejora plantilla",
+    "SEGUIR DE CERCA – Nivel de plantilla",
+    "SEGUIR – Complemento de plantilla",
+    "NO INTERESA – No cumple con los requisitos"
+]
+FRASES = [
+    "Buen perfil corporal y lectura de juego por encima de la media de la categoría.",
+    "Toma decisiones rápidas bajo presión y mantiene la concentración los noventa minutos.",
+    "Necesita mejorar la perfilación con la pierna menos hábil en salida de balón.",
+    "Muy agresivo en la presión tras pérdida, recupera alto y conduce con criterio.",
+    "Acompaña bien las transiciones defensivas aunque sufre a la espalda en bloque alto.",
+    "Carácter competitivo, lidera al grupo y comunica constantemente con la línea.",
+    "Juego aéreo dominante en ambas áreas, sólido en el duelo individual.",
+    "Irregular en partidos de visita, conviene seguirlo en contextos de alta exigencia."
+]
+
+# ====================================
+# GENERACIÓN DE DATOS SINTÉTICOS
+# ====================================
+
+def get_schema_columns():
+    """Obtiene las columnas del esquema creando una base de datos vacía"""
+    app_new.create_initial_database()
+    columns = pd.read_csv(app_new.DATABASE_FILE, nrows=0).columns.tolist()
+    # El formulario guarda además la liga, que no forma parte del esquema inicial
+    if "liga" not in columns:
+        columns.append("liga")
+    return columns
+
+def create_synthetic_images(count=8, directory="jugadores_img"):
+    """Crea imágenes de prueba con Pillow y devuelve sus rutas relativas"""
+    from PIL import Image
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(0)
+    paths = []
+    for i in range(count):
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        img = Image.new("RGB", (600, 800), color)
+        ext = ".png" if i % 2 == 0 else ".jpg"
+        path = os.path.join(directory, f"sintetico_{i}{ext}")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+def long_text(rng, sentences=6):
+    """Genera una observación larga combinando frases de ejemplo"""
+    return " ".join(rng.choice(FRASES) for _ in range(sentences))
+
+def generate_synthetic_reports(n_rows, columns, image_paths, seed=42):
+    """Genera un DataFrame de informes sintéticos con el esquema indicado"""
+    rng = random.Random(seed)
+    # Reutilizar un conjunto fijo de textos largos para que la generación escale a 1M de filas
+    textos = [long_text(rng) for _ in range(64)]
+    inicio = datetime(2024, 1, 1)
+
+    def texto():
+        return rng.choice(textos)
+
+    generators = {
+        "fecha_creacion": lambda i: (inicio + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+        "jugador": lambda i: f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {i}",
+        "edad": lambda i: rng.randint(16, 38),
+        "talla": lambda i: rng.randint(160, 200),
+        "fecha_nacimiento": lambda i: rng.randint(1985, 2008),
+        "nacionalidad": lambda i: rng.choice(NACIONALIDADES),
+        "pie": lambda i: rng.choice(PIES),
+        "club_actual": lambda i: rng.choice(CLUBES),
+        "fin_contrato": lambda i: rng.randint(2024, 2030),
+        "agente": lambda i: rng.choice(APELLIDOS),
+        "telefono_agente": lambda i: str(rng.randint(600000000, 699999999)),
+        "posicion_principal": lambda i: rng.choice(POSICIONES),
+        "posicion_secundaria": lambda i: rng.choice(POSICIONES + [""]),
+        "descripcion_general": lambda i: texto(),
+        "estado_lesiones": lambda i: rng.choice(ESTADOS_LESIONES),
+        "veredicto": lambda i: rng.choice(VEREDICTOS),
+        "imagen_path": lambda i: rng.choice(image_paths) if image_paths else "",
+        "liga": lambda i: rng.choice(LIGAS),
+    }
+    for campo in ["rendimiento", "potencial", "adaptabilidad", "evaluacion_tecnica",
+                  "evaluacion_tactica", "evaluacion_fisica", "evaluacion_mental"]:
+        generators[campo] = lambda i: rng.randint(1, 6)
+    for campo in ["observaciones_tecnica", "observaciones_tactica", "observaciones_fisica",
+                  "observaciones_mental", "referencias", "historial_lesiones"]:
+        generators[campo] = lambda i: texto()
+
+    data = {}
+    for column in columns:
+        generator = generators.get(column, lambda i: "")
+        data[column] = [generator(i) for i in range(n_rows)]
+    return pd.DataFrame(data, columns=columns)
+
+class SyntheticUpload:
+    """Imita el objeto UploadedFile de Streamlit para save_player"""
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        with open(path, "rb") as f:
+            self._data = f.read()
+
+    def getvalue(self):
+        return self._data
+
+# ====================================
+# MEDICIÓN
+# ====================================
+
+def measure(func, repeats=3):
+    """Ejecuta una función varias veces y devuelve estadísticas en segundos"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "repeats": repeats,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+    }
+
+def benchmark_size(n_rows, repeats=3, seed=42):
+    """Mide todas las operaciones sobre una base de datos de n_rows informes"""
+    results = {}
+    columns = get_schema_columns()
+    image_paths = create_synthetic_images()
+
+    start = time.perf_counter()
+    df = generate_synthetic_reports(n_rows, columns, image_paths, seed=seed)
+    df.to_csv(app_new.DATABASE_FILE, index=False)
+    results["generation_seconds"] = time.perf_counter() - start
+    results["csv_bytes"] = os.path.getsize(app_new.DATABASE_FILE)
+
+    operations = {}
+    def load_players_cold():
+        app_new.get_players_table.clear()
+        return app_new.load_players()
+
+    operations["load_players"] = measure(load_players_cold, repeats)
+    operations["load_players_cached"] = measure(app_new.load_players, repeats)
+
+    loaded = app_new.load_players()
+    # Memoria de la tabla tipada frente a la lectura sin tipos, sobre las mismas columnas
+    # (los textos largos se cargan aparte y el índice difiere)
+    header = pd.read_csv(app_new.DATABASE_FILE, nrows=0).columns
+    shared_columns = [c for c in loaded.columns if c in header]
+    raw = pd.read_csv(app_new.DATABASE_FILE, usecols=shared_columns)
+    results["table_columns"] = len(shared_columns)
+    results["table_bytes"] = int(loaded[shared_columns].memory_usage(deep=True, index=False).sum())
+    results["raw_table_bytes"] = int(raw[shared_columns].memory_usage(deep=True, index=False).sum())
+    sample = loaded.iloc[len(loaded) // 2]
+    filtros = {
+        "liga": sample["liga"],
+        "equipo": sample["club_actual"],
+        "posicion": sample["posicion_principal"],
+        "nacionalidad": sample["nacionalidad"],
+        "nombre": str(sample["jugador"]).split()[0],
+    }
+    operations["filter_players"] = measure(lambda: app_new.filter_players(loaded, **filtros), repeats)
+    operations["filter_options"] = measure(
+        lambda: [sorted(loaded[c].dropna().unique().tolist())
+                 for c in ["liga", "club_actual", "posicion_principal", "nacionalidad"]],
+        repeats
+    )
+
+    # Búsqueda guardada: la primera apertura aplica los filtros, las siguientes usan el resultado en caché
+    busquedas = app_new.get_saved_searches()
+    busquedas.save("benchmark", {"liga": sample["liga"], "posicion": sample["posicion_principal"]})
+    operations["saved_search_first_open"] = measure(lambda: app_new.saved_search_names("benchmark"), 1)
+    operations["saved_search_open"] = measure(lambda: app_new.saved_search_names("benchmark"), repeats)
+
+    nuevo = generate_synthetic_reports(1, columns, image_paths, seed=seed + 1).iloc[0].to_dict()
+    nuevo.pop("imagen_path", None)
+    upload = SyntheticUpload(image_paths[0])
+    # save_player retorna al registrar el informe en el diario; la incorporación al CSV se mide aparte
+    operations["save_player"] = measure(lambda: app_new.save_player(dict(nuevo), upload), repeats)
+    store = app_new.get_store()
+    operations["save_player_applied"] = measure(
+        lambda: (app_new.save_player(dict(nuevo), upload), store.flush(timeout=600)), repeats
+    )
+
+    # Edición de un informe existente: nueva versión, índices y tabla incremental al día
+    def update_player_applied():
+        previous = app_new.load_player_record(app_new.load_players(), sample.name)
+        app_new.update_player(dict(previous, jugador=f"{previous['jugador']} (editado)"), previous)
+        store.flush(timeout=600)
+        return app_new.load_players()
+
+    operations["update_player_applied"] = measure(update_player_applied, repeats)
+
+    # Archivar escribe una lápida; la compactación reescribe el CSV sin filas muertas
+    def archive_player_applied():
+        previous = app_new.load_player_record(app_new.load_players(include_archived=True), sample.name)
+        (store.restore if previous.get("estado") == "archivado" else store.archive)(previous)
+        store.flush(timeout=600)
+        return app_new.load_players()
+
+    operations["archive_player_applied"] = measure(archive_player_applied, repeats)
+
+    # Copia completa frente a copia incremental tras un informe nuevo
+    snapshots = SnapshotManager(store=store)
+    operations["snapshot_full"] = measure(snapshots.create, 1)
+    operations["snapshot_incremental"] = measure(
+        lambda: (app_new.save_player(dict(nuevo), upload), store.flush(timeout=600), snapshots.create()), repeats
+    )
+
+    # Paquete sin conexión: informes de una semana de viajes importados en una sola transacción
+    generate_synthetic_reports(200, columns, image_paths, seed=seed + 2).to_csv("bundle_local.csv", index=False)
+    operations["bundle_export_200"] = measure(lambda: export_bundle("bundle.zip", "bundle_local.csv"), 1)
+    operations["bundle_import_200"] = measure(
+        lambda: (import_bundle("bundle.zip", store, app_new.DATABASE_FILE), store.flush(timeout=600)), 1
+    )
+
+    # Resumen periódico: la primera vez recorre el CSV, después solo lee lo añadido
+    desde = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    operations["digest_full_scan"] = measure(
+        lambda: generate_digest(since=desde, database_file=app_new.DATABASE_FILE, store=store), 1
+    )
+    for _ in range(10):
+        app_new.save_player(dict(nuevo), upload)
+    store.flush(timeout=600)
+    operations["digest_incremental_10"] = measure(
+        lambda: generate_digest(database_file=app_new.DATABASE_FILE, store=store, advance=False), repeats
+    )
+
+    operations["compact"] = measure(store.compact, 1)
+
+    # Tras compactar el escritor ya publicó la tabla: un proceso nuevo solo la mapea
+    operations["load_players_mapped"] = measure(load_players_cold, repeats)
+
+    operations["load_positions"] = measure(app_new.load_positions, repeats)
+
+    pdf_path = os.path.join(os.getcwd(), "benchmark.pdf")
+    player = sample.to_dict()
+    operations["generate_player_pdf"] = measure(lambda: generate_player_pdf(player, pdf_path), repeats)
+    operations["generate_player_pdf_summary"] = measure(
+        lambda: generate_player_pdf(player, pdf_path, sections=SUMMARY_SECTIONS), repeats
+    )
+    # Dosier de 10 resúmenes en un solo documento (fuente cargada una vez)
+    dossier = [row.to_dict() for _, row in loaded.head(10).iterrows()]
+    operations["generate_dossier_pdf_10"] = measure(
+        lambda: generate_players_pdf(dossier, pdf_path, comparison=False), repeats
+    )
+
+    results["operations"] = operations
+
+    # El almacén, los índices y las cachés compartidas apuntan a este directorio
+    # temporal: el tamaño siguiente debe empezar en frío
+    scouting_store.reset_store()
+    for cached in (app_new.get_store, app_new.get_contract_index, app_new.get_players_table,
+                   app_new.get_long_text_table, app_new.get_saved_searches, app_new.get_cache_manager,
+                   app_new.get_entity_dictionary, app_new.load_positions, app_new._filter_options,
+                   app_new._filtered_player_names):
+        cached.clear()
+    return results
+
+def run_benchmarks(sizes, repeats=3, seed=42):
+    """Ejecuta el benchmark para cada tamaño en un directorio temporal aislado"""
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "sizes": {},
+    }
+    original_cwd = os.getcwd()
+    for n_rows in sizes:
+        workdir = tempfile.mkdtemp(prefix=f"scouting_bench_{n_rows}_")
+        try:
+            shutil.copy(os.path.join(BASE_DIR, "ItemsPosiciones.xlsx"), workdir)
+            os.chdir(workdir)
+            print(f"Midiendo {n_rows} informes...")
+            report["sizes"][str(n_rows)] = benchmark_size(n_rows, repeats=repeats, seed=seed)
+        finally:
+            os.chdir(original_cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def compare_results(current, baseline, threshold=1.25):
+    """Devuelve las operaciones cuya mediana supera la referencia por encima del umbral"""
+    regressions = []
+    for size, data in current["sizes"].items():
+        base_ops = baseline.get("sizes", {}).get(size, {}).get("operations", {})
+        for name, stats in data["operations"].items():
+            if name not in base_ops:
+                continue
+            ratio = stats["median"] / max(base_ops[name]["median"], 1e-9)
+            if ratio > threshold:
+                regressions.append({"size": int(size), "operation": name, "ratio": ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del sistema de scouting")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="JSON de referencia para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, repeats=args.repeats, seed=args.seed)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare_results(report, baseline, args.threshold)
+        for r in report["regressions"]:
+            print(f"REGRESIÓN: {r['operation']} con {r['size']} informes es {r['ratio']:.2f}x más lento")
+        exit_code = 1 if report["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
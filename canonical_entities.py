@@ -0,0 +1,434 @@
+"""
+Diccionario de valores canónicos para club, liga y nacionalidad.
+
+``club_actual``, ``liga`` y ``nacionalidad`` se escriben a mano, así que el
+mismo valor aparece con variantes ("argentino" / "Argentina", "España" /
+"espana", "River" / "River Plate"). Cada variante es una opción más en los
+filtros y las comparaciones por igualdad no las agrupan.
+
+Para cada campo se construye un diccionario de entidades:
+
+* La clave de un valor ignora mayúsculas, tildes, signos y espacios repetidos
+  (y en los clubes las siglas como "CF" o "Club"). Los valores con la misma clave
+  son la misma entidad; su forma canónica es la escritura más frecuente.
+* Los alias explícitos (``scouting_entities.json`` más los gentilicios de
+  ``NATIONALITY_ALIASES``) asignan una variante a su entidad.
+* Un índice de trigramas encuentra las entidades parecidas a un texto sin
+  compararlo con todas: cada trigrama apunta a las entidades que lo contienen y
+  solo se puntúan las que comparten alguno.
+
+El formulario ofrece las entidades canónicas como opciones y, al guardar, un
+valor escrito que coincide con una entidad (por clave, alias o parecido claro)
+se sustituye por su forma canónica. La normalización en lote de las filas ya
+guardadas se hace desde la línea de comandos.
+
+Uso desde la línea de comandos:
+    python canonical_entities.py suggest [--campo club_actual] [--min-score 0.8]
+    python canonical_entities.py normalize [--min-score 0.9] [--apply]
+    python canonical_entities.py alias <campo> <variante> <canónico>
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+import pandas as pd
+
+# ====================================
+# CONSTANTES
+# ====================================
+ENTITIES_FILE = "scouting_entities.json"
+ENTITIES_VERSION = 1
+DATABASE_FILE = "scouting_database.csv"
+
+FIELDS = ["club_actual", "liga", "nacionalidad"]
+
+# Parecido mínimo para sustituir un valor nuevo al guardar
+AUTO_MATCH_SCORE = 0.85
+# Parecido mínimo para proponer una fusión en la normalización en lote
+SUGGEST_SCORE = 0.6
+# Ventaja mínima de la mejor entidad sobre la segunda para no elegir al azar
+AMBIGUITY_MARGIN = 0.1
+
+# Palabras que no distinguen un club de otro
+CLUB_STOPWORDS = {"club", "fc", "cf", "sc", "ca", "cd", "cs", "sad", "de", "del", "la", "el"}
+
+# Gentilicios habituales en los informes, con la forma canónica (el país)
+NATIONALITY_ALIASES = {
+    "argentino": "Argentina", "argentina": "Argentina",
+    "boliviano": "Bolivia", "boliviana": "Bolivia",
+    "brasileno": "Brasil", "brasilena": "Brasil", "brasil": "Brasil", "brazil": "Brasil",
+    "chileno": "Chile", "chilena": "Chile",
+    "colombiano": "Colombia", "colombiana": "Colombia",
+    "ecuatoriano": "Ecuador", "ecuatoriana": "Ecuador",
+    "espanol": "España", "espanola": "España", "espana": "España",
+    "italiano": "Italia", "italiana": "Italia",
+    "mexicano": "México", "mexicana": "México", "mexico": "México",
+    "paraguayo": "Paraguay", "paraguaya": "Paraguay",
+    "peruano": "Perú", "peruana": "Perú", "peru": "Perú",
+    "uruguayo": "Uruguay", "uruguaya": "Uruguay",
+    "venezolano": "Venezuela", "venezolana": "Venezuela",
+}
+
+# ====================================
+# CLAVES Y TRIGRAMAS
+# ====================================
+
+def _text(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+def normalize_key(value, field=None):
+    """Clave de comparación: sin tildes, mayúsculas, signos ni espacios repetidos"""
+    text = unicodedata.normalize("NFKD", _text(value))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    tokens = re.sub(r"[^0-9a-z]+", " ", text).split()
+    if field == "club_actual":
+        # "Club Atlético River Plate" y "River Plate" comparten clave
+        tokens = [t for t in tokens if t not in CLUB_STOPWORDS and t != "atletico"] or tokens
+    return " ".join(tokens)
+
+def trigrams(key):
+    """Trigramas de una clave, con relleno para que cuenten inicio y final de palabra"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Índice invertido trigrama -> entidades para buscar por parecido"""
+
+    def __init__(self, keys):
+        self._keys = list(keys)
+        self._grams = [trigrams(key) for key in self._keys]
+        self._tokens = [set(key.split()) for key in self._keys]
+        self._postings = {}
+        for position, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, key, limit=5):
+        """Claves parecidas a ``key`` con su puntuación (0-1), de mayor a menor
+
+        La puntuación es el coeficiente de Dice de los trigramas. Si todas las
+        palabras de la búsqueda están en la entidad ("river" en "river plate")
+        cuenta como un parecido de al menos 0.7.
+        """
+        if not key:
+            return []
+        grams = trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+        tokens = set(key.split())
+        results = []
+        for position, count in shared.items():
+            score = 2 * count / (len(grams) + len(self._grams[position]))
+            if tokens <= self._tokens[position] and self._keys[position] != key:
+                score = max(score, 0.7)
+            results.append((self._keys[position], round(score, 3)))
+        results.sort(key=lambda item: (-item[1], item[0]))
+        return results[:limit]
+
+# ====================================
+# ENTIDADES DE UN CAMPO
+# ====================================
+
+class FieldEntities:
+    """Entidades canónicas de un campo construidas desde sus valores y alias"""
+
+    def __init__(self, field, values, aliases=None):
+        self.field = field
+        counts = Counter(v for v in (_text(value) for value in values) if v)
+        # clave -> forma canónica
+        self._canonical = {}
+        aliases = {normalize_key(k, field): v for k, v in (aliases or {}).items()}
+        by_key = {}
+        for value, count in counts.items():
+            by_key.setdefault(normalize_key(value, field), Counter())[value] += count
+        for key, variants in by_key.items():
+            if key in aliases:
+                continue
+            # La escritura más frecuente; a igualdad, la que lleva mayúsculas y tildes
+            self._canonical[key] = max(variants.items(), key=lambda item: (
+                item[1], item[0] != item[0].lower(), item[0] != _ascii(item[0]), item[0]))[0]
+        for target in set(aliases.values()):
+            self._canonical.setdefault(normalize_key(target, field), target)
+        self._aliases = {k: v for k, v in aliases.items() if k != normalize_key(v, field)}
+        self.counts = Counter()
+        for value, count in counts.items():
+            self.counts[self.canonical(value, min_score=None)[0] or value] += count
+        self.index = TrigramIndex(self._canonical)
+
+    @property
+    def options(self):
+        """Formas canónicas ordenadas (para los selectores)"""
+        return sorted(set(self._canonical.values()), key=lambda v: normalize_key(v, self.field))
+
+    def suggest(self, value, limit=5, min_score=0.0):
+        """Entidades parecidas a un texto: ``[(canónico, puntuación)]``"""
+        key = normalize_key(value, self.field)
+        if key in self._aliases:
+            key = normalize_key(self._aliases[key], self.field)
+        results = []
+        seen = set()
+        for match, score in self.index.search(key, limit=limit * 2):
+            canonical = self._canonical[match]
+            if score >= min_score and canonical not in seen:
+                seen.add(canonical)
+                results.append((canonical, score))
+        return results[:limit]
+
+    def canonical(self, value, min_score=AUTO_MATCH_SCORE):
+        """Forma canónica de un valor y la puntuación del parecido
+
+        Coincidencia por clave o alias: puntuación 1. Por parecido, solo si supera
+        ``min_score`` y no hay otra entidad casi igual de parecida. Devuelve
+        ``(None, 0)`` si no hay ninguna (con ``min_score=None`` no se busca por
+        parecido).
+        """
+        key = normalize_key(value, self.field)
+        if not key:
+            return None, 0.0
+        if key in self._aliases:
+            return self._aliases[key], 1.0
+        if key in self._canonical:
+            return self._canonical[key], 1.0
+        if min_score is None:
+            return None, 0.0
+        matches = self.index.search(key, limit=2)
+        if not matches or matches[0][1] < min_score:
+            return None, 0.0
+        if len(matches) > 1 and matches[0][1] - matches[1][1] < AMBIGUITY_MARGIN:
+            return None, 0.0
+        return self._canonical[matches[0][0]], matches[0][1]
+
+    def merge_candidates(self, min_score=SUGGEST_SCORE):
+        """Entidades poco usadas que parecen variantes de otra más usada
+
+        Devuelve ``[(variante, canónico, puntuación)]``: la variante con menos
+        informes se asimila a la entidad más usada que se le parece sin ambigüedad.
+        """
+        candidates = []
+        for key, value in self._canonical.items():
+            matches = [(m, s) for m, s in self.index.search(key, limit=3) if m != key]
+            if not matches or matches[0][1] < min_score:
+                continue
+            if len(matches) > 1 and matches[0][1] - matches[1][1] < AMBIGUITY_MARGIN:
+                continue
+            target = self._canonical[matches[0][0]]
+            if self.counts[target] > self.counts[value] or (
+                    self.counts[target] == self.counts[value] and len(target) > len(value)):
+                candidates.append((value, target, matches[0][1]))
+        return sorted(candidates, key=lambda item: -item[2])
+
+
+def _ascii(text):
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+# ====================================
+# DICCIONARIO
+# ====================================
+
+class EntityDictionary:
+    """Alias guardados y entidades de cada campo, reconstruidas si cambian los datos"""
+
+    def __init__(self, path=ENTITIES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._aliases = None
+        self._aliases_stat = None
+        # campo -> (versión de los datos, FieldEntities)
+        self._entities = {}
+
+    def aliases(self, field):
+        """Alias de un campo: los guardados más los incluidos de serie"""
+        with self._lock:
+            stored = self._load_aliases().get(field, {})
+        builtin = NATIONALITY_ALIASES if field == "nacionalidad" else {}
+        return {**builtin, **stored}
+
+    def _load_aliases(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._aliases, self._aliases_stat = {}, None
+            return self._aliases
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._aliases_stat:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._aliases = data["aliases"] if data.get("version") == ENTITIES_VERSION else {}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"No se pudieron leer los alias de entidades: {e}")
+                self._aliases = {}
+            self._aliases_stat = key
+        return self._aliases
+
+    def add_alias(self, field, variant, canonical):
+        """Asigna una variante a su forma canónica y la guarda"""
+        if field not in FIELDS:
+            raise ValueError(f"campo desconocido: {field}")
+        if not normalize_key(variant, field) or not _text(canonical):
+            raise ValueError("la variante y el valor canónico no pueden estar vacíos")
+        with self._lock:
+            aliases = {f: dict(v) for f, v in self._load_aliases().items()}
+            aliases.setdefault(field, {})[_text(variant)] = _text(canonical)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": ENTITIES_VERSION, "aliases": aliases}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._aliases_stat = None
+            self._entities.pop(field, None)
+
+    def entities(self, field, values, version):
+        """Entidades de un campo para una versión de los datos (se reconstruyen al cambiar)"""
+        aliases = self.aliases(field)
+        with self._lock:
+            cached = self._entities.get(field)
+            if cached is not None and cached[0] == (version, self._aliases_stat):
+                return cached[1]
+        entities = FieldEntities(field, values, aliases)
+        with self._lock:
+            self._entities[field] = ((version, self._aliases_stat), entities)
+        return entities
+
+    def canonicalize_record(self, record, values_by_field, version, min_score=AUTO_MATCH_SCORE):
+        """Sustituye en un informe los valores que corresponden a una entidad conocida
+
+        ``values_by_field`` devuelve los valores guardados de un campo. Devuelve
+        el informe nuevo y los cambios ``{campo: (antes, después)}``.
+        """
+        record = dict(record)
+        changes = {}
+        for field in FIELDS:
+            value = _text(record.get(field))
+            if not value:
+                continue
+            canonical, _ = self.entities(field, values_by_field(field), version).canonical(value, min_score)
+            if canonical and canonical != value:
+                record[field] = canonical
+                changes[field] = (value, canonical)
+        return record, changes
+
+# ====================================
+# NORMALIZACIÓN EN LOTE
+# ====================================
+
+def plan_normalization(df, dictionary, min_score=SUGGEST_SCORE, merge=True):
+    """Cambios que dejarían cada campo con sus formas canónicas
+
+    Devuelve ``{report_id: {campo: (antes, después)}}``. Con ``merge`` también
+    asimila las variantes poco usadas a la entidad más usada que se les parece.
+    """
+    plan = {}
+    for field in FIELDS:
+        if field not in df.columns:
+            continue
+        entities = dictionary.entities(field, df[field].tolist(), None)
+        merges = {v: t for v, t, _ in entities.merge_candidates(min_score)} if merge else {}
+        mapping = {}
+        for value in df[field].dropna().unique().tolist():
+            text = _text(value)
+            canonical = entities.canonical(text, min_score=None)[0] or text
+            canonical = merges.get(canonical, canonical)
+            if canonical != text:
+                mapping[value] = canonical
+        if not mapping:
+            continue
+        changed = df[field].isin(list(mapping))
+        for report_id, value in zip(df.index[changed], df.loc[changed, field]):
+            plan.setdefault(report_id, {})[field] = (value, mapping[value])
+    return plan
+
+def apply_normalization(plan, store, database_file=DATABASE_FILE):
+    """Guarda una versión nueva de cada informe del plan; devuelve cuántos se guardaron
+
+    Cada informe se guarda sobre la versión leída: los editados por otra persona
+    entretanto se omiten.
+    """
+    from scouting_schema import read_players_csv, to_record
+    from scouting_store import VersionConflictError
+
+    # Las ediciones aún en el diario se incorporan antes de leer, para no omitirlas sin motivo
+    store.flush(timeout=600)
+    df = read_players_csv(database_file, include_long_text=True)
+    saved = 0
+    for report_id, changes in plan.items():
+        if report_id not in df.index:
+            continue
+        previous = to_record(df.loc[report_id])
+        record = dict(previous, **{field: after for field, (_, after) in changes.items()})
+        try:
+            store.update(record, previous["version"], previous)
+        except VersionConflictError as e:
+            print(f"Se omite {report_id}: {e}")
+            continue
+        saved += 1
+    store.flush(timeout=600)
+    return saved
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valores canónicos de club, liga y nacionalidad")
+    sub = parser.add_subparsers(dest="command", required=True)
+    suggest = sub.add_parser("suggest", help="Listar las entidades y las variantes que parecen duplicadas")
+    suggest.add_argument("--campo", choices=FIELDS, help="Solo este campo")
+    suggest.add_argument("--min-score", type=float, default=SUGGEST_SCORE)
+    normalize = sub.add_parser("normalize", help="Normalizar los valores de los informes guardados")
+    normalize.add_argument("--min-score", type=float, default=0.9,
+                           help="Parecido mínimo para fusionar variantes (las claves y alias siempre se aplican)")
+    normalize.add_argument("--sin-fusiones", action="store_true", help="Aplicar solo claves y alias")
+    normalize.add_argument("--apply", action="store_true", help="Guardar los cambios (por defecto solo se muestran)")
+    alias = sub.add_parser("alias", help="Asignar una variante a su valor canónico")
+    alias.add_argument("campo", choices=FIELDS)
+    alias.add_argument("variante")
+    alias.add_argument("canonico")
+    args = parser.parse_args(argv)
+
+    dictionary = EntityDictionary()
+    if args.command == "alias":
+        dictionary.add_alias(args.campo, args.variante, args.canonico)
+        print(f"{args.campo}: '{args.variante}' -> '{args.canonico}'")
+        return
+
+    from scouting_schema import read_players_csv, stored_reports
+    df = stored_reports(read_players_csv(DATABASE_FILE)) if os.path.exists(DATABASE_FILE) else pd.DataFrame()
+
+    if args.command == "suggest":
+        for field in [args.campo] if args.campo else FIELDS:
+            if field not in df.columns:
+                continue
+            entities = dictionary.entities(field, df[field].tolist(), None)
+            print(f"{field}: {df[field].nunique()} valores distintos, {len(entities.options)} entidades")
+            for variant, target, score in entities.merge_candidates(args.min_score):
+                print(f"    '{variant}' -> '{target}' ({score:.2f})")
+    elif args.command == "normalize":
+        plan = plan_normalization(df, dictionary, args.min_score, merge=not args.sin_fusiones)
+        for report_id, changes in plan.items():
+            for field, (before, after) in changes.items():
+                print(f"{report_id}  {field}: '{before}' -> '{after}'")
+        if not args.apply:
+            print(f"{len(plan)} informes con cambios (use --apply para guardarlos)")
+            return
+        import scouting_store
+        store = scouting_store.get_store()
+        try:
+            print(f"{apply_normalization(plan, store)} informes normalizados")
+        finally:
+            store.close()
+
+if __name__ == "__main__":
+    main()
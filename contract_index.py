@@ -0,0 +1,115 @@
+"""
+Índice ordenado por año de fin de contrato.
+
+Guarda los pares ``(fin_contrato, report_id)`` en una lista ordenada, de modo
+que la pregunta "¿a quién se le termina el contrato entre estos años?" se
+responde con dos búsquedas binarias en lugar de recorrer toda la tabla. El
+índice se comparte entre sesiones y consume el registro de cambios
+(``scouting_events``): antes de cada consulta aplica los eventos nuevos. Si
+falta algún evento o el CSV cambió por otra vía (se compara su tamaño) se
+reconstruye entero.
+"""
+
+import bisect
+import os
+import threading
+
+import pandas as pd
+
+from scouting_events import catch_up, rebuild_consistent, start_cursor
+from scouting_schema import is_active
+
+
+class ContractIndex:
+    """Índice secundario ordenado sobre fin_contrato"""
+
+    def __init__(self):
+        self._keys = []
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.source_size = None
+        self.cursor = start_cursor()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _year(value):
+        """Devuelve el año como entero, o None si no es válido"""
+        if value is None or value is pd.NA:
+            return None
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+
+    def rebuild(self, df, source_size):
+        """Reconstruye el índice desde la tabla de informes"""
+        keys = []
+        if not df.empty and "fin_contrato" in df.columns:
+            years = pd.to_numeric(df["fin_contrato"], errors="coerce")
+            valid = years.notna()
+            keys = sorted(zip(years[valid].astype("int64").tolist(), df.loc[valid, "report_id"].tolist()))
+        with self._lock:
+            self._keys = keys
+            self.source_size = source_size
+
+    def add(self, fin_contrato, report_id):
+        """Inserta un informe manteniendo el orden"""
+        year = self._year(fin_contrato)
+        if year is None:
+            return
+        with self._lock:
+            bisect.insort(self._keys, (year, str(report_id)))
+
+    def remove(self, fin_contrato, report_id):
+        """Elimina un informe del índice si está presente"""
+        year = self._year(fin_contrato)
+        if year is None:
+            return
+        key = (year, str(report_id))
+        with self._lock:
+            pos = bisect.bisect_left(self._keys, key)
+            if pos < len(self._keys) and self._keys[pos] == key:
+                del self._keys[pos]
+
+    def apply_event(self, event):
+        """Aplica un evento del registro de cambios; devuelve False si hay que reconstruir"""
+        op = event["op"]
+        if op == "reset":
+            return False
+        if op == "update":
+            previous = event.get("previous")
+            if previous is None:
+                return False
+            if is_active(previous):
+                self.remove(previous.get("fin_contrato"), previous["report_id"])
+        if op in ("insert", "update") and is_active(event["record"]):
+            self.add(event["record"].get("fin_contrato"), event["report_id"])
+        self.source_size = event.get("csv_size", self.source_size)
+        return True
+
+    def refresh(self, events, database_file, load_df):
+        """Pone el índice al día con el registro de cambios
+
+        ``load_df`` devuelve la tabla de informes activos; solo se usa al reconstruir.
+        """
+        size = os.path.getsize(database_file) if os.path.exists(database_file) else 0
+        with self._refresh_lock:
+            if self.source_size is not None:
+                cursor, applied = catch_up(events, self.cursor, self.apply_event)
+                if applied is not None and self.source_size == size:
+                    self.cursor = cursor
+                    return self
+
+            df, cursor, source_size = rebuild_consistent(events, database_file, load_df)
+            self.rebuild(df, source_size)
+            self.cursor = cursor
+        return self
+
+    def between(self, first_year, last_year):
+        """report_id de los contratos que terminan entre first_year y last_year (inclusive)"""
+        with self._lock:
+            lo = bisect.bisect_left(self._keys, (first_year, ""))
+            hi = bisect.bisect_left(self._keys, (last_year + 1, ""))
+            return [report_id for _, report_id in self._keys[lo:hi]]
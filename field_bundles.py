@@ -0,0 +1,348 @@
+"""
+Paquetes de informes sin conexión.
+
+En los partidos fuera de casa los ojeadores trabajan con una instancia local de
+la aplicación, sin conexión con la base de datos central. Al volver exportan un
+paquete con sus informes y fotos, que se importa en la central de una vez:
+
+    <nombre>.zip
+        manifest.json     formato, versión, origen y número de informes
+        reports.jsonl     un informe por línea (última versión de cada uno)
+        images/<hash>     fotos referenciadas, una vez cada una
+
+La importación es una sola pasada por lotes:
+
+* Se deduplica por ``report_id`` y por hash de contenido (los campos del
+  informe sin los de control: id, versión, estado, fecha de creación y ruta de
+  la foto, que se compara por sus bytes). Un
+  informe que ya está igual en la central, aunque tenga otro id, no se vuelve a
+  guardar. Si el informe es el mismo pero su foto falta en disco en la
+  central y el paquete la trae, se restaura la foto.
+* Los conflictos se resuelven siempre igual: si el informe ya existe con otro
+  contenido gana la versión más alta. A igual versión (editado en ambos lados)
+  se conserva el de la central y el del paquete se informa como conflicto. Los
+  informes se procesan ordenados por ``report_id``, así que el orden del
+  archivo no influye.
+* Todo se registra como una única transacción del diario
+  (``ScoutingStore.submit_batch``): o entra el paquete completo o nada. Si
+  alguien edita uno de los informes mientras tanto, se puede volver a importar.
+
+Uso desde la línea de comandos:
+    python field_bundles.py export <paquete.zip> [--desde FECHA] [--origen NOMBRE]
+    python field_bundles.py import <paquete.zip> [--simular]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import socket
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+
+from image_store import get_image_store
+from scouting_schema import (
+    STATUS_COLUMN, STATUS_DELETED, VERSION_COLUMN, read_players_csv, report_status, to_record
+)
+
+# ====================================
+# CONSTANTES
+# ====================================
+BUNDLE_FORMAT = "scouting-bundle"
+BUNDLE_VERSION = 1
+DATABASE_FILE = "scouting_database.csv"
+
+# Campos de control que no forman parte del contenido de un informe; la foto se
+# compara por sus bytes, porque la misma imagen puede tener rutas distintas
+HASH_EXCLUDED = {"report_id", VERSION_COLUMN, STATUS_COLUMN, "fecha_creacion", "imagen_path"}
+
+_INTEGER = re.compile(r"^-?\d+(\.0+)?$")
+
+
+class BundleError(ValueError):
+    """El archivo no es un paquete de informes válido"""
+
+# ====================================
+# HASH DE CONTENIDO
+# ====================================
+
+def _canonical_value(value):
+    """Valor como texto comparable entre el CSV tipado y el JSON del paquete"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    text = str(value).strip()
+    # 5, 5.0 y "5" son el mismo valor
+    if _INTEGER.match(text):
+        return str(int(float(text)))
+    return text
+
+def content_hash(record):
+    """Hash del contenido de un informe, sin los campos de control"""
+    content = {
+        key: _canonical_value(value)
+        for key, value in record.items()
+        if key not in HASH_EXCLUDED and _canonical_value(value)
+    }
+    data = json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def _json_value(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value
+
+# ====================================
+# EXPORTACIÓN (INSTANCIA LOCAL)
+# ====================================
+
+def export_bundle(output, database_file=DATABASE_FILE, since=None, source=None):
+    """Escribe un paquete con la última versión de cada informe local
+
+    ``since`` (texto ``AAAA-MM-DD``) limita el paquete a los informes creados
+    desde esa fecha, según su primera versión. Los eliminados viajan como
+    lápidas para que la central también los elimine. Devuelve el manifiesto.
+    """
+    if not os.path.exists(database_file):
+        raise FileNotFoundError(f"No existe la base de datos {database_file}")
+    df = read_players_csv(database_file, include_long_text=True)
+    if since and "fecha_creacion" in df.columns:
+        # La última fila puede ser una lápida sin fecha: cuenta la primera fecha del informe
+        versions = read_players_csv(database_file, latest=False)
+        created = versions["fecha_creacion"].astype("str").replace("", pd.NA).dropna()
+        created = created[~created.index.duplicated(keep="first")]
+        df = df[created.reindex(df.index).fillna("").to_numpy() >= since]
+
+    images = {}
+    lines = []
+    for report_id, row in df.iterrows():
+        record = {key: _json_value(value) for key, value in to_record(row).items()}
+        record["report_id"] = report_id
+        image_path = record.get("imagen_path")
+        if image_path and os.path.exists(image_path):
+            name = f"images/{os.path.basename(image_path)}"
+            images[name] = image_path
+            record["imagen_path"] = name
+        else:
+            record["imagen_path"] = None
+        lines.append(json.dumps(record, ensure_ascii=False, default=str))
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": source or socket.gethostname(),
+        "reports": len(lines),
+        "images": len(images),
+    }
+    tmp_path = f"{output}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        bundle.writestr("reports.jsonl", "\n".join(lines) + ("\n" if lines else ""))
+        for name, path in images.items():
+            # Las fotos ya están comprimidas
+            bundle.write(path, name, compress_type=zipfile.ZIP_STORED)
+    os.replace(tmp_path, output)
+    return manifest
+
+# ====================================
+# IMPORTACIÓN (CENTRAL)
+# ====================================
+
+def read_bundle(source):
+    """Abre un paquete (ruta o bytes); devuelve ``(manifiesto, informes, zip)``"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+    try:
+        bundle = zipfile.ZipFile(source)
+        manifest = json.loads(bundle.read("manifest.json"))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError("el archivo no es un paquete de informes")
+        if manifest.get("version", 0) > BUNDLE_VERSION:
+            raise BundleError(f"paquete de una versión más nueva ({manifest['version']})")
+        records = [json.loads(line) for line in bundle.read("reports.jsonl").decode("utf-8").splitlines() if line.strip()]
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        if isinstance(e, BundleError):
+            raise
+        raise BundleError(f"paquete dañado o incompleto ({e})") from e
+    if any(not record.get("report_id") for record in records):
+        raise BundleError("hay informes sin report_id")
+    return manifest, records, bundle
+
+def _bundle_image(bundle, record):
+    """Bytes y ruta por contenido de la foto de un informe del paquete, o (None, None)"""
+    name = record.get("imagen_path")
+    if not name:
+        return None, None
+    try:
+        data = bundle.read(name)
+    except KeyError:
+        return None, None
+    store = get_image_store()
+    return data, store.path_for(hashlib.sha256(data).hexdigest(), os.path.splitext(name)[1])
+
+def _same_image(previous, data):
+    """True si la foto de un informe central tiene el mismo contenido que la del paquete"""
+    path = previous.get("imagen_path")
+    if not isinstance(path, str) or not path:
+        # Sin foto (vacía o NaN en la columna de texto)
+        return data is None
+    if not os.path.exists(path):
+        # La foto central falta en disco: solo es igual si el paquete tampoco la trae
+        return data is None
+    if data is None:
+        return False
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest()
+
+def _version(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 1
+
+def plan_import(records, bundle, database_file=DATABASE_FILE):
+    """Decide qué hacer con cada informe del paquete sin escribir nada
+
+    Devuelve ``(entradas para submit_batch, fotos {ruta: bytes}, resumen)``.
+    """
+    central = read_players_csv(database_file, include_long_text=True) if os.path.exists(database_file) else pd.DataFrame()
+    central_hashes = {}
+    central_records = {}
+    for report_id, row in central.iterrows():
+        record = to_record(row)
+        central_records[report_id] = record
+        if report_status(record) != STATUS_DELETED:
+            central_hashes.setdefault(content_hash(record), report_id)
+
+    # Dentro del paquete, la versión más alta de cada informe
+    latest = {}
+    for record in records:
+        report_id = str(record["report_id"])
+        if report_id not in latest or _version(record.get(VERSION_COLUMN)) > _version(latest[report_id].get(VERSION_COLUMN)):
+            latest[report_id] = dict(record, report_id=report_id)
+
+    entries, images = [], {}
+    summary = {"insertados": 0, "actualizados": 0, "duplicados": 0, "anteriores": 0,
+               "fotos_restauradas": 0, "conflictos": []}
+    seen_hashes = {}
+    for report_id in sorted(latest):
+        record = latest[report_id]
+        data, image_path = _bundle_image(bundle, record)
+        record["imagen_path"] = image_path
+        digest = content_hash(record)
+        deleted = report_status(record) == STATUS_DELETED
+
+        if report_id in central_records:
+            previous = central_records[report_id]
+            central_version = _version(previous.get(VERSION_COLUMN))
+            same_text = content_hash(previous) == digest and report_status(previous) == report_status(record)
+            if same_text and _same_image(previous, data):
+                summary["duplicados"] += 1
+                continue
+            if same_text and previous.get("imagen_path") == image_path:
+                # Mismo informe cuya foto falta en la central: basta con volver a guardarla
+                images[image_path] = data
+                summary["fotos_restauradas"] += 1
+                continue
+            version = _version(record.get(VERSION_COLUMN))
+            if version < central_version:
+                # La central ya tiene una versión posterior a la del paquete
+                summary["anteriores"] += 1
+                continue
+            if version == central_version:
+                # Editado a la vez en ambos lados: se conserva el de la central
+                summary["conflictos"].append((report_id, record.get("jugador") or previous.get("jugador"),
+                                              version, central_version))
+                continue
+            if deleted:
+                record = {"report_id": report_id, STATUS_COLUMN: STATUS_DELETED}
+            entries.append({"op": "update", "record": record, "previous": previous,
+                            "expected_version": central_version})
+            summary["actualizados"] += 1
+        else:
+            if deleted:
+                continue
+            # Un informe nuevo idéntico a otro (de la central o del mismo paquete) no se duplica
+            if digest in central_hashes or digest in seen_hashes:
+                summary["duplicados"] += 1
+                continue
+            seen_hashes[digest] = report_id
+            record[VERSION_COLUMN] = _version(record.get(VERSION_COLUMN))
+            entries.append({"op": "insert", "record": record})
+            summary["insertados"] += 1
+
+        if data is not None and image_path:
+            images[image_path] = data
+    return entries, images, summary
+
+def import_bundle(source, store, database_file=DATABASE_FILE, dry_run=False):
+    """Importa un paquete en la base de datos central como una sola transacción
+
+    Devuelve el resumen (insertados, actualizados, duplicados y conflictos). Si
+    un informe cambia en la central durante la importación se lanza
+    ``VersionConflictError`` y no se guarda nada.
+    """
+    manifest, records, bundle = read_bundle(source)
+    with bundle:
+        # Lo pendiente del diario entra antes, para comparar con la central al día
+        store.flush(timeout=600)
+        entries, images, summary = plan_import(records, bundle, database_file)
+    summary["origen"] = manifest.get("source")
+    if dry_run or not (entries or images):
+        return summary
+
+    image_store = get_image_store()
+    for path, data in images.items():
+        stored = image_store.put(data, os.path.splitext(path)[1])
+        if stored != path:
+            for entry in entries:
+                if entry["record"].get("imagen_path") == path:
+                    entry["record"]["imagen_path"] = stored
+    if entries:
+        store.submit_batch(entries)
+    return summary
+
+def format_summary(summary):
+    return (f"{summary['insertados']} nuevos, {summary['actualizados']} actualizados, "
+            f"{summary['duplicados']} ya estaban, {summary['anteriores']} con versión anterior, "
+            f"{summary['fotos_restauradas']} fotos restauradas, {len(summary['conflictos'])} conflictos")
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paquetes de informes para trabajar sin conexión")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Exportar los informes locales a un paquete")
+    export.add_argument("paquete")
+    export.add_argument("--desde", help="Solo informes creados desde esta fecha (AAAA-MM-DD)")
+    export.add_argument("--origen", help="Nombre del equipo o del ojeador que exporta")
+    importer = sub.add_parser("import", help="Importar un paquete en la base de datos central")
+    importer.add_argument("paquete")
+    importer.add_argument("--simular", action="store_true", help="Mostrar el resultado sin guardar nada")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        manifest = export_bundle(args.paquete, since=args.desde, source=args.origen)
+        print(f"Paquete {args.paquete}: {manifest['reports']} informes, {manifest['images']} fotos")
+        return
+
+    import scouting_store
+    store = scouting_store.get_store()
+    try:
+        summary = import_bundle(args.paquete, store, dry_run=args.simular)
+        if not args.simular:
+            store.flush(timeout=600)
+    finally:
+        store.close()
+    print(f"Paquete de {summary['origen']}: {format_summary(summary)}")
+    for report_id, jugador, version, central_version in summary["conflictos"]:
+        print(f"    conflicto {report_id} ({jugador}): versión {version} del paquete, {central_version} en la central")
+
+if __name__ == "__main__":
+    main()
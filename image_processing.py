@@ -0,0 +1,138 @@
+"""
+Validación y normalización de las fotos subidas.
+
+Antes de guardarse en ``image_store`` cada foto se decodifica y verifica, se
+gira según su orientación EXIF, se reduce a ``MAX_IMAGE_SIDE`` píxeles por lado
+y se vuelve a codificar sin metadatos (JPEG, o PNG si tiene transparencia).
+Así los archivos que no son imágenes se rechazan en el formulario, los
+corruptos no llegan a guardarse y todo lo que se pinta
+después (``st.image``, la ficha en base64, el PDF) trabaja con imágenes
+pequeñas y válidas.
+
+El trabajo con Pillow se hace en un grupo de hilos acotado compartido por todas
+las sesiones: varias subidas simultáneas de fotos de móvil no descomprimen más
+de ``IMAGE_WORKERS`` imágenes a la vez, y como Pillow libera el GIL mientras
+decodifica, el resto de sesiones sigue respondiendo.
+
+La sesión no espera a la normalización: ``check_image`` comprueba en el acto
+la cabecera (formato y tamaño, sin decodificar) y el Future de ``submit`` se
+entrega al almacén, que incorpora el informe cuando la foto está lista.
+"""
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from lazy_imports import lazy_import
+
+# ====================================
+# CONSTANTES
+# ====================================
+MAX_IMAGE_SIDE = 1024
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+# Límite de píxeles al decodificar (una foto de móvil de 50 MP cabe de sobra)
+MAX_IMAGE_PIXELS = 64_000_000
+JPEG_QUALITY = 85
+IMAGE_WORKERS = 2
+# Subidas en cola o en curso como máximo; las siguientes esperan turno
+MAX_PENDING_IMAGES = 8
+PROCESS_TIMEOUT_SECONDS = 30
+
+
+class InvalidImageError(ValueError):
+    """La foto subida no es una imagen válida o supera los límites"""
+
+
+def _check_size(data):
+    if not data:
+        raise InvalidImageError("el archivo está vacío")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise InvalidImageError(f"el archivo supera {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+
+def check_image(data):
+    """Comprobación rápida en el formulario: tamaño, formato y píxeles según la cabecera
+
+    No decodifica la imagen; un archivo truncado solo se detecta al normalizarlo.
+    """
+    _check_size(data)
+    Image = lazy_import("PIL.Image")
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+    except Exception as e:
+        raise InvalidImageError(f"no se pudo leer la imagen ({e})") from e
+    if width * height > MAX_IMAGE_PIXELS:
+        raise InvalidImageError(f"la imagen tiene más de {MAX_IMAGE_PIXELS // 1_000_000} megapíxeles")
+
+def normalize_image(data, max_side=MAX_IMAGE_SIDE):
+    """Decodifica, verifica y normaliza una foto; devuelve ``(bytes, extensión)``"""
+    data = bytes(data)
+    _check_size(data)
+
+    Image = lazy_import("PIL.Image")
+    ImageOps = lazy_import("PIL.ImageOps")
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+    try:
+        # verify() detecta archivos truncados o corruptos pero deja la imagen inutilizable
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail((max_side, max_side))
+            transparent = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+            output = io.BytesIO()
+            if transparent:
+                img.convert("RGBA").save(output, format="PNG", optimize=True)
+                return output.getvalue(), ".png"
+            img.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            return output.getvalue(), ".jpg"
+    except InvalidImageError:
+        raise
+    except Exception as e:
+        raise InvalidImageError(f"no se pudo leer la imagen ({e})") from e
+
+
+class ImageProcessor:
+    """Grupo de hilos acotado para normalizar fotos fuera del hilo de la sesión"""
+
+    def __init__(self, workers=IMAGE_WORKERS, max_pending=MAX_PENDING_IMAGES):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-processor")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, data):
+        """Encola una foto y devuelve un Future con ``(bytes, extensión)``"""
+        if not self._slots.acquire(timeout=PROCESS_TIMEOUT_SECONDS):
+            raise InvalidImageError("hay demasiadas fotos en proceso, inténtelo de nuevo")
+        try:
+            future = self._executor.submit(normalize_image, data)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def process(self, data, timeout=PROCESS_TIMEOUT_SECONDS):
+        """Normaliza una foto en el grupo de hilos y espera el resultado (uso fuera de la app)"""
+        try:
+            return self.submit(data).result(timeout=timeout)
+        except FutureTimeoutError:
+            raise InvalidImageError(f"la foto tardó más de {timeout} s en procesarse") from None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_processor = None
+_processor_lock = threading.Lock()
+
+def get_image_processor():
+    """Grupo de normalización de fotos único del proceso"""
+    global _processor
+    with _processor_lock:
+        if _processor is None:
+            _processor = ImageProcessor()
+        return _processor
@@ -0,0 +1,192 @@
+"""
+Almacenamiento de fotos de jugadores direccionado por contenido.
+
+Cada imagen se guarda una sola vez con el hash SHA-256 de su contenido como
+nombre, repartida en subdirectorios por los primeros caracteres del hash:
+
+    jugadores_img/ab/cd/abcdef....jpg
+
+Subir dos veces la misma foto no ocupa espacio adicional, y ningún directorio
+acumula más que una fracción pequeña de las imágenes. Los informes referencian
+la ruta en ``imagen_path`` y una pasada de recolección borra las imágenes que
+ningún informe usa.
+
+Uso desde la línea de comandos (con la aplicación detenida para ``migrate``):
+    python image_store.py gc [--dry-run]
+    python image_store.py migrate
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+# ====================================
+# CONSTANTES
+# ====================================
+IMAGES_DIR = "jugadores_img"
+DATABASE_FILE = "scouting_database.csv"
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+
+# Las imágenes recién escritas pueden pertenecer a informes aún no incorporados
+GC_MIN_AGE_SECONDS = 3600
+
+
+def normalize_ext(file_ext):
+    """Extensión en minúsculas y con '.jpeg' unificado a '.jpg'"""
+    file_ext = (file_ext or "").lower()
+    if file_ext and not file_ext.startswith("."):
+        file_ext = f".{file_ext}"
+    return ".jpg" if file_ext == ".jpeg" else file_ext
+
+def _is_missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)) or not str(value).strip()
+
+
+class ImageStore:
+    """Fotos deduplicadas por hash"""
+
+    def __init__(self, images_dir=IMAGES_DIR):
+        self.images_dir = images_dir
+
+    def path_for(self, digest, file_ext):
+        """Ruta relativa de una imagen a partir de su hash"""
+        return os.path.join(self.images_dir, digest[:2], digest[2:4], f"{digest}{normalize_ext(file_ext)}")
+
+    def put(self, data, file_ext):
+        """Guarda una imagen si no existe y devuelve su ruta relativa"""
+        data = bytes(data)
+        path = self.path_for(hashlib.sha256(data).hexdigest(), file_ext)
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    # ---------- Recolección de huérfanas ----------
+
+    def iter_images(self):
+        """Todas las imágenes bajo el directorio, planas o en subdirectorios"""
+        for root, _, files in os.walk(self.images_dir):
+            for name in files:
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    yield os.path.normpath(os.path.join(root, name))
+
+    def collect_garbage(self, image_paths, min_age_seconds=GC_MIN_AGE_SECONDS, dry_run=False):
+        """Borra las imágenes sin referencias y devuelve sus rutas
+
+        ``image_paths`` son las rutas referenciadas por los informes (incluidos
+        los pendientes del diario). Las imágenes más recientes que
+        ``min_age_seconds`` no se tocan.
+        """
+        referenced = {os.path.normpath(str(p)) for p in image_paths if not _is_missing(p)}
+        now = time.time()
+        removed = []
+        for path in self.iter_images():
+            if path in referenced:
+                continue
+            if now - os.path.getmtime(path) < min_age_seconds:
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed.append(path)
+        if not dry_run:
+            self._remove_empty_shards()
+        return removed
+
+    def _remove_empty_shards(self):
+        for root, dirs, files in os.walk(self.images_dir, topdown=False):
+            if root != self.images_dir and not dirs and not files:
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+
+    # ---------- Migración ----------
+
+    def migrate(self, df):
+        """Mueve las imágenes con nombre antiguo al esquema por hash
+
+        Devuelve una copia de ``df`` con ``imagen_path`` actualizado; las
+        imágenes originales se borran en la siguiente recolección.
+        """
+        df = df.copy()
+        mapping = {}
+        for old_path in df["imagen_path"].dropna().unique():
+            if _is_missing(old_path) or not os.path.exists(old_path):
+                continue
+            with open(old_path, "rb") as f:
+                mapping[old_path] = self.put(f.read(), os.path.splitext(old_path)[1])
+        df["imagen_path"] = df["imagen_path"].map(lambda p: mapping.get(p, p))
+        return df
+
+
+_image_store = None
+_image_store_lock = threading.Lock()
+
+def get_image_store():
+    """Almacén de imágenes único del proceso"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            _image_store = ImageStore()
+        return _image_store
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def referenced_paths(database_file=DATABASE_FILE):
+    """Rutas de imagen referenciadas por el CSV y por el diario pendiente"""
+    import scouting_store
+
+    paths = []
+    if os.path.exists(database_file):
+        paths.extend(pd.read_csv(database_file, usecols=["imagen_path"], dtype=str)["imagen_path"].dropna())
+    for entry, _ in scouting_store.get_store().pending_entries():
+        paths.append(entry.get("record", {}).get("imagen_path"))
+    paths.extend(scouting_store.get_store().pending_images())
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de las fotos de jugadores")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc = sub.add_parser("gc", help="Borrar imágenes sin informes que las referencien")
+    gc.add_argument("--dry-run", action="store_true")
+    gc.add_argument("--min-age", type=int, default=GC_MIN_AGE_SECONDS)
+    sub.add_parser("migrate", help="Pasar las imágenes con nombre antiguo al esquema por hash")
+    args = parser.parse_args(argv)
+
+    store = get_image_store()
+    if args.command == "gc":
+        removed = store.collect_garbage(referenced_paths(), min_age_seconds=args.min_age, dry_run=args.dry_run)
+        action = "Se borrarían" if args.dry_run else "Borradas"
+        print(f"{action} {len(removed)} imágenes huérfanas")
+        for path in removed:
+            print(f"  {path}")
+    elif args.command == "migrate":
+        import scouting_store
+
+        scouting = scouting_store.get_store()
+        scouting.apply_pending()
+        with scouting.writer_lock():
+            # Todo como texto: solo cambia imagen_path y el resto se reescribe tal cual
+            df = pd.read_csv(DATABASE_FILE, dtype=str, keep_default_na=False)
+            migrated = store.migrate(df)
+            migrated.to_csv(DATABASE_FILE, index=False)
+            # Los índices derivados se reconstruyen desde el CSV reescrito
+            scouting.events.append({"op": "reset", "reason": "migrate", "csv_size": os.path.getsize(DATABASE_FILE)})
+        changed = int((migrated["imagen_path"] != df["imagen_path"]).fillna(False).sum())
+        print(f"Actualizadas {changed} rutas de imagen; ejecute 'gc' para borrar los archivos antiguos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Tabla en memoria que se mantiene al día leyendo solo lo añadido al CSV.
+
+El almacén solo añade filas al final de ``scouting_database.csv`` (informes
+nuevos y nuevas versiones de informes editados). En lugar de volver a parsear
+el archivo completo tras cada escritura, ``IncrementalTable`` lee únicamente
+los bytes nuevos, los convierte con el mismo lector tipado y reemplaza las
+versiones anteriores de los informes afectados. Si el archivo se reescribe
+(cambia el inodo o la cabecera, o se acorta, p. ej. tras una compactación) se
+vuelve a leer completo.
+
+Las vistas derivadas (p. ej. solo los informes activos) se calculan una vez por
+versión de la tabla y se memoizan hasta el siguiente cambio.
+"""
+
+import io
+import os
+import threading
+
+import pandas as pd
+
+from scouting_schema import latest_versions
+
+
+def _merge_categories(df, new):
+    """Unifica las categorías de ambas tablas para que concat conserve el tipo"""
+    for column in df.columns.intersection(new.columns):
+        old_dtype, new_dtype = df[column].dtype, new[column].dtype
+        if isinstance(old_dtype, pd.CategoricalDtype):
+            if isinstance(new_dtype, pd.CategoricalDtype):
+                values = new_dtype.categories
+            else:
+                values = pd.Index(new[column].dropna().unique())
+            extra = values.difference(old_dtype.categories)
+            if len(extra):
+                df[column] = df[column].cat.add_categories(extra)
+            new[column] = new[column].astype(df[column].dtype)
+        elif isinstance(new_dtype, pd.CategoricalDtype):
+            new[column] = new[column].astype(old_dtype)
+    return df, new
+
+
+class IncrementalTable:
+    """Copia tipada del CSV que se actualiza de forma incremental
+
+    ``reader(source, start_position=..., latest=False)`` debe devolver la tabla
+    tipada e indexada por report_id con todas las filas de ``source``.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.df = None
+        self._lock = threading.Lock()
+        self._inode = None
+        self._offset = 0
+        self._header = b""
+        self._rows = 0
+        self._views = {}
+
+    @property
+    def total_rows(self):
+        """Filas leídas del archivo, incluidas las versiones sustituidas"""
+        return self._rows
+
+    def _read_full(self, path, stat):
+        with open(path, "rb") as f:
+            header = f.readline()
+        df = self.reader(path, start_position=0, latest=False)
+        self._rows = len(df)
+        self.df = latest_versions(df)
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+        self._header = header
+        self._views = {}
+
+    def _read_tail(self, path, size):
+        with open(path, "rb") as f:
+            f.seek(self._offset)
+            tail = f.read(size - self._offset)
+        # Solo filas completas: una escritura en curso se leerá en la próxima llamada
+        end = tail.rfind(b"\n") + 1
+        if end == 0:
+            return
+        tail = tail[:end]
+        self._offset += end
+        if not tail.strip():
+            return
+
+        new = self.reader(io.BytesIO(self._header + tail), start_position=self._rows, latest=False)
+        self._rows += len(new)
+        new = latest_versions(new)
+        df, new = _merge_categories(self.df.copy(), new.copy())
+        self.df = pd.concat([df.drop(index=new.index.intersection(df.index)), new])
+        self._views = {}
+
+    def get(self, path, view=None):
+        """Devuelve la tabla vigente del CSV (solo lectura, no modificar)
+
+        ``view`` es una función df -> df cuyo resultado se memoiza hasta que la
+        tabla cambie.
+        """
+        stat = os.stat(path)
+        with self._lock:
+            if self.df is None or stat.st_ino != self._inode or stat.st_size != self._offset:
+                self._refresh(path, stat)
+            if view is None:
+                return self.df
+            if view not in self._views:
+                self._views[view] = view(self.df)
+            return self._views[view]
+
+    def _refresh(self, path, stat):
+        rewritten = self.df is None or stat.st_ino != self._inode or stat.st_size < self._offset
+        if not rewritten:
+            with open(path, "rb") as f:
+                rewritten = f.readline() != self._header
+
+        if rewritten:
+            self._read_full(path, stat)
+        else:
+            self._read_tail(path, stat.st_size)
+
+    def seed(self, df, inode, offset, header, rows):
+        """Parte de una tabla ya leída del mismo CSV hasta ``offset``
+
+        Se usa con las tablas publicadas por otro proceso (``shared_table``):
+        las filas añadidas después se leen de forma incremental sobre ``df``.
+        """
+        with self._lock:
+            self.df = df
+            self._inode = inode
+            self._offset = offset
+            self._header = header
+            self._rows = rows
+            self._views = {}
+
+    def clear(self):
+        with self._lock:
+            self.df = None
+            self._views = {}
@@ -0,0 +1,97 @@
+"""
+Importación diferida de dependencias pesadas y reporte de tiempos de importación.
+
+La aplicación solo importa al arrancar lo imprescindible para pintar la primera
+página. El generador de PDF (fpdf2), openpyxl y Pillow se cargan con
+``lazy_import`` la primera vez que se usa su funcionalidad, y el tiempo de cada
+carga queda registrado en ``IMPORT_TIMES``.
+
+Con la variable de entorno ``SCOUTING_IMPORT_REPORT=1`` cada importación
+diferida se informa por consola. Ejecutando el módulo directamente se obtiene un
+reporte de tiempos de importación en frío, cada módulo en un proceso nuevo:
+
+    python lazy_imports.py
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# ====================================
+# CONSTANTES
+# ====================================
+REPORT_ENV_VAR = "SCOUTING_IMPORT_REPORT"
+
+# Módulos medidos por el reporte en frío, en el orden en que los usa la aplicación
+REPORT_MODULES = [
+    "streamlit",
+    "pandas",
+    "fpdf",
+    "PIL.Image",
+    "openpyxl",
+    "pdf_generator_enhanced",
+    "app_new",
+]
+
+# Tiempo (en segundos) que tomó cada importación diferida en este proceso
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+
+# ====================================
+# IMPORTACIÓN DIFERIDA
+# ====================================
+
+def lazy_import(module_name):
+    """Importa un módulo la primera vez que se necesita y registra cuánto tardó"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    with _lock:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - start
+        IMPORT_TIMES[module_name] = elapsed
+
+    if os.environ.get(REPORT_ENV_VAR):
+        print(f"[import] {module_name} cargado en {elapsed * 1000:.1f} ms")
+    return module
+
+def import_report():
+    """Devuelve las importaciones diferidas realizadas en este proceso"""
+    return dict(IMPORT_TIMES)
+
+# ====================================
+# REPORTE EN FRÍO
+# ====================================
+
+def measure_cold_import(module_name, python=sys.executable):
+    """Mide el tiempo de importar un módulo en un proceso Python nuevo"""
+    code = (
+        "import time, importlib\n"
+        "start = time.perf_counter()\n"
+        f"importlib.import_module({module_name!r})\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [python, "-c", code], cwd=base_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def cold_import_report(modules=REPORT_MODULES):
+    """Devuelve el tiempo de importación en frío de cada módulo"""
+    return {name: measure_cold_import(name) for name in modules}
+
+if __name__ == "__main__":
+    for name, seconds in cold_import_report().items():
+        value = "no disponible" if seconds is None else f"{seconds * 1000:8.1f} ms"
+        print(f"{name:<25} {value}")
@@ -0,0 +1,369 @@
+"""
+Prueba de carga de la aplicación con sesiones simultáneas.
+
+Lanza ``app_new.py`` sin navegador con ``streamlit.testing`` sobre una base de
+datos sintética (la misma que ``benchmark_scouting``). Cada sesión simulada es
+un usuario con su propio estado de sesión que repite un recorrido realista:
+abrir la base de datos, filtrar, seleccionar jugadores, imprimir el PDF y
+guardar informes nuevos. Cada sesión corre en su propio proceso y todas
+comparten la base de datos, el diario y el escritor del directorio de prueba.
+
+Por cada nivel de concurrencia se mide la latencia de cada ejecución del
+script (p50/p95/p99, total y por paso), el rendimiento en ejecuciones por
+segundo y la memoria residente total de las sesiones.
+
+Uso:
+    python load_test_scouting.py
+    python load_test_scouting.py --sessions 1 4 8 16 --duration 60 --rows 10000
+    python load_test_scouting.py --sessions 8 --max-p95 2.0
+
+Los resultados se escriben en JSON. Con ``--max-p95`` el script termina con
+código 1 si algún nivel supera esa latencia p95 (segundos), para fijar la
+capacidad antes de los días de partido.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import pandas as pd
+
+import app_new
+import scouting_store
+from benchmark_scouting import create_synthetic_images, generate_synthetic_reports, get_schema_columns
+
+# ====================================
+# CONSTANTES
+# ====================================
+DEFAULT_SESSIONS = [1, 4, 8]
+DEFAULT_DURATION = 30
+DEFAULT_ROWS = 5_000
+DEFAULT_OUTPUT = "load_test_results.json"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(BASE_DIR, "app_new.py")
+# Archivos que la aplicación lee del directorio de trabajo
+APP_ASSETS = ["ItemsPosiciones.xlsx", "AudaxEscudo.png", "ligachile1.png"]
+
+# Una ejecución más lenta que esto cuenta como error (la sesión está bloqueada)
+RUN_TIMEOUT = 120
+# Pausa entre acciones de un usuario (segundos, mínimo y máximo)
+THINK_TIME = (0.2, 1.0)
+# Probabilidad de imprimir el PDF del jugador abierto y de guardar un informe por vuelta
+PDF_PROBABILITY = 0.3
+SAVE_PROBABILITY = 0.15
+MEMORY_SAMPLE_SECONDS = 0.25
+
+PAGE_DATABASE = "BASE DE DATOS JUGADORES"
+PAGE_NEW_REPORT = "NUEVO INFORME"
+FILTER_KEYS = ["filtro_liga", "filtro_posicion", "filtro_veredicto", "filtro_nacionalidad"]
+
+# ====================================
+# MÉTRICAS
+# ====================================
+
+def percentile(values, q):
+    """Percentil ``q`` (0-100) por rango más cercano; None sin valores"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[min(len(ordered), int(rank)) - 1]
+
+def latency_stats(timings):
+    """Resumen de una lista de latencias en segundos"""
+    return {
+        "count": len(timings),
+        "p50": percentile(timings, 50),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+        "max": max(timings) if timings else None,
+    }
+
+def process_rss(pid="self"):
+    """Memoria residente de un proceso en bytes (Linux); None si no se puede leer"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemorySampler:
+    """Muestrea en segundo plano la memoria residente total de varios procesos"""
+
+    def __init__(self, pids, interval=MEMORY_SAMPLE_SECONDS):
+        self.pids = list(pids)
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-test-memory", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            sizes = [rss for rss in map(process_rss, self.pids) if rss is not None]
+            if sizes:
+                self.samples.append(sum(sizes))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        return {
+            "rss_start": self.samples[0] if self.samples else None,
+            "rss_end": self.samples[-1] if self.samples else None,
+            "rss_peak": max(self.samples) if self.samples else None,
+        }
+
+# ====================================
+# SESIONES SIMULADAS
+# ====================================
+
+class SimulatedSession:
+    """Un usuario: su propio AppTest y el registro de cada ejecución del script"""
+
+    def __init__(self, session_id, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.session_id = session_id
+        self.rng = random.Random(seed)
+        self.app = AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+        self.runs = []
+        self.errors = []
+
+    def run(self, step, action=None):
+        """Aplica ``action`` (cambios de widgets) y ejecuta el script midiendo el tiempo"""
+        start = time.perf_counter()
+        try:
+            if action is not None:
+                action()
+            self.app.run()
+        except Exception as e:
+            self.errors.append({"step": step, "error": f"{type(e).__name__}: {e}"})
+            return False
+        elapsed = time.perf_counter() - start
+        self.runs.append((step, elapsed))
+        if self.app.exception:
+            self.errors.append({"step": step, "error": self.app.exception[0].value})
+            return False
+        return True
+
+    def think(self):
+        time.sleep(self.rng.uniform(*THINK_TIME))
+
+    def _choose(self, options):
+        options = [o for o in options if o not in ("", None)]
+        return self.rng.choice(options) if options else None
+
+    # ---------- Recorridos ----------
+
+    def navigate(self, page):
+        return self.run("navegar", lambda: self.app.sidebar.selectbox[0].set_value(page))
+
+    def browse(self):
+        """Filtra la base de datos, abre un jugador y a veces imprime su PDF"""
+        if not self.navigate(PAGE_DATABASE):
+            return
+        self.think()
+        # Un filtro al azar; de vez en cuando se vuelven a mostrar todos
+        key = self.rng.choice(FILTER_KEYS)
+        widget = self.app.selectbox(key=key)
+        value = widget.options[0] if self.rng.random() < 0.3 else self._choose(widget.options[1:])
+        if value is None or not self.run("filtrar", lambda: widget.set_value(value)):
+            return
+        self.think()
+        selector = self.app.selectbox(key="jugador_selector")
+        jugador = self._choose(selector.options)
+        if jugador is None or not self.run("seleccionar", lambda: selector.set_value(jugador)):
+            return
+        if self.rng.random() < PDF_PROBABILITY:
+            self.think()
+            self.run("pdf", lambda: self.app.button(key="generar_pdf_btn").click())
+
+    def save_report(self):
+        """Rellena y envía el formulario de informe nuevo"""
+        if not self.navigate(PAGE_NEW_REPORT):
+            return
+        self.think()
+
+        def fill():
+            for widget in self.app.text_input:
+                if widget.label == "Nombre del jugador*":
+                    widget.set_value(f"Carga {self.session_id} {len(self.runs)}")
+                elif widget.label == "Ojeador":
+                    widget.set_value(f"Sesión {self.session_id}")
+            for widget in self.app.selectbox:
+                if widget.label.endswith("*") and widget.options:
+                    widget.set_value(self._choose(widget.options))
+            next(b for b in self.app.button if "Guardar Jugador" in str(b.label)).click()
+
+        if self.run("guardar", fill) and not any("guardado" in str(m.value) for m in self.app.success):
+            # Validación fallida u otro error visible: la ejecución cuenta, el guardado no
+            errores = [str(m.value) for m in self.app.error]
+            self.errors.append({"step": "guardar", "error": "; ".join(errores) or "informe no guardado"})
+
+    def loop(self, deadline):
+        if not self.run("inicio"):
+            return
+        while time.monotonic() < deadline:
+            if self.rng.random() < SAVE_PROBABILITY:
+                self.save_report()
+            else:
+                self.browse()
+            self.think()
+
+def _session_worker(session_id, seed, duration, workdir, barrier, results):
+    """Proceso de una sesión: prepara su AppTest, espera a las demás y recorre la app"""
+    os.chdir(workdir)
+    try:
+        session = SimulatedSession(session_id, seed)
+    except Exception:
+        barrier.abort()
+        raise
+    barrier.wait()
+    try:
+        session.loop(time.monotonic() + duration)
+    except Exception:
+        session.errors.append({"step": "sesión", "error": traceback.format_exc(limit=3)})
+    # Pico de memoria propio (ru_maxrss en KB en Linux), por si el muestreo no llega a verlo
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results.put((session_id, session.runs, session.errors, peak))
+
+def run_level(n_sessions, duration, seed=42):
+    """Ejecuta ``n_sessions`` sesiones simultáneas durante ``duration`` segundos
+
+    Cada sesión va en su propio proceso: ``AppTest`` usa un runtime global por
+    proceso y dos ejecuciones simultáneas en hilos se pisan. Comparten la base
+    de datos, el diario, el escritor y la tabla publicada en disco, pero no las
+    cachés en memoria, así que la memoria medida es la suma de todos.
+    """
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_sessions + 1)
+    results = context.Queue()
+    workers = [context.Process(target=_session_worker, name=f"load-session-{i}",
+                               args=(i, seed + i, duration, os.getcwd(), barrier, results))
+               for i in range(n_sessions)]
+    for worker in workers:
+        worker.start()
+    try:
+        # Importar la app y crear las sesiones no forma parte de la medida
+        barrier.wait(timeout=RUN_TIMEOUT)
+    except threading.BrokenBarrierError:
+        for worker in workers:
+            worker.terminate()
+        raise RuntimeError("No se pudieron iniciar las sesiones simuladas")
+
+    start = time.perf_counter()
+    with MemorySampler([w.pid for w in workers]) as sampler:
+        collected = [results.get() for _ in workers]
+    elapsed = time.perf_counter() - start
+    for worker in workers:
+        worker.join()
+
+    runs = [run for _, session_runs, _, _ in collected for run in session_runs]
+    errors = [dict(error, session=session_id)
+              for session_id, _, session_errors, _ in collected for error in session_errors]
+    steps = sorted({step for step, _ in runs})
+    memory = sampler.summary()
+    memory["rss_peak_per_session"] = max(peak for _, _, _, peak in collected)
+    return {
+        "sessions": n_sessions,
+        "seconds": elapsed,
+        "runs": len(runs),
+        "throughput_runs_per_second": len(runs) / elapsed if elapsed else 0.0,
+        "latency": latency_stats([t for _, t in runs]),
+        "steps": {step: latency_stats([t for s, t in runs if s == step]) for step in steps},
+        "errors": len(errors),
+        "error_samples": errors[:10],
+        "memory": memory,
+    }
+
+# ====================================
+# EJECUCIÓN
+# ====================================
+
+def prepare_workdir(workdir, n_rows, seed=42):
+    """Crea en ``workdir`` la base de datos sintética y los archivos de la aplicación"""
+    for asset in APP_ASSETS:
+        if os.path.exists(os.path.join(BASE_DIR, asset)):
+            shutil.copy(os.path.join(BASE_DIR, asset), workdir)
+    os.chdir(workdir)
+    columns = get_schema_columns()
+    image_paths = create_synthetic_images()
+    generate_synthetic_reports(n_rows, columns, image_paths, seed=seed).to_csv(app_new.DATABASE_FILE, index=False)
+
+def run_load_test(levels, duration=DEFAULT_DURATION, n_rows=DEFAULT_ROWS, seed=42):
+    """Ejecuta cada nivel de concurrencia sobre la misma base de datos sintética"""
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "rows": n_rows,
+        "duration": duration,
+        "levels": {},
+    }
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix=f"scouting_load_{n_rows}_")
+    try:
+        prepare_workdir(workdir, n_rows, seed)
+        for n_sessions in levels:
+            print(f"{n_sessions} sesiones durante {duration} s...")
+            level = run_level(n_sessions, duration, seed)
+            report["levels"][str(n_sessions)] = level
+            latency = level["latency"]
+            print(f"  {level['runs']} ejecuciones, {level['throughput_runs_per_second']:.1f}/s, "
+                  f"p50 {latency['p50'] or 0:.3f} s, p95 {latency['p95'] or 0:.3f} s, "
+                  f"p99 {latency['p99'] or 0:.3f} s, errores {level['errors']}, "
+                  f"memoria máx. {(level['memory']['rss_peak'] or 0) / 2**20:.0f} MB")
+    finally:
+        # El almacén del proceso apunta al directorio temporal
+        scouting_store.reset_store()
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga con sesiones simultáneas")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS,
+                        help="Niveles de concurrencia a medir")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="Segundos por nivel")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="Informes de la base sintética")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--max-p95", type=float, help="Latencia p95 máxima aceptable (segundos)")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args.sessions, duration=args.duration, n_rows=args.rows, seed=args.seed)
+
+    exit_code = 0
+    if args.max_p95 is not None:
+        over = [n for n, level in report["levels"].items()
+                if level["latency"]["p95"] is not None and level["latency"]["p95"] > args.max_p95]
+        for n in over:
+            print(f"CAPACIDAD: con {n} sesiones la p95 supera {args.max_p95} s")
+        exit_code = 1 if over else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.output}")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
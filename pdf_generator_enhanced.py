@@ -1,226 +1,604 @@
-from fpdf import FPDF
-from datetime import datetime
+"""
+Generador de informes PDF por secciones.
+
+Un informe es una lista de secciones (cabecera, ficha, evaluación AUDAX,
+métricas, evaluaciones, conclusiones y firmas). Cada sección separa su parte
+estática (fondos, marcos, títulos y etiquetas) de los datos del jugador. La
+parte estática de un conjunto de secciones se compila una sola vez por proceso
+en una plantilla: el contenido PDF ya generado de cada página (trazos, textos y
+posiciones). Por cada jugador esas instrucciones se copian tal cual en la
+página y solo se dibujan sus campos.
+
+Las fuentes TrueType también se analizan una sola vez por proceso, recortadas
+a los alfabetos de los informes (``FONT_UNICODE_RANGES``): cada documento
+recibe una copia con su propio subconjunto de glifos en lugar de volver a leer
+las tablas del archivo, y al incrustarla fpdf2 recorre unos cientos de glifos
+en lugar de miles.
+
+Ambas cosas usan detalles internos de fpdf2 (``_out``, ``_resource_catalog``,
+``SubsetMap``, los atributos de ``TTFFont``), por eso ``requirements.txt`` fija
+fpdf2 a la serie 2.8 y ``tests/test_pdf_generator.py`` comprueba que los PDF se
+leen con un analizador independiente. Antes de subir de versión hay que pasar
+esas pruebas.
+
+Se puede pedir un subconjunto de secciones, p. ej. ``SUMMARY_SECTIONS`` (una
+página por jugador) para los dosieres de varios jugadores, que además se
+generan en un único documento: la fuente se carga y se incrusta una sola vez.
+
+    generate_player_pdf(jugador, "informe.pdf")
+    generate_player_pdf(jugador, "resumen.pdf", sections=SUMMARY_SECTIONS)
+    generate_players_pdf(jugadores, "comparativa.pdf")
+"""
+
+import copy
+import io
 import os
+from datetime import datetime
+from functools import lru_cache
+
+from fontTools import subset, ttLib
+from fpdf import FPDF
+from fpdf.enums import MethodReturnValue, PDFResourceType
+from fpdf.fonts import SubsetMap, TTFFont
+
+# ====================================
+# CONSTANTES
+# ====================================
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+MARGIN = 15
+COLUMN_GAP = 8
+
+FULL_SECTIONS = ("cabecera", "ficha", "audax", "metricas", "evaluaciones", "conclusiones", "firmas")
+SUMMARY_SECTIONS = ("cabecera", "ficha", "audax", "metricas", "evaluaciones")
+
+# Rutas donde podrían estar instaladas las fuentes Unicode, por orden de preferencia
+UNICODE_FONTS = [
+    ("DejaVu", [
+        '/Library/Fonts/DejaVuSans.ttf',  # macOS
+        '/System/Library/Fonts/DejaVuSans.ttf',  # Alternativa macOS
+        'C:/Windows/Fonts/DejaVuSans.ttf',  # Windows
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'  # Linux
+    ]),
+    ("ArialUnicode", [
+        '/Library/Fonts/Arial Unicode.ttf',  # macOS
+        'C:/Windows/Fonts/ARIALUNI.TTF',  # Windows
+    ]),
+]
+
+# Caracteres que se conservan de la fuente Unicode: latín con sus extensiones,
+# griego, cirílico, puntuación, monedas, flechas y figuras. El resto se
+# imprime como un recuadro vacío.
+FONT_UNICODE_RANGES = [
+    (0x0020, 0x024F), (0x0370, 0x052F), (0x1E00, 0x1EFF), (0x2000, 0x206F),
+    (0x20A0, 0x20CF), (0x2100, 0x214F), (0x2190, 0x21FF), (0x25A0, 0x25FF),
+]
+
+SCORE_FIELDS = [("RENDIMIENTO", 'rendimiento'), ("POTENCIAL", 'potencial'), ("ADAPTABILIDAD", 'adaptabilidad')]
+EVALUATION_FIELDS = [
+    ("Técnica", 'evaluacion_tecnica'),
+    ("Táctica", 'evaluacion_tactica'),
+    ("Física", 'evaluacion_fisica'),
+    ("Mental", 'evaluacion_mental')
+]
+CONCLUSION_FIELDS = [
+    ("Descripción General", 'descripcion_general'),
+    ("Historial Médico", 'historial_lesiones'),
+    ("Referencias Adicionales", 'referencias')
+]
+
+# ====================================
+# FUENTES
+# ====================================
+
+@lru_cache(maxsize=1)
+def find_unicode_font():
+    """(familia, ruta normal, ruta negrita o None) de la primera fuente Unicode instalada, o None"""
+    for family, paths in UNICODE_FONTS:
+        for font_path in paths:
+            if os.path.exists(font_path):
+                bold_path = font_path.replace('.ttf', '-Bold.ttf')
+                print(f"Usando fuente: {font_path}")
+                return family, font_path, bold_path if os.path.exists(bold_path) else None
+    print("No se encontró ninguna fuente Unicode, usando Helvetica (soporte limitado)")
+    return None
+
+@lru_cache(maxsize=8)
+def _parsed_font(path, family, style):
+    """Fuente TrueType recortada y analizada, compartida por los documentos del proceso
+
+    Devuelve ``(TTFFont, bytes del TTF recortado)``. Se recorta a
+    ``FONT_UNICODE_RANGES`` porque fpdf2 vuelve a analizar el archivo entero
+    para incrustar el subconjunto de cada documento; con unos cientos de glifos
+    en lugar de miles, generar el PDF cuesta una fracción.
+    """
+    ttfont = ttLib.TTFont(path, recalcTimestamp=False)
+    options = subset.Options(notdef_outline=True, recommended_glyphs=True)
+    options.drop_tables += ["FFTM", "GDEF", "GPOS", "GSUB", "kern"]
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=[c for start, end in FONT_UNICODE_RANGES for c in range(start, end + 1)])
+    subsetter.subset(ttfont)
+    buffer = io.BytesIO()
+    ttfont.save(buffer)
+    data = buffer.getvalue()
+    return TTFFont(FPDF(), io.BytesIO(data), f"{family.lower()}{style}", style), data
+
+def attach_font(pdf, family, style, path):
+    """Añade una fuente TrueType a ``pdf`` sin volver a analizar el archivo
+
+    Las métricas y el mapa de caracteres se comparten; el subconjunto de glifos
+    es propio del documento y el TTF se abre de nuevo (sin analizarlo) porque
+    fpdf2 lo recorta al generar el PDF.
+    """
+    parsed, data = _parsed_font(path, family, style)
+    font = copy.copy(parsed)
+    font.i = len(pdf.fonts) + 1
+    font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, lazy=True)
+    font.subset = SubsetMap(font)
+    font.missing_glyphs = []
+    font.biggest_size_pt = 0
+    font._hbfont = None
+    pdf.fonts[font.fontkey] = font
+
+def _value(player_data, field, default="No especificado"):
+    """Valor de un campo como texto, con ``default`` si está vacío"""
+    value = player_data.get(field)
+    if value is None or (isinstance(value, float) and value != value) or str(value).strip().lower() in ("", "nan", "<na>"):
+        return default
+    return str(value)
+
+def _score(player_data, field, maximum):
+    """Puntuación numérica acotada a [0, maximum]"""
+    try:
+        value = float(player_data.get(field) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    if value != value:
+        return 0.0
+    return max(0.0, min(float(maximum), value))
+
+def audax_score(player_data):
+    """Puntuación AUDAX: ((Rendimiento + Potencial + Adaptabilidad) / 18) × 10"""
+    suma = sum(_score(player_data, field, 10) for _, field in SCORE_FIELDS)
+    return max(0.0, min(10.0, (suma / 18) * 10))
+
+# ====================================
+# PLANTILLA ESTÁTICA
+# ====================================
+
+class StaticCanvas:
+    """Registra los trazos estáticos de una sección para reproducirlos después"""
 
-class PDFGenerator(FPDF):
     def __init__(self):
-        super().__init__()
-        self.default_font = 'helvetica'  # Fuente por defecto
-        self.setup_unicode_font()
-        self.set_font(self.default_font, '', 10)  # Establecer fuente por defecto
-    
-    def setup_unicode_font(self):
-        """Configura una fuente Unicode para soportar emojis y caracteres especiales"""
-        try:
-            # Rutas donde podrían estar instaladas las fuentes DejaVu
-            dejavu_paths = [
-                '/Library/Fonts/DejaVuSans.ttf',  # macOS
-                '/System/Library/Fonts/DejaVuSans.ttf',  # Alternativa macOS
-                'C:/Windows/Fonts/DejaVuSans.ttf',  # Windows
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'  # Linux
-            ]
-            
-            # Buscar la fuente DejaVu
-            for font_path in dejavu_paths:
-                if os.path.exists(font_path):
-                    try:
-                        self.add_font('DejaVu', '', font_path, uni=True)
-                        bold_path = font_path.replace('.ttf', '-Bold.ttf')
-                        if os.path.exists(bold_path):
-                            self.add_font('DejaVu', 'B', bold_path, uni=True)
-                        self.default_font = 'DejaVu'
-                        print(f"Usando fuente: {font_path}")
-                        return
-                    except Exception as e:
-                        print(f"Error al cargar fuente {font_path}: {e}")
-            
-            # Si no se encuentra DejaVu, usar solo la versión normal de Arial Unicode
-            # sin intentar usar negrita, ya que puede no estar disponible
-            arial_paths = [
-                '/Library/Fonts/Arial Unicode.ttf',  # macOS
-                'C:/Windows/Fonts/ARIALUNI.TTF',    # Windows
-                '/usr/share/fonts/truetype/ariblk.ttf'  # Linux
-            ]
-            
-            for font_path in arial_paths:
-                if os.path.exists(font_path):
-                    try:
-                        self.add_font('ArialUnicode', '', font_path, uni=True)
-                        # No registramos la versión en negrita para evitar errores
-                        self.default_font = 'ArialUnicode'
-                        print(f"Usando fuente: {font_path} (solo normal, sin negrita)")
-                        return
-                    except Exception as e:
-                        print(f"Error al cargar fuente {font_path}: {e}")
-            
-            # Si no se encuentra ninguna fuente Unicode, usar Helvetica
-            print("No se encontró ninguna fuente Unicode, usando Helvetica (soporte limitado)")
-            self.default_font = 'helvetica'
-            
-        except Exception as e:
-            print(f"Error en setup_unicode_font: {e}")
-            self.default_font = 'helvetica'
-    
+        self.ops = []
+
+    def rect(self, x, y, w, h, fill=None, border=None):
+        self.ops.append(("rect", x, y, w, h, fill, border))
+
+    def line(self, x1, y1, x2, y2, color=(0, 100, 0)):
+        self.ops.append(("line", x1, y1, x2, y2, color))
+
+    def text(self, x, y, w, h, text, size=10, bold=False, align='L'):
+        self.ops.append(("text", x, y, w, h, text, size, bold, align))
+
+
+class Section:
+    """Sección del informe: ``height`` mm, trazos estáticos y campos del jugador"""
+
+    name = ""
+    height = 0
+
+    def static(self, canvas, y):
+        """Dibuja en ``canvas`` lo que no depende del jugador"""
+
+    def fill(self, renderer, player_data, y):
+        """Dibuja los datos del jugador"""
+
+
+class HeaderSection(Section):
+    name = "cabecera"
+    height = 45
+
+    def static(self, canvas, y):
+        canvas.rect(0, y, PAGE_WIDTH, 40, fill=(200, 230, 200))
+        canvas.line(MARGIN, y + 30, PAGE_WIDTH - MARGIN, y + 30)
+
+    def fill(self, renderer, player_data, y):
+        veredicto = _value(player_data, 'veredicto', "")
+        title = f"{_value(player_data, 'jugador', '')} - {veredicto.upper()}" if veredicto else _value(player_data, 'jugador', '')
+        renderer.text(0, y + 10, PAGE_WIDTH, 10, title, size=16, bold=True, align='C')
+
+
+class ProfileSection(Section):
+    """Foto, información personal, club y contrato, y posiciones en tres columnas"""
+
+    name = "ficha"
+    height = 80
+    column_width = (PAGE_WIDTH - 2 * MARGIN - 2 * COLUMN_GAP) / 3
+    personal = [("Edad", 'edad', " años"), ("Nacionalidad", 'nacionalidad', ""), ("Pie hábil", 'pie', ""), ("Talla", 'talla', " cm")]
+    club = [("Club actual", 'club_actual'), ("Liga", 'liga'), ("Fin de contrato", 'fin_contrato'),
+            ("Agente", 'agente'), ("Teléfono", 'telefono_agente')]
+    positions = [("Principal", 'posicion_principal'), ("Secundaria", 'posicion_secundaria')]
+
+    def columns(self):
+        return [MARGIN + (self.column_width + COLUMN_GAP) * i for i in range(3)]
+
+    def static(self, canvas, y):
+        x_personal, x_club, x_positions = self.columns()
+        for x, title in [(x_personal, "Información Personal"), (x_club, "Club y Contrato"), (x_positions, "Posiciones")]:
+            canvas.text(x, y, self.column_width, 8, title, size=12, bold=True)
+        # Etiquetas: la foto ocupa la parte superior de la primera columna
+        for i, (label, _, _) in enumerate(self.personal):
+            canvas.text(x_personal, y + 52 + i * 6.5, 24, 5, f"{label}:", size=8)
+        for i, (label, _) in enumerate(self.club):
+            canvas.text(x_club, y + 12 + i * 12, self.column_width, 5, f"{label}:", size=8)
+        for i, (label, _) in enumerate(self.positions):
+            canvas.text(x_positions, y + 12 + i * 14, self.column_width, 5, f"{label}:", size=8)
+
+    def fill(self, renderer, player_data, y):
+        x_personal, x_club, x_positions = self.columns()
+        renderer.photo(player_data, x_personal, y + 11, 30, 38)
+        for i, (_, field, unit) in enumerate(self.personal):
+            value = _value(player_data, field)
+            renderer.text(x_personal + 24, y + 52 + i * 6.5, self.column_width - 24, 5,
+                          f"{value}{unit}" if value != "No especificado" else value, size=9)
+        for i, (_, field) in enumerate(self.club):
+            renderer.text(x_club, y + 17 + i * 12, self.column_width, 5, _value(player_data, field), size=10)
+        for i, (_, field) in enumerate(self.positions):
+            renderer.text(x_positions, y + 17 + i * 14, self.column_width, 5, _value(player_data, field, "No especificada"), size=10)
+
+
+class AudaxSection(Section):
+    name = "audax"
+    height = 30
+    bar_width = PAGE_WIDTH - 2 * MARGIN - 60
+
+    def static(self, canvas, y):
+        canvas.text(MARGIN, y, 100, 8, "Evaluación AUDAX", size=12, bold=True)
+        canvas.rect(MARGIN + 60, y + 12, self.bar_width, 8, border=(200, 200, 200))
+
+    def fill(self, renderer, player_data, y):
+        audax = audax_score(player_data)
+        renderer.text(MARGIN, y + 12, 60, 8, f"Puntuación: {audax:.1f}/10", size=10)
+        renderer.bar(MARGIN + 60, y + 12, self.bar_width, 8, audax * 10, f"{audax:.1f}")
+
+
+class MetricsSection(Section):
+    name = "metricas"
+    height = 55
+    card_width = (PAGE_WIDTH - 2 * MARGIN - 2 * COLUMN_GAP) / 3
+
+    def static(self, canvas, y):
+        canvas.text(0, y, PAGE_WIDTH, 8, "Métricas Principales", size=14, bold=True, align='C')
+        for i, (title, _) in enumerate(SCORE_FIELDS):
+            x = MARGIN + (self.card_width + COLUMN_GAP) * i
+            canvas.rect(x, y + 12, self.card_width, 38, fill=(245, 245, 245))
+            canvas.text(x, y + 15, self.card_width, 6, title, size=10, bold=True, align='C')
+            canvas.rect(x + 10, y + 37, self.card_width - 20, 8, border=(200, 200, 200))
+
+    def fill(self, renderer, player_data, y):
+        for i, (_, field) in enumerate(SCORE_FIELDS):
+            x = MARGIN + (self.card_width + COLUMN_GAP) * i
+            value = _score(player_data, field, 6)
+            renderer.text(x, y + 23, self.card_width, 10, f"{value:g}/6", size=16, bold=True, align='C')
+            renderer.bar(x + 10, y + 37, self.card_width - 20, 8, value / 6 * 100)
+
+
+class EvaluationsSection(Section):
+    name = "evaluaciones"
+    height = 70
+    bar_width = 100
+
+    def static(self, canvas, y):
+        canvas.text(0, y, PAGE_WIDTH, 8, "Evaluaciones Técnicas", size=14, bold=True, align='C')
+        for i, (title, _) in enumerate(EVALUATION_FIELDS):
+            row = y + 14 + i * 14
+            canvas.text(MARGIN, row, 40, 10, title, size=10)
+            canvas.rect(MARGIN + 65, row + 1, self.bar_width, 8, border=(200, 200, 200))
+
+    def fill(self, renderer, player_data, y):
+        for i, (_, field) in enumerate(EVALUATION_FIELDS):
+            row = y + 14 + i * 14
+            value = _score(player_data, field, 6)
+            renderer.text(MARGIN + 40, row, 20, 10, f"{value:g}/6", size=10, align='R')
+            renderer.bar(MARGIN + 65, row + 1, self.bar_width, 8, value / 6 * 100)
+
+
+class ConclusionsSection(Section):
+    name = "conclusiones"
+    height = 100
+    column_width = (PAGE_WIDTH - 2 * MARGIN - 2 * COLUMN_GAP) / 3
+    max_lines = 16
+
+    def static(self, canvas, y):
+        canvas.text(0, y, PAGE_WIDTH, 8, "Conclusiones", size=14, bold=True, align='C')
+        for i, (title, _) in enumerate(CONCLUSION_FIELDS):
+            x = MARGIN + (self.column_width + COLUMN_GAP) * i
+            canvas.text(x, y + 12, self.column_width, 8, title, size=10, bold=True)
+            canvas.line(x, y + 20, x + self.column_width, y + 20, color=(0, 0, 0))
+
+    def fill(self, renderer, player_data, y):
+        for i, (_, field) in enumerate(CONCLUSION_FIELDS):
+            x = MARGIN + (self.column_width + COLUMN_GAP) * i
+            text = _value(player_data, field, "Sin información disponible")
+            renderer.paragraph(x, y + 22, self.column_width, 5, text, self.max_lines, size=9)
+
+
+class SignaturesSection(Section):
+    name = "firmas"
+    height = 25
+
+    def static(self, canvas, y):
+        canvas.text(MARGIN, y + 5, 90, 5, "Firma del ojeador: __________________________", size=8)
+        canvas.text(PAGE_WIDTH / 2, y + 5, 90, 5, "Firma del director deportivo: __________________", size=8)
+
+    def fill(self, renderer, player_data, y):
+        renderer.text(MARGIN, y + 12, 90, 5, f"Fecha: {datetime.now().strftime('%d/%m/%Y')}", size=8)
+
+
+SECTIONS = {section.name: section for section in [
+    HeaderSection(), ProfileSection(), AudaxSection(), MetricsSection(),
+    EvaluationsSection(), ConclusionsSection(), SignaturesSection()
+]}
+
+
+@lru_cache(maxsize=16)
+def compile_layout(sections):
+    """Plantilla de un conjunto de secciones: ``[(trazos estáticos, [(sección, y)])]`` por página
+
+    Las posiciones se calculan aquí una vez; una sección que no cabe en la
+    página pasa a la siguiente.
+    """
+    unknown = [name for name in sections if name not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Secciones desconocidas: {', '.join(unknown)}")
+
+    pages = []
+    canvas, placed, y = StaticCanvas(), [], 0
+    for name in sections:
+        section = SECTIONS[name]
+        if placed and y + section.height > PAGE_HEIGHT - MARGIN:
+            pages.append((tuple(canvas.ops), tuple(placed)))
+            canvas, placed, y = StaticCanvas(), [], MARGIN
+        section.static(canvas, y)
+        placed.append((section, y))
+        y += section.height
+    pages.append((tuple(canvas.ops), tuple(placed)))
+    return tuple(pages)
+
+@lru_cache(maxsize=16)
+def compile_template(sections, font, has_bold):
+    """Parte estática de cada página como contenido PDF, para una fuente
+
+    Los trazos se dibujan una vez en un documento auxiliar y se guarda lo que
+    fpdf2 escribió en cada página, entre ``q``/``Q`` para no alterar el estado
+    gráfico de la página que lo recibe. Devuelve ``(contenido por página,
+    glifos por fuente)``: el orden en que la plantilla usó los glifos, que cada
+    documento repite para que sus códigos coincidan. None si la fuente cargada
+    no es la pedida.
+    """
+    renderer = ReportRenderer(sections, use_template=False)
+    if (renderer.font, renderer.has_bold) != (font, has_bold):
+        return None
+    pdf = renderer.pdf
+    pages = []
+    for ops, _ in renderer.layout:
+        pdf.add_page(orientation='P')
+        # Colores y fuente que ningún trazo usa: así la plantilla los fija todos explícitamente
+        pdf.set_fill_color(1, 2, 3)
+        pdf.set_draw_color(1, 2, 3)
+        pdf.current_font_is_set_on_page = False
+        contents = pdf.pages[pdf.page].contents
+        start = len(contents)
+        renderer._replay(ops)
+        pages.append(b"q\n" + bytes(contents[start:]) + b"Q")
+    return tuple(pages), _glyph_order(pdf)
+
+def _glyph_order(pdf):
+    """{clave de fuente: ((unicode, código en el subconjunto), ...)} de las fuentes TrueType"""
+    return {
+        key: tuple((glyph.unicode[0], char_id) for glyph, char_id in font.subset.items() if glyph is not None)
+        for key, font in pdf.fonts.items() if hasattr(font, "subset")
+    }
+
+# ====================================
+# RENDERIZADO
+# ====================================
+
+class ReportRenderer:
+    """Documento PDF con uno o varios informes a partir de la plantilla compilada"""
+
+    def __init__(self, sections=FULL_SECTIONS, use_template=True):
+        self.layout = compile_layout(tuple(sections))
+        self.pdf = FPDF(orientation='P', unit='mm', format='A4')
+        self.pdf.set_auto_page_break(False)
+        self.font = 'helvetica'
+        self.has_bold = True
+        # Fotos ya preparadas (ruta -> bytes), p. ej. reducidas en paralelo para un resumen
+        self.photos = {}
+        font = find_unicode_font()
+        if font is not None:
+            family, regular, bold = font
+            try:
+                attach_font(self.pdf, family, '', regular)
+                if bold:
+                    attach_font(self.pdf, family, 'B', bold)
+                self.font, self.has_bold = family, bold is not None
+            except Exception as e:
+                print(f"Error al cargar fuente {regular}: {e}")
+        # Las fuentes se registran siempre en el mismo orden: la plantilla las nombra por número
+        self.set_font(10)
+        self.set_font(10, bold=True)
+        self.template = compile_template(tuple(sections), self.font, self.has_bold) if use_template else None
+        if self.template is not None:
+            self._seed_glyphs(self.template[1])
+
+    def _seed_glyphs(self, glyph_order):
+        """Numera los glifos de la plantilla como en ella, antes de escribir ningún texto"""
+        for key, glyphs in glyph_order.items():
+            subset = self.pdf.fonts[key].subset
+            for unicode, char_id in glyphs:
+                if subset.pick(unicode) != char_id:
+                    print(f"La plantilla del PDF no coincide con la fuente {key}; se dibuja sin ella")
+                    self.template = None
+                    return
+
+    # ---------- Primitivas ----------
+
     def safe_text(self, text):
-        """Limpia el texto de caracteres problemáticos si no se puede usar Unicode"""
-        if not isinstance(text, str):
-            text = str(text)
-            
-        # Si estamos usando una fuente Unicode, devolver el texto tal cual
-        if hasattr(self, 'default_font') and self.default_font in ['DejaVu', 'ArialUnicode']:
+        """Con Helvetica solo hay latin-1: el resto de caracteres se sustituye"""
+        text = str(text)
+        if self.font != 'helvetica':
             return text
-        
-        # Reemplazar emojis comunes por texto
-        emoji_replacements = {
-            '📅': '[Fecha]',
-            '⭐': '[Estrella]',
-            '✅': '[Check]',
-            '❌': '[X]',
-            '🔥': '[Fuego]',
-            '💡': '[Idea]',
-            '📝': '[Nota]',
-            '🎯': '[Objetivo]',
-            '🚀': '[Cohete]',
-            '📊': '[Gráfico]',
-            '👕': '[Camiseta]',
-            '🏆': '[Trofeo]',
-            '👤': '[Usuario]',
-            '📞': '[Teléfono]',
-            '🌍': '[Mundo]',
-            '⚽': '[Balón]',
-            '📏': '[Regla]',
-            '🔷': '[Diamante]'
-        }
-        
-        for emoji, replacement in emoji_replacements.items():
-            text = text.replace(emoji, replacement)
-        
-        return text
-    
-    def add_header_section(self, player_data):
-        """Añade el encabezado del reporte"""
-        self.set_fill_color(200, 230, 200)  # Verde claro
-        self.rect(0, 0, self.w, 40, 'F')  # Rectángulo de fondo
-        
-        # Título - manejar negrita de forma segura
-        self.set_xy(0, 10)
+        return text.replace('–', '-').replace('—', '-').encode('latin-1', 'replace').decode('latin-1')
+
+    def set_font(self, size, bold=False):
+        self.pdf.set_font(self.font, 'B' if bold and self.has_bold else '', size)
+
+    def text(self, x, y, w, h, text, size=10, bold=False, align='L'):
+        self.set_font(size, bold)
+        self.pdf.set_xy(x, y)
+        self.pdf.cell(w, h, self.safe_text(text), align=align)
+
+    def paragraph(self, x, y, w, h, text, max_lines, size=9):
+        """Texto en varias líneas, recortado a ``max_lines``"""
+        self.set_font(size)
+        text = self.safe_text(text)
+        lines = self.pdf.multi_cell(w, h, text, dry_run=True, output=MethodReturnValue.LINES)
+        if len(lines) > max_lines:
+            text = " ".join(lines[:max_lines]).rstrip()[:-3] + "..."
+        self.pdf.set_xy(x, y)
+        self.pdf.multi_cell(w, h, text, align='L')
+
+    def bar(self, x, y, w, h, percentage, label=None, color=(70, 130, 180)):
+        """Relleno de una barra cuyo marco está en la plantilla"""
+        percentage = max(0.0, min(100.0, percentage))
+        if percentage:
+            self.pdf.set_fill_color(*color)
+            self.pdf.rect(x, y, w * percentage / 100, h, 'F')
+        # Texto blanco sobre el relleno; negro si la barra casi no tiene relleno
+        if percentage > 15:
+            self.pdf.set_text_color(255, 255, 255)
+        self.text(x, y, w, h, label if label is not None else f"{percentage:.0f}%", size=8, bold=True, align='C')
+        self.pdf.set_text_color(0, 0, 0)
+
+    def photo(self, player_data, x, y, width, height):
+        """Foto del jugador dentro de un recuadro; las subidas ya están normalizadas"""
+        image_path = player_data.get('imagen_path')
+        if not image_path or not isinstance(image_path, str):
+            return
+        source = self.photos.get(image_path)
+        if source is not None:
+            source = io.BytesIO(source)
+        elif os.path.exists(image_path):
+            source = image_path
+        else:
+            return
         try:
-            self.set_font(self.default_font, 'B', 16)
-        except:
-            # Si falla la negrita, usar normal
-            self.set_font(self.default_font, '', 16)
-        
-        self.cell(0, 10, self.safe_text(f"{player_data['jugador']} - FIRMAR - MEJORA PLANTILLA"), 0, 1, 'C')
-        
-        # Línea decorativa
-        self.set_draw_color(0, 100, 0)
-        self.line(20, 30, self.w - 20, 30)
-        
-        self.set_y(45)  # Espacio después del header
-    
-    def add_personal_info(self, player_data):
-        """Añade la sección de información personal"""
-        x = 20
-        y = 60
-        
-        # Foto del jugador (si existe)
-        if 'imagen_path' in player_data and player_data['imagen_path'] and os.path.exists(player_data['imagen_path']):
-            try:
-                from PIL import Image
-                # Redimensionar imagen manteniendo la relación de aspecto
-                img = Image.open(player_data['imagen_path'])
-                img.thumbnail((60, 80))  # Tamaño máximo 60x80 píxeles
-                img_path = f"temp_{os.path.basename(player_data['imagen_path'])}"
-                img.save(img_path)  # Guardar temporalmente la imagen redimensionada
-                
-                self.image(img_path, x, y, 50)  # Ancho fijo de 50mm
-                y += 60  # Ajustar posición Y después de la imagen
-                
-                # Eliminar archivo temporal
-                os.remove(img_path)
-            except Exception as e:
-                print(f"Error al cargar la imagen: {e}")
-        
-        # Información personal
-        self.set_font(self.default_font, '', 10)
-        info_items = [
-            ("📅", f"Edad: {player_data['edad']} años"),
-            ("🌍", f"Nacionalidad: {player_data['nacionalidad']}"),
-            ("⚽", f"Pie hábil: {player_data['pie']}"),
-            ("📏", f"Talla: {player_data['talla']} cm")
-        ]
-        
-        for emoji, text in info_items:
-            self.set_xy(x, y)
-            self.cell(10, 8, self.safe_text(emoji), 0, 0, 'L')
-            self.cell(0, 8, self.safe_text(text), 0, 1, 'L')
-            y += 7  # Espacio entre líneas
-    
-    def add_club_info(self, player_data):
-        """Añade la sección de información del club"""
-        x = 80  # Ajustar según el diseño
-        y = 60  # Misma altura que la columna 1
-        
-        self.set_font(self.default_font, 'B', 12)
-        self.set_xy(x, y - 15)
-        self.cell(0, 10, self.safe_text("Club y Contrato"), 0, 1, 'L')
-        
-        # Información del club
-        self.set_font(self.default_font, '', 10)
-        info_items = [
-            ("👕", f"Club actual: {player_data['club_actual']}"),
-            ("🏆", f"Liga: {player_data['liga']}"),
-            ("📅", f"Fin de contrato: {player_data['fin_contrato']}"),
-            ("👤", f"Agente: {player_data['agente']}"),
-            ("📞", f"Teléfono: {player_data['telefono_agente']}")
-        ]
-        
-        for emoji, text in info_items:
-            self.set_xy(x, y)
-            self.cell(10, 8, self.safe_text(emoji), 0, 0, 'L')
-            self.multi_cell(0, 8, self.safe_text(text), 0, 'L')
-            y += 7  # Espacio entre líneas
-    
-    def add_positions(self, player_data):
-        """Añade la sección de posiciones"""
-        x = 140  # Ajustar según el diseño
-        y = 60  # Misma altura que las otras columnas
-        
-        self.set_font(self.default_font, 'B', 12)
-        self.set_xy(x, y - 15)
-        self.cell(0, 10, self.safe_text("Posiciones"), 0, 1, 'L')
-        
-        self.set_font(self.default_font, '', 10)
-        positions = [
-            ("⭐", f"Principal: {player_data['posicion_principal']}"),
-            ("🔷", f"Secundaria: {player_data.get('posicion_secundaria', 'No especificada')}")
+            self.pdf.image(source, x, y, width, height, keep_aspect_ratio=True)
+        except Exception as e:
+            print(f"Error al cargar la imagen: {e}")
+
+    def _replay(self, ops):
+        for op in ops:
+            kind = op[0]
+            if kind == "rect":
+                _, x, y, w, h, fill, border = op
+                if fill:
+                    self.pdf.set_fill_color(*fill)
+                    self.pdf.rect(x, y, w, h, 'F')
+                if border:
+                    self.pdf.set_draw_color(*border)
+                    self.pdf.rect(x, y, w, h)
+            elif kind == "line":
+                _, x1, y1, x2, y2, color = op
+                self.pdf.set_draw_color(*color)
+                self.pdf.line(x1, y1, x2, y2)
+            elif kind == "text":
+                _, x, y, w, h, text, size, bold, align = op
+                self.text(x, y, w, h, text, size, bold, align)
+
+    def _paste(self, content):
+        """Copia en la página actual la parte estática ya compilada"""
+        # fpdf2 no ofrece otra forma de añadir contenido ya generado ni de declarar sus fuentes
+        self.pdf._out(content)
+        for font in self.pdf.fonts.values():
+            self.pdf._resource_catalog.add(PDFResourceType.FONT, font.i, self.pdf.page)
+
+    # ---------- Documento ----------
+
+    def add_player(self, player_data):
+        """Añade las páginas de un jugador: plantilla y campos"""
+        for page, (ops, placed) in enumerate(self.layout):
+            self.pdf.add_page(orientation='P')
+            if self.template is not None:
+                self._paste(self.template[0][page])
+            else:
+                self._replay(ops)
+            for section, y in placed:
+                section.fill(self, player_data, y)
+
+    def add_comparison(self, players):
+        """Añade una página apaisada con los jugadores en columnas alineadas"""
+        self.pdf.add_page(orientation='L')
+        self.text(0, 10, self.pdf.w, 10, "Comparativa de jugadores", size=14, bold=True, align='C')
+
+        filas = [
+            ("Club", 'club_actual'), ("Liga", 'liga'), ("Edad", 'edad'),
+            ("Posición", 'posicion_principal'), ("Fin contrato", 'fin_contrato'),
+            ("Veredicto", 'veredicto'), ("AUDAX", 'audax'),
+            *[(titulo.capitalize(), campo) for titulo, campo in SCORE_FIELDS],
+            *EVALUATION_FIELDS
         ]
-        
-        for icon, text in positions:
-            self.set_xy(x, y)
-            self.cell(10, 8, self.safe_text(icon), 0, 0)
-            self.multi_cell(0, 8, self.safe_text(text), 0, 'L')
-            y += 10
-    
-    def generate_pdf(self, player_data, output_path):
-        """Genera el PDF completo"""
-        self.add_page()
-        
-        # Añadir secciones
-        self.add_header_section(player_data)
-        self.add_personal_info(player_data)
-        self.add_club_info(player_data)
-        self.add_positions(player_data)
-        
-        # Guardar el PDF
-        self.output(output_path)
-
-# Función de conveniencia para generar el PDF
-def generate_player_pdf(player_data, output_path):
-    """Función de conveniencia para generar el PDF del jugador"""
+        ancho_etiqueta = 32
+        ancho_columna = (self.pdf.w - 2 * MARGIN - ancho_etiqueta) / max(1, len(players))
+        tamano = 8 if len(players) <= 6 else 6
+
+        y = 24
+        self.pdf.set_fill_color(200, 230, 200)
+        self.pdf.set_draw_color(0, 0, 0)
+        self.pdf.set_xy(MARGIN, y)
+        self.set_font(tamano)
+        self.pdf.cell(ancho_etiqueta, 8, "", border=1, fill=True)
+        for player in players:
+            self.pdf.cell(ancho_columna, 8, self.safe_text(_value(player, 'jugador', ''))[:40], border=1, align='C', fill=True)
+        y += 8
+        for etiqueta, campo in filas:
+            self.pdf.set_xy(MARGIN, y)
+            self.pdf.cell(ancho_etiqueta, 7, self.safe_text(etiqueta), border=1)
+            for player in players:
+                valor = player.get(campo, '')
+                valor = f"{valor:.1f}" if isinstance(valor, float) else _value(player, campo, '')
+                self.pdf.cell(ancho_columna, 7, self.safe_text(valor)[:40], border=1, align='C')
+            y += 7
+
+    def output(self, output_path):
+        self.pdf.output(output_path)
+        return output_path
+
+# ====================================
+# FUNCIONES DE CONVENIENCIA
+# ====================================
+
+def generate_player_pdf(player_data, output_path, sections=FULL_SECTIONS):
+    """Genera el PDF de un jugador; devuelve (éxito, mensaje de error)"""
+    try:
+        renderer = ReportRenderer(sections)
+        renderer.add_player(player_data)
+        renderer.output(output_path)
+        return True, ""
+    except Exception as e:
+        return False, str(e)
+
+def generate_players_pdf(players, output_path, sections=SUMMARY_SECTIONS, comparison=True):
+    """Genera en un solo documento la comparativa y el resumen de cada jugador"""
     try:
-        pdf = PDFGenerator()
-        pdf.generate_pdf(player_data, output_path)
+        renderer = ReportRenderer(sections)
+        if comparison:
+            renderer.add_comparison(players)
+        for player_data in players:
+            renderer.add_player(player_data)
+        renderer.output(output_path)
         return True, ""
     except Exception as e:
         return False, str(e)
@@ -0,0 +1,254 @@
+"""
+Cachés LRU en memoria con un presupuesto de bytes común.
+
+Se usan para lo que la aplicación ya generó y puede volver a generar: el HTML
+de la ficha de un informe, las fotos codificadas en base64 y los PDF impresos.
+Las claves incluyen el ``report_id`` y la ``version`` del informe (o la ruta y
+la fecha de modificación de la foto), así que una edición genera una clave
+nueva y la entrada antigua termina desalojada por LRU. Las instancias se
+comparten entre sesiones (``st.cache_resource``), de modo que si varias
+personas abren el mismo jugador el trabajo se hace una sola vez.
+
+Cada caché tiene su cuota en bytes (y opcionalmente en entradas) y todas las
+de un ``CacheManager`` comparten un presupuesto global: cuando se supera se
+desaloja la entrada usada hace más tiempo entre todas las cachés. La memoria
+que no se puede desalojar (la copia local de la tabla de jugadores) se
+registra con ``reserve`` y se descuenta del presupuesto, para que el total del
+proceso se mantenga predecible en una máquina pequeña.
+
+El presupuesto se fija con la variable de entorno ``SCOUTING_CACHE_MB``.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# ====================================
+# CONSTANTES
+# ====================================
+BUDGET_ENV_VAR = "SCOUTING_CACHE_MB"
+DEFAULT_BUDGET_MB = 256
+# La memoria reservada se vuelve a medir como mucho cada tantos segundos
+RESERVED_REFRESH_SECONDS = 5.0
+
+# ====================================
+# TAMAÑO DE LOS VALORES
+# ====================================
+
+def estimate_size(value):
+    """Bytes aproximados que ocupa un valor (recorre contenedores y tablas)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def budget_from_env(default_mb=DEFAULT_BUDGET_MB):
+    """Presupuesto global en bytes según ``SCOUTING_CACHE_MB``"""
+    try:
+        return int(float(os.environ.get(BUDGET_ENV_VAR, default_mb)) * 1024 * 1024)
+    except ValueError:
+        print(f"{BUDGET_ENV_VAR} no es un número; se usan {default_mb} MB")
+        return default_mb * 1024 * 1024
+
+# ====================================
+# CACHÉ LRU
+# ====================================
+
+class LRUCache:
+    """Diccionario acotado (en entradas y en bytes) con desalojo del elemento usado hace más tiempo"""
+
+    def __init__(self, max_entries=256, max_bytes=None, sizeof=estimate_size, name=None, manager=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.manager = manager
+        # clave -> (valor, bytes, último acceso)
+        self._data = OrderedDict()
+        self._lock = manager._lock if manager is not None else threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _tick(self):
+        return self.manager._next_tick() if self.manager is not None else 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                value, size, _ = self._data[key]
+                self._data[key] = (value, size, self._tick())
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None or self.manager is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Más grande que toda la cuota: guardarlo vaciaría la caché
+                self.rejected += 1
+                return False
+            self._data[key] = (value, size, self._tick())
+            self.bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                self.evict_oldest()
+            if self.manager is not None:
+                self.manager._enforce()
+            return key in self._data
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        return entry
+
+    def evict_oldest(self):
+        """Desaloja la entrada usada hace más tiempo (con el bloqueo tomado)"""
+        _, (_, size, _) = self._data.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+
+    def oldest_tick(self):
+        """Último acceso de la entrada más antigua, o None si está vacía"""
+        if not self._data:
+            return None
+        return next(iter(self._data.values()))[2]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._remove(key)
+            return entry[0] if entry is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+            }
+
+# ====================================
+# PRESUPUESTO GLOBAL
+# ====================================
+
+class CacheManager:
+    """Cachés con cuota propia y un presupuesto de bytes común a todas"""
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes if budget_bytes is not None else budget_from_env()
+        self._lock = threading.RLock()
+        self._caches = {}
+        self._reserved = {}
+        self._reserved_sizes = {}
+        self._reserved_at = None
+        self._tick_counter = 0
+        self.budget_evictions = 0
+
+    def _next_tick(self):
+        self._tick_counter += 1
+        return self._tick_counter
+
+    def cache(self, name, max_bytes=None, max_entries=10_000):
+        """Caché ``name`` (se crea la primera vez con esa cuota)"""
+        with self._lock:
+            if name not in self._caches:
+                self._caches[name] = LRUCache(max_entries=max_entries, max_bytes=max_bytes, name=name, manager=self)
+            return self._caches[name]
+
+    def reserve(self, name, size_func):
+        """Registra memoria que no se puede desalojar; ``size_func()`` devuelve sus bytes"""
+        with self._lock:
+            self._reserved[name] = size_func
+            self._reserved_at = None
+
+    def reserved_bytes(self, refresh=False):
+        with self._lock:
+            now = time.monotonic()
+            if refresh or self._reserved_at is None or now - self._reserved_at > RESERVED_REFRESH_SECONDS:
+                for name, size_func in self._reserved.items():
+                    try:
+                        self._reserved_sizes[name] = int(size_func() or 0)
+                    except Exception as e:
+                        print(f"No se pudo medir la memoria reservada de {name}: {e}")
+                self._reserved_at = now
+            return sum(self._reserved_sizes.values())
+
+    def used_bytes(self):
+        with self._lock:
+            return sum(cache.bytes for cache in self._caches.values())
+
+    def _enforce(self):
+        """Desaloja entre todas las cachés lo usado hace más tiempo hasta entrar en el presupuesto"""
+        with self._lock:
+            available = max(0, self.budget_bytes - self.reserved_bytes())
+            while self.used_bytes() > available:
+                candidates = [(cache.oldest_tick(), name) for name, cache in self._caches.items() if len(cache)]
+                if not candidates:
+                    break
+                _, name = min(candidates)
+                self._caches[name].evict_oldest()
+                self.budget_evictions += 1
+
+    def stats(self):
+        """Uso del presupuesto y aciertos, fallos y desalojos de cada caché"""
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "reserved_bytes": self.reserved_bytes(refresh=True),
+                "reserved": dict(self._reserved_sizes),
+                "used_bytes": self.used_bytes(),
+                "budget_evictions": self.budget_evictions,
+                "caches": {name: cache.stats() for name, cache in self._caches.items()},
+            }
+
+    def stats_frame(self):
+        """Estadísticas por caché como tabla (MB y porcentajes) para mostrar"""
+        stats = self.stats()
+        rows = []
+        for name, cache in stats["caches"].items():
+            rows.append({
+                "caché": name,
+                "entradas": cache["entries"],
+                "MB": round(cache["bytes"] / 2**20, 2),
+                "cuota MB": round(cache["max_bytes"] / 2**20, 1) if cache["max_bytes"] else None,
+                "aciertos": cache["hits"],
+                "fallos": cache["misses"],
+                "% aciertos": round(100 * cache["hit_ratio"], 1) if cache["hit_ratio"] is not None else None,
+                "desalojos": cache["evictions"],
+                "rechazados": cache["rejected"],
+            })
+        for name, size in stats["reserved"].items():
+            rows.append({"caché": f"{name} (reservada)", "MB": round(size / 2**20, 2)})
+        frame = pd.DataFrame(rows)
+        return frame.set_index("caché") if not frame.empty else frame
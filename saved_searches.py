@@ -0,0 +1,273 @@
+"""
+Búsquedas guardadas de la página de base de datos.
+
+Las combinaciones de filtros que se repiten a diario (liga, posición, veredicto
+FIRMAR...) se guardan con un nombre en ``scouting_saved_searches.json``. El
+archivo solo contiene la definición de cada búsqueda, de modo que la comparten
+todas las sesiones y procesos.
+
+El resultado de cada búsqueda (el conjunto de report_id que la cumplen) se
+calcula con la cadena de filtros la primera vez que se abre y después se
+mantiene con el registro de cambios (``scouting_events``). Un evento solo toca
+las búsquedas a las que puede afectar: las que cumplía el informe antes o
+después del cambio. En esas se quita o se añade el report_id sin volver a
+recorrer la tabla. Las búsquedas con filtro de percentil dependen de todo el
+grupo (posición o liga) del informe, así que se descartan y se recalculan al
+abrirlas si el cambio cae en uno de los grupos de sus candidatos.
+
+Aplicar un evento a un resultado que ya lo incluye no cambia nada: el resultado
+se calcula siempre después de fijar el cursor y los eventos se pueden volver a
+aplicar sin riesgo. Las búsquedas se guardan sin caducidad: solo cambian al
+editarlas o al llegar un cambio que les afecta.
+"""
+
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+from scouting_events import catch_up, rebuild_consistent, start_cursor
+from scouting_schema import STATUS_DELETED, is_active, report_status
+
+# ====================================
+# CONSTANTES
+# ====================================
+SAVED_SEARCHES_FILE = "scouting_saved_searches.json"
+SAVED_SEARCHES_VERSION = 1
+MAX_NAME_LENGTH = 60
+
+# Filtros de la página de base de datos y su valor cuando no se aplican
+DEFAULT_SPEC = {
+    "liga": "Todas",
+    "equipo": "Todos",
+    "posicion": "Todas",
+    "nacionalidad": "Todas",
+    "veredicto": "Todos",
+    "nombre": "",
+    "incluir_archivados": False,
+    "percentil_campo": None,
+    "percentil_grupo": "posicion_principal",
+    "percentil_minimo": 0,
+}
+
+
+def normalize_spec(spec):
+    """Definición completa de una búsqueda, solo con los filtros conocidos"""
+    normalized = {field: spec.get(field, default) for field, default in DEFAULT_SPEC.items()}
+    normalized["incluir_archivados"] = bool(normalized["incluir_archivados"])
+    normalized["percentil_minimo"] = int(normalized["percentil_minimo"] or 0)
+    normalized["nombre"] = normalized["nombre"] or ""
+    return normalized
+
+def uses_percentiles(spec):
+    return bool(spec["percentil_campo"]) and spec["percentil_minimo"] > 0
+
+def _text(value):
+    """Valor de un campo de un informe como texto, o None si falta"""
+    if value is None or value is pd.NA or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return str(value)
+
+def cohort_keys(values):
+    """Grupos (posición o liga) de una columna, con el mismo criterio que ``record_matches``"""
+    return {_text(value) for value in values}
+
+def record_matches(spec, record):
+    """True si un informe (diccionario) cumple los filtros de la búsqueda sin el percentil
+
+    Reproduce ``filter_players`` de la aplicación para un único informe.
+    """
+    if spec["incluir_archivados"]:
+        if report_status(record) == STATUS_DELETED:
+            return False
+    elif not is_active(record):
+        return False
+
+    for field, column in (("liga", "liga"), ("equipo", "club_actual"),
+                          ("nacionalidad", "nacionalidad"), ("veredicto", "veredicto")):
+        if spec[field] != DEFAULT_SPEC[field] and _text(record.get(column)) != spec[field]:
+            return False
+
+    posicion = spec["posicion"]
+    if posicion != DEFAULT_SPEC["posicion"] and posicion not in (
+        _text(record.get("posicion_principal")), _text(record.get("posicion_secundaria"))
+    ):
+        return False
+
+    if spec["nombre"]:
+        jugador = _text(record.get("jugador"))
+        if jugador is None or not re.search(spec["nombre"], jugador, re.IGNORECASE):
+            return False
+    return True
+
+# ====================================
+# BÚSQUEDAS GUARDADAS
+# ====================================
+
+class SavedSearches:
+    """Definiciones de las búsquedas guardadas y sus resultados en caché"""
+
+    def __init__(self, path=SAVED_SEARCHES_FILE):
+        self.path = path
+        self._specs = {}
+        self._specs_stat = None
+        # nombre -> {"spec", "ids", "cohorts"}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.source_size = None
+        self.cursor = start_cursor()
+
+    # ---------- Definiciones ----------
+
+    def _load_specs(self):
+        """Relee el archivo solo si cambió (puede escribirlo otro proceso)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._specs, self._specs_stat = {}, None
+            return self._specs
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._specs_stat:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                specs = data["searches"] if data.get("version") == SAVED_SEARCHES_VERSION else {}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"No se pudieron leer las búsquedas guardadas: {e}")
+                specs = {}
+            self._specs = {name: normalize_spec(spec) for name, spec in specs.items()}
+            self._specs_stat = key
+        return self._specs
+
+    def _write_specs(self, specs):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SAVED_SEARCHES_VERSION, "searches": specs}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._specs_stat = None
+
+    def names(self):
+        with self._lock:
+            return sorted(self._load_specs())
+
+    def spec(self, name):
+        """Definición de una búsqueda, o None si no existe"""
+        with self._lock:
+            return self._load_specs().get(name)
+
+    def save(self, name, spec):
+        """Guarda (o sustituye) una búsqueda con nombre"""
+        name = (name or "").strip()
+        if not name:
+            raise ValueError("la búsqueda necesita un nombre")
+        if len(name) > MAX_NAME_LENGTH:
+            raise ValueError(f"el nombre no puede superar {MAX_NAME_LENGTH} caracteres")
+        spec = normalize_spec(spec)
+        if spec["nombre"]:
+            try:
+                re.compile(spec["nombre"])
+            except re.error as e:
+                raise ValueError(f"la búsqueda por nombre no es válida ({e})") from e
+        with self._lock:
+            specs = dict(self._load_specs())
+            specs[name] = spec
+            self._write_specs(specs)
+            self._results.pop(name, None)
+        return name
+
+    def delete(self, name):
+        with self._lock:
+            specs = dict(self._load_specs())
+            if specs.pop(name, None) is not None:
+                self._write_specs(specs)
+            self._results.pop(name, None)
+
+    # ---------- Resultados ----------
+
+    def _affects(self, entry, records):
+        """Cómo afecta un cambio a un resultado: None (nada), "update" o "drop" """
+        spec = entry["spec"]
+        if any(record_matches(spec, record) for record in records):
+            return "drop" if uses_percentiles(spec) else "update"
+        if uses_percentiles(spec):
+            grupo = spec["percentil_grupo"]
+            if any(_text(record.get(grupo)) in entry["cohorts"] for record in records):
+                return "drop"
+        return None
+
+    def apply_event(self, event):
+        """Aplica un evento del registro de cambios; devuelve False si hay que reconstruir"""
+        op = event["op"]
+        if op == "reset":
+            return False
+        if op in ("insert", "update"):
+            record, previous = event["record"], event.get("previous")
+            if op == "update" and previous is None:
+                return False
+            records = [record] if previous is None else [record, previous]
+            with self._lock:
+                for name, entry in list(self._results.items()):
+                    effect = self._affects(entry, records)
+                    if effect == "drop":
+                        del self._results[name]
+                    elif effect == "update":
+                        ids = set(entry["ids"])
+                        ids.discard(str(event["report_id"]))
+                        if record_matches(entry["spec"], record):
+                            ids.add(str(event["report_id"]))
+                        entry["ids"] = frozenset(ids)
+        self.source_size = event.get("csv_size", self.source_size)
+        return True
+
+    def refresh(self, events, database_file):
+        """Pone los resultados en caché al día con el registro de cambios
+
+        Si falta algún evento o el CSV cambió por otra vía se descartan todos;
+        cada búsqueda se recalcula al abrirla.
+        """
+        size = os.path.getsize(database_file) if os.path.exists(database_file) else 0
+        with self._refresh_lock:
+            if self.source_size is not None:
+                cursor, applied = catch_up(events, self.cursor, self.apply_event)
+                if applied is not None and self.source_size == size:
+                    self.cursor = cursor
+                    return self
+
+            _, cursor, source_size = rebuild_consistent(events, database_file, lambda: None)
+            with self._lock:
+                self._results = {}
+            self.cursor = cursor
+            self.source_size = source_size
+        return self
+
+    def ids(self, name, evaluate):
+        """report_id que cumplen una búsqueda guardada
+
+        Llamar después de ``refresh``. ``evaluate(spec)`` aplica la cadena de
+        filtros a la tabla y devuelve ``(report_ids, grupos de los candidatos)``;
+        solo se usa si el resultado no está en caché. Devuelve None si la
+        búsqueda no existe.
+        """
+        spec = self.spec(name)
+        if spec is None:
+            return None
+        with self._lock:
+            entry = self._results.get(name)
+            if entry is not None and entry["spec"] == spec:
+                return entry["ids"]
+        # Si otro hilo aplica eventos mientras se evalúa, el resultado no se guarda
+        seq = self.cursor["seq"]
+        ids, cohorts = evaluate(spec)
+        entry = {"spec": spec, "ids": frozenset(str(i) for i in ids), "cohorts": frozenset(cohorts)}
+        with self._lock:
+            if self.cursor["seq"] == seq:
+                self._results[name] = entry
+        return entry["ids"]
+
+    def cached(self):
+        """Nombres de las búsquedas con el resultado en caché"""
+        with self._lock:
+            return sorted(self._results)
@@ -0,0 +1,291 @@
+"""
+Agregados materializados para la página de analítica.
+
+Mantiene en ``scouting_aggregates.json`` los conteos y distribuciones de
+puntuaciones por liga, posición, veredicto y nacionalidad, y los informes por
+ojeador y mes de los informes activos. Son un consumidor del registro de
+cambios (``scouting_events``): guardan el cursor del último evento aplicado y,
+al leerse, aplican solo los eventos posteriores (la versión anterior de un
+informe editado, archivado o eliminado se descuenta), de modo que la página de
+analítica no recorre el CSV completo en cada interacción.
+
+Los mismos histogramas por grupo sirven para los percentiles de cada informe
+dentro de su posición o su liga: como las puntuaciones van de 1 a 6, el rango
+de una puntuación en su grupo se obtiene sumando seis contadores, sin ordenar
+ni volver a clasificar la tabla. Si el archivo no
+existe, falta algún evento o el CSV no tiene el tamaño esperado (se modificó
+por otra vía), se reconstruye una vez desde la base de datos.
+
+Cada proceso guarda además los agregados en memoria junto con su cursor: si el
+registro no tiene eventos nuevos la lectura no toca el JSON, y si los tiene se
+aplican a partir de la copia en memoria. El archivo solo se lee al arrancar.
+"""
+
+import copy
+import json
+import os
+import threading
+
+import pandas as pd
+
+from scouting_events import catch_up, rebuild_consistent, start_cursor
+from scouting_schema import is_active
+
+# ====================================
+# CONSTANTES
+# ====================================
+AGGREGATES_FILE = "scouting_aggregates.json"
+AGGREGATES_VERSION = 2
+
+# Dimensiones por las que se agrupa
+DIMENSIONS = ["liga", "posicion_principal", "veredicto", "nacionalidad"]
+
+# Puntuaciones de 1 a 6 cuya distribución se guarda
+SCORE_FIELDS = [
+    "rendimiento", "potencial", "adaptabilidad", "evaluacion_tecnica",
+    "evaluacion_tactica", "evaluacion_fisica", "evaluacion_mental"
+]
+
+SIN_DATO = "Sin especificar"
+_lock = threading.Lock()
+# (archivo, registro de eventos) -> agregados al día con su cursor, para no releer el JSON
+_memory = {}
+
+# ====================================
+# CONSTRUCCIÓN Y ACTUALIZACIÓN
+# ====================================
+
+def empty_aggregates():
+    """Estructura de agregados vacía"""
+    return {
+        "version": AGGREGATES_VERSION,
+        "source_size": 0,
+        "events": start_cursor(),
+        "total": 0,
+        "counts": {dim: {} for dim in DIMENSIONS},
+        "scores": {dim: {} for dim in DIMENSIONS},
+        "por_ojeador_mes": {},
+    }
+
+def _key(value):
+    """Normaliza un valor de dimensión para usarlo como clave JSON"""
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NA:
+        return SIN_DATO
+    value = str(value).strip()
+    return value or SIN_DATO
+
+def _score(value):
+    """Devuelve la puntuación como entero 1-6, o None si no es válida"""
+    try:
+        score = int(round(float(value)))
+    except (TypeError, ValueError):
+        return None
+    return score if 1 <= score <= 6 else None
+
+def add_report(aggregates, record):
+    """Suma un informe a los agregados (O(dimensiones × puntuaciones))"""
+    aggregates["total"] += 1
+    for dim in DIMENSIONS:
+        value = _key(record.get(dim))
+        counts = aggregates["counts"][dim]
+        counts[value] = counts.get(value, 0) + 1
+
+        distributions = aggregates["scores"][dim].setdefault(value, {})
+        for field in SCORE_FIELDS:
+            score = _score(record.get(field))
+            if score is None:
+                continue
+            histogram = distributions.setdefault(field, [0] * 6)
+            histogram[score - 1] += 1
+
+    ojeador = _key(record.get("ojeador"))
+    mes = str(record.get("fecha_creacion") or "")[:7] or SIN_DATO
+    meses = aggregates["por_ojeador_mes"].setdefault(ojeador, {})
+    meses[mes] = meses.get(mes, 0) + 1
+    return aggregates
+
+def _decrement(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) - amount
+    if counts[key] <= 0:
+        del counts[key]
+
+def remove_report(aggregates, record):
+    """Descuenta un informe de los agregados (inverso de add_report)"""
+    aggregates["total"] = max(0, aggregates["total"] - 1)
+    for dim in DIMENSIONS:
+        value = _key(record.get(dim))
+        _decrement(aggregates["counts"][dim], value)
+
+        distributions = aggregates["scores"][dim].get(value)
+        if distributions is None:
+            continue
+        for field in SCORE_FIELDS:
+            score = _score(record.get(field))
+            histogram = distributions.get(field)
+            if score is None or histogram is None:
+                continue
+            histogram[score - 1] = max(0, histogram[score - 1] - 1)
+            if not any(histogram):
+                del distributions[field]
+        if value not in aggregates["counts"][dim]:
+            del aggregates["scores"][dim][value]
+
+    ojeador = _key(record.get("ojeador"))
+    mes = str(record.get("fecha_creacion") or "")[:7] or SIN_DATO
+    meses = aggregates["por_ojeador_mes"].get(ojeador)
+    if meses is not None:
+        _decrement(meses, mes)
+        if not meses:
+            del aggregates["por_ojeador_mes"][ojeador]
+    return aggregates
+
+def build_aggregates(df, source_size=0):
+    """Reconstruye todos los agregados a partir de la tabla de informes"""
+    aggregates = empty_aggregates()
+    for record in df.to_dict("records"):
+        add_report(aggregates, record)
+    aggregates["source_size"] = source_size
+    return aggregates
+
+# ====================================
+# PERSISTENCIA
+# ====================================
+
+def _write(aggregates, path):
+    """Escribe los agregados de forma atómica"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(aggregates, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            aggregates = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if aggregates.get("version") != AGGREGATES_VERSION:
+        return None
+    return aggregates
+
+def apply_event(aggregates, event):
+    """Aplica un evento del registro de cambios; devuelve False si hay que reconstruir"""
+    op = event["op"]
+    if op == "reset":
+        return False
+    if op == "update":
+        previous = event.get("previous")
+        if previous is None:
+            return False
+        if is_active(previous):
+            remove_report(aggregates, previous)
+    if op in ("insert", "update") and is_active(event["record"]):
+        add_report(aggregates, event["record"])
+    aggregates["source_size"] = event.get("csv_size", aggregates["source_size"])
+    return True
+
+def load_aggregates(database_file, load_df, events, path=AGGREGATES_FILE):
+    """Carga los agregados al día con el registro de cambios ``events``
+
+    ``load_df`` es una función que devuelve la tabla de informes activos; solo
+    se llama cuando hace falta reconstruir. El resultado es compartido: no
+    debe modificarse.
+    """
+    size = os.path.getsize(database_file) if os.path.exists(database_file) else 0
+    key = (os.path.abspath(path), os.path.abspath(events.events_file))
+    with _lock:
+        cached = _memory.get(key)
+        if cached is not None and cached["events"]["seq"] == events.last_seq() and cached["source_size"] == size:
+            return cached
+
+        # Los eventos se aplican sobre una copia: otras sesiones pueden estar leyendo la compartida
+        aggregates = copy.deepcopy(cached) if cached is not None else _read(path)
+        if aggregates is not None:
+            cursor, applied = catch_up(events, aggregates["events"], lambda event: apply_event(aggregates, event))
+            if applied is not None and aggregates["source_size"] == size:
+                if applied:
+                    aggregates["events"] = cursor
+                    _write(aggregates, path)
+                _memory[key] = aggregates
+                return aggregates
+
+        def build():
+            return build_aggregates(load_df()) if size else empty_aggregates()
+
+        aggregates, cursor, source_size = rebuild_consistent(events, database_file, build)
+        aggregates["source_size"] = source_size
+        aggregates["events"] = cursor
+        _write(aggregates, path)
+        _memory[key] = aggregates
+    return aggregates
+
+# ====================================
+# CONSULTAS
+# ====================================
+
+def counts_frame(aggregates, dimension):
+    """Conteo de informes por valor de una dimensión, de mayor a menor"""
+    counts = aggregates["counts"].get(dimension, {})
+    df = pd.DataFrame({"informes": pd.Series(counts, dtype="int64")})
+    return df.sort_values("informes", ascending=False)
+
+def score_distribution_frame(aggregates, dimension, field):
+    """Distribución de una puntuación (columnas 1-6) por valor de una dimensión"""
+    rows = {
+        value: distributions.get(field, [0] * 6)
+        for value, distributions in aggregates["scores"].get(dimension, {}).items()
+    }
+    df = pd.DataFrame.from_dict(rows, orient="index", columns=[str(i) for i in range(1, 7)])
+    if df.empty:
+        return df
+    totals = df.sum(axis=1)
+    df["media"] = (df[[str(i) for i in range(1, 7)]] * range(1, 7)).sum(axis=1) / totals.where(totals > 0)
+    return df.sort_index()
+
+def percentile_lookup(aggregates, dimension, field):
+    """Percentil (0-100) de cada puntuación en cada grupo de ``dimension``
+
+    Devuelve ``{(grupo, puntuación): percentil}``. Se usa el rango medio: los
+    informes con menor puntuación más la mitad de los empatados.
+    """
+    lookup = {}
+    for value, distributions in aggregates["scores"].get(dimension, {}).items():
+        histogram = distributions.get(field)
+        total = sum(histogram) if histogram else 0
+        if not total:
+            continue
+        below = 0
+        for score, count in enumerate(histogram, start=1):
+            lookup[(value, score)] = 100 * (below + count / 2) / total
+            below += count
+    return lookup
+
+def record_percentiles(aggregates, record, dimension):
+    """Percentil de cada puntuación de un informe dentro de su grupo (None si no hay datos)"""
+    value = _key(record.get(dimension))
+    percentiles = {}
+    for field in SCORE_FIELDS:
+        histogram = aggregates["scores"].get(dimension, {}).get(value, {}).get(field)
+        score = _score(record.get(field))
+        total = sum(histogram) if histogram else 0
+        if score is None or not total:
+            percentiles[field] = None
+            continue
+        below = sum(histogram[:score - 1])
+        percentiles[field] = 100 * (below + histogram[score - 1] / 2) / total
+    return percentiles
+
+def percentiles_series(aggregates, df, dimension, field):
+    """Percentil de ``field`` de cada informe de ``df`` en su grupo (NaN si no hay datos)"""
+    lookup = pd.Series(percentile_lookup(aggregates, dimension, field), dtype="float64")
+    if lookup.empty or df.empty:
+        return pd.Series(float("nan"), index=df.index, dtype="float64")
+    groups = df[dimension].astype(object).map(_key)
+    scores = pd.to_numeric(df[field], errors="coerce").round()
+    keys = pd.MultiIndex.from_arrays([groups, scores.where(scores.between(1, 6))])
+    return pd.Series(lookup.reindex(keys).to_numpy(), index=df.index, dtype="float64")
+
+def scout_month_frame(aggregates):
+    """Informes por ojeador (filas) y mes (columnas)"""
+    df = pd.DataFrame(aggregates["por_ojeador_mes"]).T.fillna(0).astype("int64")
+    return df.reindex(sorted(df.columns), axis=1) if not df.empty else df
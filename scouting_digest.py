@@ -0,0 +1,324 @@
+"""
+Resumen periódico de los informes nuevos (PDF o XLSX).
+
+Cada resumen contiene los informes activos creados desde el anterior, agrupados
+por veredicto y posición, en un único archivo:
+
+* PDF: una portada con el índice por veredicto y posición y después la página
+  de resumen de cada jugador (``SUMMARY_SECTIONS`` de ``pdf_generator_enhanced``)
+  en el mismo orden, todo en un documento.
+* XLSX: una hoja con los informes en ese orden y otra con los conteos.
+
+La marca de agua guarda la última ``fecha_creacion`` incluida y la posición del
+CSV hasta la que se leyó. Entre compactaciones el CSV solo crece por el final,
+así que el resumen siguiente lee y parsea solo los bytes añadidos desde
+entonces: el coste depende de los informes nuevos, no del tamaño de la base de
+datos. Si el CSV se reescribió (compactación, restauración) se recorre una vez
+completo filtrando por la fecha de la marca.
+
+Las fotos, que son lo más caro de cada página, se decodifican y reducen en
+paralelo antes de componer el documento.
+
+Estructura:
+    scouting_digests/state.json           marca de agua y resúmenes generados
+    scouting_digests/resumen_<id>.pdf     resúmenes
+
+Uso desde la línea de comandos (p. ej. desde cron cada lunes a las 7:00):
+    python scouting_digest.py generate [--formato pdf|xlsx] [--desde FECHA] [--salida ruta] [--no-avanzar]
+    python scouting_digest.py status
+
+    0 7 * * 1  cd /ruta/app && python scouting_digest.py generate
+"""
+
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import scouting_store
+from image_processing import InvalidImageError, normalize_image
+from pdf_generator_enhanced import MARGIN, PAGE_HEIGHT, SUMMARY_SECTIONS, ReportRenderer, audax_score
+from scouting_schema import active_reports, latest_versions, read_players_csv, to_record
+from scouting_snapshots import boundary_hash
+
+# ====================================
+# CONSTANTES
+# ====================================
+DIGESTS_DIR = "scouting_digests"
+DATABASE_FILE = "scouting_database.csv"
+
+# Sin resumen anterior ni --desde: informes de los últimos días
+DEFAULT_WINDOW_DAYS = 7
+DIGEST_WORKERS = 4
+# Las fotos de la página de resumen ocupan unos pocos centímetros
+DIGEST_PHOTO_SIDE = 400
+
+GROUP_COLUMNS = ["veredicto", "posicion_principal"]
+SIN_DATO = "Sin especificar"
+XLSX_COLUMNS = [
+    "fecha_creacion", "jugador", "veredicto", "posicion_principal", "club_actual", "liga",
+    "nacionalidad", "edad", "fin_contrato", "audax", "rendimiento", "potencial", "adaptabilidad",
+    "evaluacion_tecnica", "evaluacion_tactica", "evaluacion_fisica", "evaluacion_mental",
+    "ojeador", "descripcion_general", "report_id"
+]
+
+# ====================================
+# MARCA DE AGUA
+# ====================================
+
+class DigestState:
+    """Marca de agua (fecha y posición del CSV) y lista de resúmenes generados"""
+
+    def __init__(self, digests_dir=DIGESTS_DIR):
+        self.digests_dir = digests_dir
+        self.state_file = os.path.join(digests_dir, "state.json")
+
+    def load(self):
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"watermark": None, "digests": []}
+
+    def save(self, state):
+        os.makedirs(self.digests_dir, exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+
+def _is_append_of(watermark, database_file, stat):
+    """True si el CSV actual es el de la marca de agua con filas añadidas"""
+    return (
+        watermark is not None
+        and watermark.get("csv_inode") == stat.st_ino
+        and stat.st_size >= watermark["csv_offset"]
+        and boundary_hash(database_file, watermark["csv_offset"]) == watermark["boundary_hash"]
+    )
+
+def read_new_reports(database_file, watermark, since, store=None):
+    """Informes activos creados desde ``since`` y la marca de agua nueva
+
+    Con una marca de agua válida solo se parsea lo añadido al CSV desde ella.
+    Devuelve ``(tabla, marca nueva, filas parseadas)``.
+    """
+    store = store or scouting_store.get_store()
+    store.apply_pending()
+    # Con el bloqueo del escritor no se lee ninguna fila a medio escribir
+    with store.writer_lock():
+        stat = os.stat(database_file)
+        with open(database_file, "rb") as f:
+            header = f.readline()
+            if _is_append_of(watermark, database_file, stat):
+                start, first_row = watermark["csv_offset"], watermark["rows"]
+            else:
+                start, first_row = 0, 0
+            f.seek(max(start, len(header)))
+            data = f.read(stat.st_size - f.tell())
+        boundary = boundary_hash(database_file, stat.st_size)
+
+    rows = pd.DataFrame()
+    if data.strip():
+        rows = read_players_csv(io.BytesIO(header + data), include_long_text=True,
+                                start_position=first_row, latest=False)
+    # Informes ya incluidos con la misma fecha (al segundo) que la marca
+    seen = set(watermark.get("report_ids", [])) if watermark else set()
+    new_watermark = {
+        "csv_inode": stat.st_ino,
+        "csv_offset": stat.st_size,
+        "rows": first_row + len(rows),
+        "boundary_hash": boundary,
+        "fecha_creacion": since,
+        "report_ids": sorted(seen),
+    }
+    if rows.empty:
+        return rows, new_watermark, 0
+
+    # Las ediciones de informes antiguos también están al final: cuenta la fecha de creación
+    df = active_reports(latest_versions(rows))
+    fechas = df["fecha_creacion"].fillna("").astype("str")
+    df = df[(fechas >= since) & ~df.index.isin(list(seen))]
+    if not df.empty:
+        fechas = df["fecha_creacion"].astype("str")
+        last = fechas.max()
+        if last > since:
+            seen = set()
+        new_watermark["fecha_creacion"] = last
+        new_watermark["report_ids"] = sorted(seen | set(df.index[fechas == last]))
+    return df, new_watermark, len(rows)
+
+def group_reports(df):
+    """Informes ordenados por veredicto, posición y jugador, con la puntuación AUDAX"""
+    df = df.copy()
+    for column in GROUP_COLUMNS:
+        if column not in df.columns:
+            df[column] = SIN_DATO
+        df[column] = df[column].astype("str").fillna(SIN_DATO)
+    df["audax"] = [round(audax_score(to_record(row)), 1) for _, row in df.iterrows()]
+    return df.sort_values(GROUP_COLUMNS + ["jugador"], kind="stable")
+
+# ====================================
+# ARTEFACTOS
+# ====================================
+
+def prepare_photos(records, workers=DIGEST_WORKERS):
+    """Reduce en paralelo las fotos de los informes; devuelve ``{ruta: bytes}``"""
+    paths = sorted({r.get("imagen_path") for r in records
+                    if isinstance(r.get("imagen_path"), str) and os.path.exists(r["imagen_path"])})
+
+    def prepare(path):
+        try:
+            with open(path, "rb") as f:
+                return path, normalize_image(f.read(), max_side=DIGEST_PHOTO_SIDE)[0]
+        except (OSError, InvalidImageError) as e:
+            print(f"No se pudo preparar la foto {path}: {e}")
+            return path, None
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="digest-photos") as executor:
+        return {path: data for path, data in executor.map(prepare, paths) if data is not None}
+
+def _add_index(renderer, df, title, period):
+    """Portada con el índice de informes por veredicto y posición"""
+    pdf = renderer.pdf
+    pdf.add_page(orientation='P')
+    renderer.text(0, 15, pdf.w, 10, title, size=16, bold=True, align='C')
+    renderer.text(0, 25, pdf.w, 8, f"{period} · {len(df)} informes", size=10, align='C')
+    y = 40
+    for veredicto, grupo in df.groupby("veredicto", sort=False):
+        if y > PAGE_HEIGHT - MARGIN - 20:
+            pdf.add_page(orientation='P')
+            y = MARGIN
+        pdf.set_fill_color(200, 230, 200)
+        pdf.rect(MARGIN, y, pdf.w - 2 * MARGIN, 8, 'F')
+        renderer.text(MARGIN + 2, y, pdf.w - 2 * MARGIN, 8, f"{veredicto} ({len(grupo)})", size=11, bold=True)
+        y += 10
+        for posicion, jugadores in grupo.groupby("posicion_principal", sort=False):
+            renderer.text(MARGIN + 4, y, 100, 6, f"{posicion} ({len(jugadores)})", size=9, bold=True)
+            y += 6
+            for _, jugador in jugadores.iterrows():
+                if y > PAGE_HEIGHT - MARGIN:
+                    pdf.add_page(orientation='P')
+                    y = MARGIN
+                renderer.text(MARGIN + 8, y, 80, 5, str(jugador["jugador"])[:45], size=8)
+                renderer.text(MARGIN + 90, y, 60, 5, str(jugador.get("club_actual") or "")[:35], size=8)
+                renderer.text(MARGIN + 150, y, 30, 5, f"AUDAX {jugador['audax']:.1f}", size=8, align='R')
+                y += 5
+            y += 2
+        y += 4
+
+def write_pdf(df, output_path, title, period, sections=SUMMARY_SECTIONS):
+    """Índice y páginas de resumen de todos los informes en un solo PDF"""
+    records = [dict(to_record(row), report_id=report_id) for report_id, row in df.iterrows()]
+    renderer = ReportRenderer(sections)
+    renderer.photos = prepare_photos(records)
+    _add_index(renderer, df, title, period)
+    for record in records:
+        renderer.add_player(record)
+    renderer.output(output_path)
+    return output_path
+
+def write_xlsx(df, output_path, title, period):
+    """Hoja de informes agrupados y hoja de conteos por veredicto y posición"""
+    informes = df.assign(report_id=df.index)[[c for c in XLSX_COLUMNS if c in df.columns or c == "report_id"]]
+    conteos = df.groupby(GROUP_COLUMNS, sort=False).size().rename("informes").reset_index()
+    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+        pd.DataFrame({title: [period, f"{len(df)} informes"]}).to_excel(writer, sheet_name="Resumen", index=False)
+        conteos.to_excel(writer, sheet_name="Resumen", index=False, startrow=4)
+        informes.to_excel(writer, sheet_name="Informes", index=False)
+    return output_path
+
+# ====================================
+# GENERACIÓN
+# ====================================
+
+def generate_digest(fmt="pdf", since=None, output=None, advance=True, database_file=DATABASE_FILE,
+                    digests_dir=DIGESTS_DIR, store=None):
+    """Genera el resumen de los informes creados desde la marca de agua
+
+    ``since`` (``AAAA-MM-DD``) sustituye a la fecha de la marca. Con
+    ``advance=False`` la marca no se mueve (p. ej. para repetir un resumen).
+    Devuelve la entrada del resumen; ``file`` es None si no había informes nuevos.
+    """
+    digest_state = DigestState(digests_dir)
+    state = digest_state.load()
+    watermark = state.get("watermark")
+    if since:
+        # Otra fecha de corte: la posición guardada no sirve, se recorre el CSV
+        watermark = None
+    elif watermark:
+        since = watermark["fecha_creacion"]
+    else:
+        since = (datetime.now() - timedelta(days=DEFAULT_WINDOW_DAYS)).strftime("%Y-%m-%d")
+
+    now = datetime.now()
+    df, new_watermark, parsed_rows = read_new_reports(database_file, watermark, since, store)
+    entry = {
+        "id": now.strftime("%Y%m%dT%H%M%S"),
+        "created_at": now.isoformat(timespec="seconds"),
+        "since": since,
+        "reports": len(df),
+        "parsed_rows": parsed_rows,
+        "incremental": watermark is not None and parsed_rows < new_watermark["rows"],
+        "file": None,
+    }
+    if not df.empty:
+        df = group_reports(df)
+        title = "Resumen de informes de scouting"
+        period = f"Informes creados desde {since} hasta {now:%Y-%m-%d %H:%M}"
+        os.makedirs(digests_dir, exist_ok=True)
+        output = output or os.path.join(digests_dir, f"resumen_{entry['id']}.{fmt}")
+        if fmt == "xlsx":
+            write_xlsx(df, output, title, period)
+        else:
+            write_pdf(df, output, title, period)
+        entry["file"] = output
+
+    if advance:
+        state["watermark"] = new_watermark
+        state["digests"] = state.get("digests", []) + [entry]
+        digest_state.save(state)
+    return entry
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumen periódico de los informes nuevos")
+    sub = parser.add_subparsers(dest="command", required=True)
+    generate = sub.add_parser("generate", help="Generar el resumen de los informes creados desde el anterior")
+    generate.add_argument("--formato", choices=["pdf", "xlsx"], default="pdf")
+    generate.add_argument("--desde", help="Incluir los informes creados desde esta fecha (AAAA-MM-DD)")
+    generate.add_argument("--salida", help="Ruta del archivo generado")
+    generate.add_argument("--no-avanzar", action="store_true", help="No mover la marca de agua")
+    sub.add_parser("status", help="Mostrar la marca de agua y los últimos resúmenes")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        state = DigestState().load()
+        watermark = state.get("watermark")
+        if watermark:
+            print(f"Marca de agua: {watermark['fecha_creacion']} (byte {watermark['csv_offset']}, {watermark['rows']} filas)")
+        for entry in state.get("digests", [])[-10:]:
+            print(f"{entry['id']}  {entry['reports']:>5} informes  {entry['file'] or '(sin informes nuevos)'}")
+        return
+
+    store = scouting_store.get_store()
+    try:
+        entry = generate_digest(args.formato, since=args.desde, output=args.salida,
+                                advance=not args.no_avanzar, store=store)
+    finally:
+        store.close()
+    modo = "incremental" if entry["incremental"] else "completo"
+    if entry["file"]:
+        print(f"Resumen {entry['file']}: {entry['reports']} informes ({entry['parsed_rows']} filas leídas, {modo})")
+    else:
+        print(f"No hay informes nuevos desde {entry['since']} ({entry['parsed_rows']} filas leídas, {modo})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Registro de cambios (change feed) de los informes.
+
+Cada vez que el escritor del almacén incorpora un cambio al CSV añade un evento
+a ``scouting_events/events.jsonl`` con un número de secuencia creciente:
+
+    {"seq": 41, "ts": "...", "op": "insert", "report_id": "...", "version": 1,
+     "record": {...}, "previous": null, "csv_size_before": 1200, "csv_size": 1460}
+
+Operaciones:
+    insert    informe nuevo
+    update    nueva versión de un informe (edición, archivo, restauración o
+              eliminación); ``previous`` trae la versión anterior si se conoce
+    compact   el CSV se reescribió sin filas muertas; los informes vigentes
+              no cambian
+    reset     el CSV se sustituyó por otra vía (restauración de una copia,
+              migración): los consumidores deben reconstruirse
+
+Los índices derivados no vuelven a recorrer el CSV para enterarse de los
+cambios: guardan un cursor (secuencia y posición en el archivo) y aplican solo
+los eventos posteriores. Un consumidor con nombre guarda su punto de control en
+``scouting_events/consumers/<nombre>.json``.
+
+Solo el escritor (con su bloqueo tomado) añade eventos, así que las secuencias
+no se repiten aunque haya varios procesos.
+
+Uso desde la línea de comandos:
+    python scouting_events.py tail [--after SEQ]
+    python scouting_events.py consumers
+    python scouting_events.py prune
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+# ====================================
+# CONSTANTES
+# ====================================
+EVENTS_DIR = "scouting_events"
+
+# Al podar se conservan siempre los últimos eventos
+PRUNE_KEEP_LAST = 1000
+
+
+class EventGapError(Exception):
+    """Faltan eventos entre el cursor y el registro (p. ej. tras podarlo)"""
+
+
+def start_cursor():
+    """Cursor anterior al primer evento"""
+    return {"seq": 0, "inode": None, "offset": 0}
+
+
+class EventLog:
+    """Registro de eventos en modo append con cursores para leerlo por partes"""
+
+    def __init__(self, events_dir=EVENTS_DIR):
+        self.events_dir = events_dir
+        self.events_file = os.path.join(events_dir, "events.jsonl")
+        self.consumers_dir = os.path.join(events_dir, "consumers")
+        os.makedirs(self.consumers_dir, exist_ok=True)
+        # (inodo, tamaño) -> última secuencia, para no releer el final en cada evento
+        self._tail_cache = (None, None, 0)
+
+    # ---------- Escritura (solo el escritor del almacén) ----------
+
+    def append(self, event):
+        """Añade un evento con la secuencia siguiente y la devuelve"""
+        seq = self.last_seq() + 1
+        event = {"seq": seq, "ts": datetime.now().isoformat(timespec="seconds"), **event}
+        line = (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        fd = os.open(self.events_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+        self._tail_cache = (stat.st_ino, stat.st_size, seq)
+        return seq
+
+    def last_event(self):
+        """Último evento completo del registro, o None"""
+        try:
+            stat = os.stat(self.events_file)
+        except OSError:
+            return None
+        return self._last_complete(stat.st_size)[0]
+
+    def last_seq(self):
+        try:
+            stat = os.stat(self.events_file)
+        except OSError:
+            return 0
+        inode, size, seq = self._tail_cache
+        if inode == stat.st_ino and size == stat.st_size:
+            return seq
+        event = self._last_complete(stat.st_size)[0]
+        seq = event["seq"] if event else 0
+        self._tail_cache = (stat.st_ino, stat.st_size, seq)
+        return seq
+
+    def _last_complete(self, size):
+        """Último evento completo antes de ``size`` y la posición donde termina
+
+        Lee hacia atrás por bloques; devuelve ``(None, 0)`` si no hay ninguno.
+        """
+        block = 64 * 1024
+        with open(self.events_file, "rb") as f:
+            start = size
+            while start > 0:
+                start = max(0, start - block)
+                block *= 2
+                f.seek(start)
+                data = f.read(size - start)
+                end = data.rfind(b"\n")
+                if end < 0:
+                    continue
+                begin = data.rfind(b"\n", 0, end) + 1
+                if begin > 0 or start == 0:
+                    return json.loads(data[begin:end]), start + end + 1
+        return None, 0
+
+    # ---------- Lectura ----------
+
+    def cursor(self):
+        """Cursor que apunta al final actual del registro"""
+        try:
+            stat = os.stat(self.events_file)
+        except OSError:
+            return start_cursor()
+        event, offset = self._last_complete(stat.st_size)
+        if event is None:
+            return start_cursor()
+        return {"seq": event["seq"], "inode": stat.st_ino, "offset": offset}
+
+    def read(self, cursor, limit=None):
+        """Eventos posteriores a ``cursor`` y el cursor para continuar
+
+        Si el registro ya no contiene el evento siguiente al cursor (se podó)
+        se lanza ``EventGapError``: el consumidor debe reconstruirse.
+        """
+        after_seq = cursor.get("seq", 0)
+        try:
+            stat = os.stat(self.events_file)
+        except OSError:
+            if after_seq:
+                raise EventGapError(f"El registro de eventos no existe (cursor en {after_seq})")
+            return [], dict(cursor)
+
+        # La posición guardada solo vale para el mismo archivo
+        offset = cursor.get("offset", 0) if cursor.get("inode") == stat.st_ino else 0
+        if offset > stat.st_size:
+            offset = 0
+
+        events = []
+        expected = after_seq + 1
+        with open(self.events_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # evento en curso de escritura
+                offset += len(line)
+                event = json.loads(line)
+                if event["seq"] < expected:
+                    continue
+                if event["seq"] > expected:
+                    raise EventGapError(f"Faltan los eventos {expected}-{event['seq'] - 1}")
+                events.append(event)
+                expected += 1
+                if limit is not None and len(events) >= limit:
+                    break
+
+        if not events and after_seq > self.last_seq():
+            raise EventGapError(f"El registro terminó antes del cursor ({after_seq})")
+        return events, {"seq": expected - 1, "inode": stat.st_ino, "offset": offset}
+
+    def events_after(self, seq):
+        """Eventos que quedan en el registro con secuencia mayor que ``seq``
+
+        A diferencia de ``read`` no exige que la secuencia sea continua: sirve
+        para saber qué se publicó, no para aplicar los cambios.
+        """
+        events = []
+        if not os.path.exists(self.events_file):
+            return events
+        with open(self.events_file, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # evento en curso de escritura
+                event = json.loads(line)
+                if event["seq"] > seq:
+                    events.append(event)
+        return events
+
+    # ---------- Poda ----------
+
+    def consumer_positions(self):
+        """Secuencia confirmada por cada consumidor con nombre"""
+        positions = {}
+        for name in os.listdir(self.consumers_dir):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.consumers_dir, name), encoding="utf-8") as f:
+                        positions[name[:-5]] = json.load(f).get("seq", 0)
+                except (OSError, ValueError):
+                    continue
+        return positions
+
+    def prune(self, keep_last=PRUNE_KEEP_LAST):
+        """Descarta los eventos que todos los consumidores con nombre ya aplicaron
+
+        Debe llamarse con el bloqueo del escritor tomado. Los consumidores sin
+        nombre (cursores guardados en otro sitio) se reconstruyen si se quedan
+        atrás. Devuelve cuántos eventos se descartaron.
+        """
+        if not os.path.exists(self.events_file):
+            return 0
+        last_seq = self.last_seq()
+        limit = min([last_seq - keep_last, *self.consumer_positions().values()])
+        if limit <= 0:
+            return 0
+
+        tmp_path = f"{self.events_file}.tmp"
+        removed = 0
+        with open(self.events_file, "rb") as src, open(tmp_path, "wb") as dst:
+            for line in src:
+                if line.endswith(b"\n") and json.loads(line)["seq"] <= limit:
+                    removed += 1
+                    continue
+                dst.write(line)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.events_file)
+        return removed
+
+
+class EventConsumer:
+    """Consumidor con nombre y punto de control persistente"""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.checkpoint_file = os.path.join(log.consumers_dir, f"{name}.json")
+
+    def position(self):
+        try:
+            with open(self.checkpoint_file, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return start_cursor()
+
+    def commit(self, cursor):
+        """Confirma que los eventos hasta ``cursor`` están aplicados"""
+        tmp_path = f"{self.checkpoint_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cursor, f)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def poll(self, limit=None):
+        """Eventos pendientes y el cursor que habría que confirmar tras aplicarlos"""
+        return self.log.read(self.position(), limit=limit)
+
+    def process(self, handler, limit=None):
+        """Aplica ``handler(event)`` a los eventos pendientes y confirma; devuelve cuántos"""
+        events, cursor = self.poll(limit=limit)
+        for event in events:
+            handler(event)
+        if events:
+            self.commit(cursor)
+        return len(events)
+
+
+def catch_up(log, cursor, apply):
+    """Aplica a un consumidor los eventos posteriores a ``cursor``
+
+    ``apply(event)`` devuelve False si el evento obliga a reconstruir el
+    consumidor. Devuelve ``(cursor nuevo, aplicados)``; ``aplicados`` es None si
+    hay que reconstruir.
+    """
+    try:
+        events, new_cursor = log.read(cursor)
+    except EventGapError:
+        return cursor, None
+    for event in events:
+        if not apply(event):
+            return cursor, None
+    return new_cursor, len(events)
+
+
+def rebuild_consistent(log, database_file, build, attempts=3):
+    """Construye un consumidor desde cero de forma coherente con el registro
+
+    ``build()`` recorre el CSV. Si entretanto llega un evento se repite, para
+    no aplicarlo dos veces. Devuelve ``(estado, cursor, tamaño del CSV)``.
+    """
+    for _ in range(attempts):
+        cursor = log.cursor()
+        size = os.path.getsize(database_file) if os.path.exists(database_file) else 0
+        state = build()
+        current_size = os.path.getsize(database_file) if os.path.exists(database_file) else 0
+        if log.last_seq() == cursor["seq"] and current_size == size:
+            break
+    return state, cursor, size
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registro de cambios de los informes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tail = sub.add_parser("tail", help="Mostrar los eventos posteriores a una secuencia")
+    tail.add_argument("--after", type=int, default=0)
+    sub.add_parser("consumers", help="Listar los consumidores y su posición")
+    sub.add_parser("prune", help="Descartar los eventos ya aplicados por todos los consumidores")
+    args = parser.parse_args(argv)
+
+    log = EventLog()
+    if args.command == "tail":
+        events, _ = log.read({"seq": args.after})
+        for event in events:
+            print(f"{event['seq']:>8}  {event['ts']}  {event['op']:<8}  {event.get('report_id', '')}  v{event.get('version', '')}")
+    elif args.command == "consumers":
+        last_seq = log.last_seq()
+        for name, seq in sorted(log.consumer_positions().items()):
+            print(f"{name}: {seq} ({last_seq - seq} pendientes)")
+    elif args.command == "prune":
+        import scouting_store
+
+        with scouting_store.get_store().writer_lock():
+            removed = log.prune()
+        print(f"Descartados {removed} eventos")
+
+if __name__ == "__main__":
+    main()
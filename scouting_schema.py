@@ -0,0 +1,219 @@
+"""
+Esquema tipado de la tabla de jugadores.
+
+Define las columnas de ``scouting_database.csv`` y los tipos con los que se
+cargan en memoria: categóricas para los campos enumerados o de baja
+cardinalidad, enteros pequeños (``Int8``/``Int16``, que admiten vacíos) para
+puntuaciones, años y talla, y texto para el resto. El texto libre largo se
+lee por separado y solo cuando se abre un informe.
+
+Cada informe se identifica por ``report_id``. Los informes anteriores a esa
+columna reciben un identificador determinista (fecha, jugador y posición en el
+archivo) que se persiste la próxima vez que se reescribe el CSV.
+
+Archivar o eliminar un informe escribe una versión nueva con ``estado``
+"archivado" o "eliminado" (lápida); las consultas habituales trabajan solo con
+los informes activos.
+"""
+
+import hashlib
+import uuid
+
+import pandas as pd
+
+# ====================================
+# COLUMNAS
+# ====================================
+COLUMNS = [
+    "fecha_creacion", "jugador", "edad", "talla", "fecha_nacimiento",
+    "nacionalidad", "pie", "club_actual", "fin_contrato",
+    "agente", "telefono_agente", "posicion_principal", "posicion_secundaria",
+    "descripcion_general", "rendimiento", "potencial", "adaptabilidad",
+    "evaluacion_tecnica", "evaluacion_tactica", "evaluacion_fisica",
+    "evaluacion_mental", "observaciones_tecnica", "observaciones_tactica",
+    "observaciones_fisica", "observaciones_mental", "referencias",
+    "historial_lesiones", "estado_lesiones", "veredicto", "imagen_path", "liga",
+    "ojeador", "report_id", "version", "estado"
+]
+
+# Campos enumerados o con pocos valores distintos: se comparan por código
+CATEGORY_COLUMNS = [
+    "liga", "club_actual", "nacionalidad", "pie", "posicion_principal",
+    "posicion_secundaria", "estado_lesiones", "veredicto", "ojeador", "estado"
+]
+
+# Puntuaciones 1-6 y edad
+INT8_COLUMNS = [
+    "edad", "rendimiento", "potencial", "adaptabilidad", "evaluacion_tecnica",
+    "evaluacion_tactica", "evaluacion_fisica", "evaluacion_mental"
+]
+
+# Años y talla en cm
+INT16_COLUMNS = ["talla", "fecha_nacimiento", "fin_contrato"]
+
+# Versión del informe (aumenta con cada edición); vacía equivale a 1
+VERSION_COLUMN = "version"
+
+# Estado del informe; vacío equivale a activo
+STATUS_COLUMN = "estado"
+STATUS_ACTIVE = "activo"
+STATUS_ARCHIVED = "archivado"
+STATUS_DELETED = "eliminado"
+
+# Texto libre largo: no se categoriza porque casi todos los valores son únicos
+LONG_TEXT_COLUMNS = [
+    "descripcion_general", "observaciones_tecnica", "observaciones_tactica",
+    "observaciones_fisica", "observaciones_mental", "referencias", "historial_lesiones"
+]
+
+# Columnas que deben leerse como texto aunque parezcan numéricas
+TEXT_COLUMNS = ["telefono_agente", "report_id"]
+
+# ====================================
+# IDENTIFICADORES
+# ====================================
+
+def new_report_id():
+    """Identificador para un informe nuevo"""
+    return uuid.uuid4().hex
+
+def legacy_report_id(fecha_creacion, jugador, position):
+    """Identificador determinista para informes guardados sin report_id"""
+    key = f"{fecha_creacion}|{jugador}|{position}".encode("utf-8")
+    return "legacy-" + hashlib.sha1(key).hexdigest()[:16]
+
+def ensure_report_ids(df, start_position=0):
+    """Completa report_id en las filas que no lo tienen (modifica df)
+
+    ``start_position`` es la posición en el archivo de la primera fila de ``df``.
+    """
+    if "report_id" not in df.columns:
+        df["report_id"] = None
+    ids = df["report_id"].astype("object")
+    missing = ids.isna()
+    if missing.any():
+        positions = missing.to_numpy().nonzero()[0]
+        fechas = df["fecha_creacion"].to_numpy()
+        jugadores = df["jugador"].to_numpy()
+        ids[missing] = [legacy_report_id(fechas[p], jugadores[p], start_position + p) for p in positions]
+    df["report_id"] = ids.astype("str")
+    return df
+
+def index_by_report_id(df):
+    """Indexa la tabla por report_id para búsquedas directas por informe"""
+    df.index = pd.Index(df["report_id"].to_numpy(), name=None)
+    return df
+
+def latest_versions(df):
+    """Deja solo la última versión de cada informe
+
+    Las ediciones se añaden al final del CSV como una fila nueva con el mismo
+    report_id, así que la última aparición es la vigente. ``df`` debe estar
+    indexado por report_id.
+    """
+    return df[~df.index.duplicated(keep="last")]
+
+def report_status(record):
+    """Estado de un informe (diccionario); vacío equivale a activo"""
+    status = record.get(STATUS_COLUMN)
+    if status is None or status is pd.NA or (isinstance(status, float) and pd.isna(status)) or not str(status).strip():
+        return STATUS_ACTIVE
+    return str(status)
+
+def is_active(record):
+    return report_status(record) == STATUS_ACTIVE
+
+def active_reports(df):
+    """Solo los informes activos (sin archivados ni eliminados)"""
+    if STATUS_COLUMN not in df.columns:
+        return df
+    status = df[STATUS_COLUMN]
+    return df[status.isna() | (status == STATUS_ACTIVE)]
+
+def stored_reports(df):
+    """Informes activos y archivados (sin las lápidas de los eliminados)"""
+    if STATUS_COLUMN not in df.columns:
+        return df
+    return df[df[STATUS_COLUMN] != STATUS_DELETED]
+
+# ====================================
+# CONVERSIÓN DE TIPOS
+# ====================================
+
+def read_dtypes():
+    """Tipos que se pueden pasar directamente a pd.read_csv"""
+    dtypes = {column: "category" for column in CATEGORY_COLUMNS}
+    dtypes.update({column: "str" for column in TEXT_COLUMNS})
+    return dtypes
+
+def apply_schema(df):
+    """Convierte un DataFrame de informes a los tipos compactos del esquema"""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    for column in INT8_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").round().astype("Int8")
+    for column in INT16_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").round().astype("Int16")
+    if VERSION_COLUMN in df.columns:
+        df[VERSION_COLUMN] = pd.to_numeric(df[VERSION_COLUMN], errors="coerce").fillna(1).astype("int32")
+    else:
+        df[VERSION_COLUMN] = pd.Series(1, index=df.index, dtype="int32")
+    return df
+
+def intern_text(df, max_unique_ratio=0.5):
+    """Guarda como categóricas las columnas de texto con muchos valores repetidos"""
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if len(values) and values.nunique(dropna=True) / len(values) <= max_unique_ratio:
+            df[column] = values.astype("category")
+    return df
+
+def _read_header(source):
+    """Columnas de un CSV (ruta o buffer, que queda en su posición inicial)"""
+    columns = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return columns
+
+def read_players_csv(source, include_long_text=False, start_position=0, latest=True):
+    """Lee el CSV de informes aplicando el esquema tipado
+
+    Por defecto omite el texto libre largo, que ocupa la mayor parte de la memoria
+    y solo se necesita al abrir un informe; se carga aparte con read_long_text_csv.
+    Con ``latest=False`` se conservan todas las versiones de cada informe.
+    """
+    header = _read_header(source)
+    usecols = [c for c in header if include_long_text or c not in LONG_TEXT_COLUMNS]
+    # Las categóricas se construyen durante el parseo para no materializar cadenas repetidas
+    dtypes = {c: t for c, t in read_dtypes().items() if c in usecols}
+    df = pd.read_csv(source, usecols=usecols, dtype=dtypes)
+    df = index_by_report_id(ensure_report_ids(apply_schema(df), start_position))
+    return latest_versions(df) if latest else df
+
+def read_long_text_csv(source, start_position=0, latest=True):
+    """Lee solo las columnas de texto largo, con el mismo índice que read_players_csv"""
+    header = _read_header(source)
+    text_columns = [c for c in LONG_TEXT_COLUMNS if c in header]
+    id_columns = [c for c in ["fecha_creacion", "jugador", "report_id"] if c in header]
+    df = pd.read_csv(source, usecols=text_columns + id_columns,
+                     dtype={c: "str" for c in text_columns + id_columns})
+    df = index_by_report_id(ensure_report_ids(df, start_position))
+    if latest:
+        df = latest_versions(df)
+    return intern_text(df[text_columns])
+
+def to_record(row):
+    """Convierte una fila tipada en un diccionario con valores Python simples"""
+    record = {}
+    for key, value in row.items():
+        if value is pd.NA:
+            value = None
+        elif hasattr(value, "item"):
+            value = value.item()
+        record[key] = value
+    return record
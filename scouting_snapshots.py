@@ -0,0 +1,282 @@
+"""
+Copias de seguridad incrementales y restauración a un momento dado.
+
+Entre compactaciones el CSV de informes solo crece por el final, así que cada
+copia guarda únicamente los bytes añadidos desde la anterior y las fotos nuevas
+que esas filas referencian. Una copia nocturna tarda lo que ocupan los cambios
+del día, no la base de datos completa. Si el CSV se reescribió (compactación,
+ampliación del esquema o restauración), la copia siguiente es completa.
+
+Estructura:
+    scouting_snapshots/manifest.json          lista ordenada de copias
+    scouting_snapshots/<id>.csv               CSV completo o bytes añadidos
+    scouting_snapshots/images/<imagen_path>   fotos, copiadas una sola vez
+
+Las fotos están direccionadas por contenido (``image_store``): una ruta nunca
+cambia de contenido, de modo que basta con copiar las que aún no están.
+
+Uso desde la línea de comandos:
+    python scouting_snapshots.py create
+    python scouting_snapshots.py list
+    python scouting_snapshots.py restore <id o fecha ISO> [--output ruta]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+import scouting_store
+
+# ====================================
+# CONSTANTES
+# ====================================
+SNAPSHOTS_DIR = "scouting_snapshots"
+DATABASE_FILE = "scouting_database.csv"
+
+# Bytes previos al corte que se comparan para comprobar que el CSV solo creció
+BOUNDARY_BYTES = 64 * 1024
+
+# ====================================
+# UTILIDADES
+# ====================================
+
+def boundary_hash(path, size):
+    """Hash de la cabecera y de los últimos bytes antes de ``size``"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.readline())
+        f.seek(max(0, size - BOUNDARY_BYTES))
+        digest.update(f.read(size - f.tell()))
+    return digest.hexdigest()
+
+def _copy_range(path, start, end, destination):
+    """Copia los bytes [start, end) de un archivo"""
+    with open(path, "rb") as src, open(destination, "wb") as dst:
+        src.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = src.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            dst.write(chunk)
+            remaining -= len(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+def _image_paths(header, data):
+    """Rutas de imagen referenciadas por un bloque de filas del CSV"""
+    if not data.strip() or b"imagen_path" not in header:
+        return []
+    df = pd.read_csv(io.BytesIO(header + data), usecols=["imagen_path"], dtype=str)
+    return df["imagen_path"].dropna().unique().tolist()
+
+# ====================================
+# COPIAS
+# ====================================
+
+class SnapshotManager:
+    """Copias incrementales del CSV de informes y de sus fotos"""
+
+    def __init__(self, database_file=DATABASE_FILE, snapshots_dir=SNAPSHOTS_DIR, store=None):
+        self.database_file = database_file
+        self.snapshots_dir = snapshots_dir
+        self.images_dir = os.path.join(snapshots_dir, "images")
+        self.manifest_file = os.path.join(snapshots_dir, "manifest.json")
+        self.store = store or scouting_store.get_store()
+
+    def list(self):
+        """Copias registradas, de la más antigua a la más reciente"""
+        try:
+            with open(self.manifest_file, encoding="utf-8") as f:
+                return json.load(f)["snapshots"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _write_manifest(self, snapshots):
+        tmp_path = f"{self.manifest_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"snapshots": snapshots}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_file)
+
+    def _new_id(self, now, snapshots):
+        base = now.strftime("%Y%m%dT%H%M%S")
+        ids = {s["id"] for s in snapshots}
+        snapshot_id, n = base, 1
+        while snapshot_id in ids:
+            n += 1
+            snapshot_id = f"{base}-{n}"
+        return snapshot_id
+
+    def _is_append_of(self, last, stat):
+        """True si el CSV actual es el de la copia ``last`` con filas añadidas"""
+        return (
+            last is not None
+            and last["inode"] == stat.st_ino
+            and stat.st_size >= last["csv_size"]
+            and boundary_hash(self.database_file, last["csv_size"]) == last["boundary_hash"]
+        )
+
+    def _save_images(self, image_paths):
+        """Copia las fotos que aún no están en las copias; devuelve cuántas copió"""
+        copied = 0
+        for image_path in image_paths:
+            source = os.path.normpath(image_path)
+            destination = os.path.join(self.images_dir, source)
+            if os.path.exists(destination) or not os.path.exists(source):
+                continue
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copy2(source, f"{destination}.tmp")
+            os.replace(f"{destination}.tmp", destination)
+            copied += 1
+        return copied
+
+    def create(self):
+        """Crea una copia con los cambios desde la anterior y devuelve su entrada"""
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        snapshots = self.list()
+        last = snapshots[-1] if snapshots else None
+        now = datetime.now()
+        snapshot_id = self._new_id(now, snapshots)
+        csv_file = f"{snapshot_id}.csv"
+
+        # Con el bloqueo del escritor el CSV no cambia mientras se copia
+        self.store.apply_pending()
+        with self.store.writer_lock():
+            stat = os.stat(self.database_file)
+            with open(self.database_file, "rb") as f:
+                header = f.readline()
+
+            incremental = self._is_append_of(last, stat)
+            start = last["csv_size"] if incremental else 0
+            _copy_range(self.database_file, start, stat.st_size, os.path.join(self.snapshots_dir, csv_file))
+            boundary = boundary_hash(self.database_file, stat.st_size)
+
+        with open(os.path.join(self.snapshots_dir, csv_file), "rb") as f:
+            data = f.read()
+        if not incremental:
+            data = data[len(header):]
+        images = self._save_images(_image_paths(header, data))
+
+        entry = {
+            "id": snapshot_id,
+            "created_at": now.isoformat(timespec="seconds"),
+            "kind": "incremental" if incremental else "full",
+            "csv_file": csv_file,
+            "csv_offset": start,
+            "csv_size": stat.st_size,
+            "inode": stat.st_ino,
+            "boundary_hash": boundary,
+            "new_images": images,
+        }
+        snapshots.append(entry)
+        self._write_manifest(snapshots)
+        return entry
+
+    # ---------- Restauración ----------
+
+    def find(self, target):
+        """Copia por id, o la última creada hasta una fecha ISO"""
+        snapshots = self.list()
+        for position, snapshot in enumerate(snapshots):
+            if snapshot["id"] == target:
+                return position, snapshots
+        moment = datetime.fromisoformat(target).isoformat(timespec="seconds")
+        candidates = [p for p, s in enumerate(snapshots) if s["created_at"] <= moment]
+        if not candidates:
+            raise ValueError(f"No hay copias anteriores a {target}")
+        return candidates[-1], snapshots
+
+    def _chain(self, position, snapshots):
+        """Copia completa más cercana y las incrementales hasta ``position``"""
+        first = position
+        while snapshots[first]["kind"] != "full":
+            first -= 1
+            if first < 0:
+                raise ValueError("La cadena de copias no tiene una copia completa de partida")
+        return snapshots[first:position + 1]
+
+    def restore(self, target, output=None):
+        """Reconstruye el CSV tal como estaba en una copia
+
+        Sin ``output`` sustituye la base de datos (con el bloqueo del escritor) y
+        recupera las fotos que falten; con ``output`` solo escribe el CSV ahí,
+        para revisarlo antes. Devuelve la entrada de la copia restaurada.
+        """
+        position, snapshots = self.find(target)
+        chain = self._chain(position, snapshots)
+        destination = output or self.database_file
+        tmp_path = f"{destination}.restore.tmp"
+
+        size = 0
+        with open(tmp_path, "wb") as dst:
+            for snapshot in chain:
+                if snapshot["csv_offset"] != size:
+                    raise ValueError(f"La copia {snapshot['id']} no continúa a la anterior")
+                with open(os.path.join(self.snapshots_dir, snapshot["csv_file"]), "rb") as src:
+                    shutil.copyfileobj(src, dst)
+                size = snapshot["csv_size"]
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        if output:
+            os.replace(tmp_path, output)
+            return chain[-1]
+
+        self.store.apply_pending()
+        with self.store.writer_lock():
+            os.replace(tmp_path, self.database_file)
+            # Los índices derivados se reconstruyen desde el CSV restaurado
+            self.store.events.append({"op": "reset", "reason": f"restore {chain[-1]['id']}", "csv_size": size})
+        self._restore_images()
+        return chain[-1]
+
+    def _restore_images(self):
+        """Devuelve a su sitio las fotos referenciadas que falten"""
+        df = pd.read_csv(self.database_file, usecols=lambda c: c == "imagen_path", dtype=str)
+        if "imagen_path" not in df.columns:
+            return 0
+        restored = 0
+        for image_path in df["imagen_path"].dropna().unique():
+            target = os.path.normpath(image_path)
+            source = os.path.join(self.images_dir, target)
+            if os.path.exists(target) or not os.path.exists(source):
+                continue
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            shutil.copy2(source, target)
+            restored += 1
+        return restored
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copias de seguridad de la base de datos de informes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("create", help="Crear una copia con los cambios desde la anterior")
+    sub.add_parser("list", help="Listar las copias")
+    restore = sub.add_parser("restore", help="Restaurar la base de datos a una copia")
+    restore.add_argument("target", help="id de la copia o fecha ISO (se usa la última copia hasta esa fecha)")
+    restore.add_argument("--output", help="Escribir el CSV restaurado en esta ruta en lugar de sustituir la base de datos")
+    args = parser.parse_args(argv)
+
+    manager = SnapshotManager()
+    if args.command == "create":
+        entry = manager.create()
+        added = entry["csv_size"] - entry["csv_offset"]
+        print(f"Copia {entry['id']} ({entry['kind']}): {added} bytes, {entry['new_images']} fotos nuevas")
+    elif args.command == "list":
+        for entry in manager.list():
+            print(f"{entry['id']}  {entry['kind']:<11}  {entry['csv_size']:>12} bytes  {entry['new_images']} fotos")
+    elif args.command == "restore":
+        entry = manager.restore(args.target, output=args.output)
+        print(f"Restaurada la copia {entry['id']} del {entry['created_at']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,805 @@
+"""
+Almacenamiento de informes con diario de escritura diferida.
+
+Guardar un informe no reescribe el CSV en la sesión que lo envía: el informe
+(y su imagen, si la hay) se escriben de forma síncrona en un diario
+(``scouting_journal/``) con una sola escritura en modo append, y un único
+escritor en segundo plano los incorpora después a ``scouting_database.csv`` y
+a los índices derivados. Así el envío del formulario tarda lo mismo sin
+importar el tamaño de la base de datos, y los guardados concurrentes de varios
+ojeadores quedan serializados por el escritor sin bloquear la interfaz.
+
+Estructura del diario:
+    scouting_journal/journal.jsonl   una entrada JSON por línea
+    scouting_journal/applied.json    desplazamiento ya incorporado al CSV y
+                                     último evento publicado entonces
+
+Las imágenes se guardan de forma síncrona en el almacén por contenido
+(``image_store``), así que el diario solo guarda su ruta.
+
+Editar un informe también añade una fila al CSV: la nueva versión lleva el
+mismo ``report_id`` y ``version`` incrementada, y los lectores se quedan con la
+última. ``update`` comprueba bajo un bloqueo exclusivo que la versión que se
+editó sigue siendo la vigente (concurrencia optimista): si otro ojeador guardó
+antes, se lanza ``VersionConflictError`` en lugar de sobrescribir su cambio.
+
+Archivar, restaurar y eliminar son ediciones más: escriben una versión nueva
+con otro ``estado`` (la de un informe eliminado es una lápida sin datos). Las
+filas sustituidas y los informes eliminados quedan muertos en el CSV hasta que
+el escritor lo compacta en segundo plano, reescribiéndolo solo con la última
+versión de cada informe activo o archivado.
+
+Cada cambio incorporado se publica además en el registro de cambios
+(``scouting_events``) con un número de secuencia, para que los índices
+derivados se actualicen aplicando solo los eventos nuevos. Tras cada tanda el
+escritor publica también las tablas compartidas entre procesos
+(``shared_table``).
+
+Varias entradas se pueden registrar como una sola transacción (``submit_batch``,
+p. ej. al importar un paquete de informes sin conexión): van en una única línea
+del diario, sus filas se añaden al CSV en una sola escritura y sus eventos se
+publican después, y el punto de control solo avanza cuando todo está hecho. Si
+el proceso se detiene a medias, al recuperar se omiten las filas que ya están
+en el CSV y los eventos ya publicados desde el último punto de control, de modo
+que cada entrada queda una sola vez en ambos. La garantía es esa: no hay una
+transacción del sistema de archivos que abarque CSV y registro de cambios, así
+que un lector puede ver las filas de un lote antes que sus eventos.
+
+Si el proceso se detiene con entradas pendientes, el escritor las incorpora al
+arrancar de nuevo.
+
+Uso desde la línea de comandos:
+    python scouting_store.py compact
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from image_store import get_image_store
+from incremental_table import IncrementalTable
+from scouting_events import EVENTS_DIR, EventLog
+from scouting_schema import (
+    STATUS_ACTIVE, STATUS_ARCHIVED, STATUS_COLUMN, STATUS_DELETED, VERSION_COLUMN,
+    ensure_report_ids, index_by_report_id, latest_versions, new_report_id
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# ====================================
+# CONSTANTES
+# ====================================
+DATABASE_FILE = "scouting_database.csv"
+JOURNAL_DIR = "scouting_journal"
+
+# Cada cuánto revisa el escritor el diario aunque nadie le avise (otros procesos)
+POLL_INTERVAL = 1.0
+
+# Compactación en segundo plano: se revisa cada COMPACT_CHECK_INTERVAL segundos y
+# se reescribe el CSV cuando las filas muertas superan ambos umbrales
+COMPACT_CHECK_INTERVAL = 300.0
+COMPACT_MIN_DEAD_ROWS = 500
+COMPACT_DEAD_RATIO = 0.25
+
+# Un informe con la foto aún en proceso espera como mucho esto en el diario; si
+# la foto no llega (proceso detenido, foto atascada) se guarda sin ella
+IMAGE_WAIT_SECONDS = 60.0
+
+# ====================================
+# BLOQUEOS ENTRE PROCESOS
+# ====================================
+
+class _FileLock:
+    """Bloqueo flock sobre un archivo; sin efecto donde fcntl no existe"""
+
+    def __init__(self, path, shared=False, blocking=True):
+        self.path = path
+        self.shared = shared
+        self.blocking = blocking
+        self._fd = None
+
+    def acquire(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+        if not self.blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._fd, flags)
+            return True
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            return False
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+# ====================================
+# ERRORES
+# ====================================
+
+class VersionConflictError(Exception):
+    """El informe cambió desde que se abrió para editarlo"""
+
+    def __init__(self, report_id, expected_version, current_version):
+        super().__init__(
+            f"El informe {report_id} fue modificado por otra persona "
+            f"(versión {current_version}, se editó la {expected_version})"
+        )
+        self.report_id = report_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+# ====================================
+# UTILIDADES
+# ====================================
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _csv_value(value):
+    """Convierte un valor del informe a texto CSV (vacíos como celda vacía)"""
+    if value is None or value is pd.NA:
+        return ""
+    if isinstance(value, float) and pd.isna(value):
+        return ""
+    return value
+
+def _entry_key(entry):
+    """(report_id, versión) de una entrada del diario"""
+    record = entry.get("record", {})
+    return record.get("report_id"), _version(record.get("version"))
+
+def _version(value):
+    """Versión como entero; vacía equivale a 1"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 1
+
+def read_versions_csv(source, start_position=0, latest=True):
+    """Lee solo report_id, versión y estado del CSV, indexado por report_id"""
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+    columns = [c for c in ["fecha_creacion", "jugador", "report_id", VERSION_COLUMN, STATUS_COLUMN] if c in header]
+    df = pd.read_csv(source, usecols=columns, dtype=str)
+    df = index_by_report_id(ensure_report_ids(df, start_position))
+    for column in (VERSION_COLUMN, STATUS_COLUMN):
+        if column not in df.columns:
+            df[column] = None
+    df = df[[VERSION_COLUMN, STATUS_COLUMN]]
+    return latest_versions(df) if latest else df
+
+# ====================================
+# ALMACÉN
+# ====================================
+
+class ScoutingStore:
+    """Diario de informes con un escritor en segundo plano"""
+
+    def __init__(self, database_file=DATABASE_FILE, journal_dir=JOURNAL_DIR, events_dir=EVENTS_DIR):
+        self.database_file = database_file
+        self.journal_dir = journal_dir
+        self.journal_file = os.path.join(journal_dir, "journal.jsonl")
+        self.checkpoint_file = os.path.join(journal_dir, "applied.json")
+        self.journal_lock_file = os.path.join(journal_dir, "journal.lock")
+        self.writer_lock_file = os.path.join(journal_dir, "writer.lock")
+        self.update_lock_file = os.path.join(journal_dir, "update.lock")
+        os.makedirs(journal_dir, exist_ok=True)
+        self.events = EventLog(events_dir)
+
+        self._listeners = []
+        self._publishers = []
+        self._wakeup = threading.Event()
+        self._applied = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._recovered = False
+        self._closed = False
+        self._versions = IncrementalTable(read_versions_csv)
+        self._next_compaction_check = time.monotonic() + COMPACT_CHECK_INTERVAL
+
+    # ---------- API de escritura ----------
+
+    def submit(self, record, image_bytes=None, image_ext="", image_future=None):
+        """Registra un informe nuevo en el diario y devuelve su report_id
+
+        Solo hace escrituras secuenciales pequeñas; la incorporación al CSV la
+        realiza el escritor en segundo plano. ``image_future`` es una foto que
+        aún se está procesando (un Future con ``(bytes, extensión)``): no se
+        espera, el escritor incorpora el informe cuando termine.
+        """
+        record = dict(record)
+        record.setdefault("report_id", new_report_id())
+        record.setdefault("version", 1)
+        entry = {"op": "insert", "record": record}
+
+        if image_bytes is not None:
+            record["imagen_path"] = get_image_store().put(image_bytes, image_ext)
+        if image_future is not None:
+            entry.update(image_pending=True, ts=time.time())
+
+        self._append(entry)
+        if image_future is not None:
+            self._attach_image(record, image_future)
+        self.start()
+        self._wakeup.set()
+        return record["report_id"]
+
+    def update(self, record, expected_version, previous=None, image_bytes=None, image_ext="", image_future=None):
+        """Registra una nueva versión de un informe existente y la devuelve
+
+        ``expected_version`` es la versión que se abrió para editar; si ya no es
+        la vigente se lanza ``VersionConflictError``. ``previous`` es el informe
+        en esa versión y permite a los índices derivados descontarlo en lugar de
+        reconstruirse. ``image_future`` funciona como en ``submit``.
+        """
+        record = dict(record)
+        report_id = record["report_id"]
+        expected_version = int(expected_version)
+
+        if image_bytes is not None:
+            record["imagen_path"] = get_image_store().put(image_bytes, image_ext)
+
+        # Bloqueo exclusivo: la comprobación y el registro de la versión son atómicos
+        with _FileLock(self.update_lock_file):
+            current_version = self.current_version(report_id)
+            if current_version != expected_version:
+                raise VersionConflictError(report_id, expected_version, current_version)
+            record["version"] = expected_version + 1
+            entry = {"op": "update", "record": record, "previous": previous}
+            if image_future is not None:
+                entry.update(image_pending=True, ts=time.time())
+            self._append(entry)
+
+        if image_future is not None:
+            self._attach_image(record, image_future)
+        self.start()
+        self._wakeup.set()
+        return record["version"]
+
+    def submit_batch(self, entries):
+        """Registra varias inserciones y ediciones como una sola transacción
+
+        Cada entrada es ``{"op": "insert", "record": ...}`` o ``{"op": "update",
+        "record": ..., "previous": ..., "expected_version": n}``. Las versiones se
+        comprueban todas antes de escribir: si alguna ya no es la esperada (o un
+        informe nuevo ya existe) se lanza ``VersionConflictError`` y no se registra
+        nada. Las imágenes deben estar ya en ``image_store``. Devuelve los
+        ``(report_id, versión)`` registrados.
+        """
+        batch = []
+        with _FileLock(self.update_lock_file):
+            current = self.current_versions([entry["record"]["report_id"] for entry in entries])
+            for entry in entries:
+                record = dict(entry["record"])
+                report_id = record["report_id"]
+                if entry["op"] == "update":
+                    expected_version = int(entry["expected_version"])
+                    if current[report_id] != expected_version:
+                        raise VersionConflictError(report_id, expected_version, current[report_id])
+                    record["version"] = expected_version + 1
+                    batch.append({"op": "update", "record": record, "previous": entry.get("previous")})
+                else:
+                    if current[report_id]:
+                        raise VersionConflictError(report_id, 0, current[report_id])
+                    record.setdefault("version", 1)
+                    batch.append({"op": "insert", "record": record})
+                current[report_id] = _version(record["version"])
+            if batch:
+                self._append({"op": "batch", "entries": batch})
+
+        self.start()
+        self._wakeup.set()
+        return [(entry["record"]["report_id"], entry["record"]["version"]) for entry in batch]
+
+    def archive(self, previous):
+        """Archiva un informe: sigue guardado pero sale de las consultas habituales"""
+        return self.update(dict(previous, **{STATUS_COLUMN: STATUS_ARCHIVED}), previous["version"], previous)
+
+    def restore(self, previous):
+        """Devuelve un informe archivado a los activos"""
+        return self.update(dict(previous, **{STATUS_COLUMN: STATUS_ACTIVE}), previous["version"], previous)
+
+    def delete(self, previous):
+        """Elimina un informe con una lápida; sus filas desaparecen al compactar"""
+        tombstone = {"report_id": previous["report_id"], STATUS_COLUMN: STATUS_DELETED}
+        return self.update(tombstone, previous["version"], previous)
+
+    def current_version(self, report_id):
+        """Última versión registrada de un informe (diario pendiente incluido)
+
+        Devuelve 0 si el informe no existe.
+        """
+        return self.current_versions([report_id])[report_id]
+
+    def current_versions(self, report_ids):
+        """Última versión registrada de varios informes, leyendo el diario una sola vez"""
+        versions = {report_id: 0 for report_id in report_ids}
+        # Primero el diario: si una entrada se incorpora entre ambas lecturas, el CSV ya la tiene
+        for entry, _ in self.pending_entries():
+            report_id = entry.get("record", {}).get("report_id")
+            if report_id in versions:
+                versions[report_id] = max(versions[report_id], _version(entry["record"].get("version")))
+
+        if versions and os.path.exists(self.database_file):
+            table = self._versions.get(self.database_file)
+            for report_id in table.index.intersection(list(versions)):
+                versions[report_id] = max(versions[report_id], _version(table.at[report_id, VERSION_COLUMN]))
+        return versions
+
+    def _append(self, entry):
+        """Añade una entrada al diario con una única escritura"""
+        line = (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        # Bloqueo compartido: los envíos no se bloquean entre sí, solo frente al truncado
+        with _FileLock(self.journal_lock_file, shared=True):
+            fd = os.open(self.journal_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _attach_image(self, record, future):
+        """Al terminar de procesarse la foto, la guarda y registra su ruta en el diario"""
+        report_id, version = record["report_id"], _version(record["version"])
+
+        def done(future):
+            line = {"op": "image", "report_id": report_id, "version": version, "imagen_path": None}
+            try:
+                data, ext = future.result()
+                line["imagen_path"] = get_image_store().put(data, ext)
+            except Exception as e:
+                line["error"] = str(e)
+            try:
+                self._append(line)
+            except Exception as e:
+                print(f"Error al registrar la foto del informe {report_id}: {e}")
+            self._wakeup.set()
+
+        future.add_done_callback(done)
+
+    # ---------- Índices derivados ----------
+
+    def add_listener(self, listener):
+        """Registra una función listener(entry, previous_size, new_size)
+
+        Se llama desde el escritor después de incorporar cada entrada al CSV.
+        ``entry["op"]`` es "insert" o "update"; en las ediciones
+        ``entry["previous"]`` trae el informe anterior si el llamador lo dio.
+        Tras una compactación se llama con ``{"op": "compact"}``: el contenido
+        vigente no cambia, solo el tamaño del archivo. Solo se entera este
+        proceso; los índices que deban ver los cambios de cualquier proceso
+        consumen ``self.events``.
+        """
+        self._listeners.append(listener)
+
+    def add_publisher(self, publisher):
+        """Registra un objeto con ``publish()`` (p. ej. ``shared_table.TablePublisher``)
+
+        El escritor lo llama con su bloqueo tomado cada vez que revisa el diario
+        y tras compactar; debe ser barato cuando el CSV no cambió.
+        """
+        self._publishers.append(publisher)
+
+    def _publish(self):
+        for publisher in self._publishers:
+            try:
+                publisher.publish()
+            except Exception as e:
+                print(f"Error al publicar una tabla compartida: {e}")
+
+    # ---------- Escritor en segundo plano ----------
+
+    def start(self):
+        """Arranca el escritor de este proceso si aún no está en marcha"""
+        with self._start_lock:
+            self._closed = False
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="scouting-writer", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Detiene el escritor de este proceso tras incorporar lo pendiente"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.apply_pending()
+            except Exception as e:
+                print(f"Error al incorporar el diario de informes: {e}")
+
+            if time.monotonic() >= self._next_compaction_check:
+                self._next_compaction_check = time.monotonic() + COMPACT_CHECK_INTERVAL
+                try:
+                    self.maybe_compact()
+                except Exception as e:
+                    print(f"Error al compactar la base de datos: {e}")
+
+    def _read_checkpoint(self):
+        """Punto de control: ``{"offset": ..., "seq": ...}``
+
+        ``seq`` es el último evento publicado al guardarlo; falta en los puntos
+        de control antiguos.
+        """
+        try:
+            with open(self.checkpoint_file, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            return {"offset": int(checkpoint.get("offset", 0)), "seq": checkpoint.get("seq")}
+        except (OSError, ValueError):
+            return {"offset": 0, "seq": None}
+
+    def _write_checkpoint(self, offset):
+        _write_json_atomic(self.checkpoint_file, {"offset": offset, "seq": self.events.last_seq()})
+
+    def _read_pending(self):
+        """Lee el diario desde el punto de control: ``(transacciones, fotos)``
+
+        Las líneas de foto (``op: image``) no son transacciones: se devuelven como
+        transacciones vacías, para que el punto de control pase por ellas, y en
+        ``fotos`` por (report_id, versión).
+        """
+        offset = self._read_checkpoint()["offset"]
+        transactions, images = [], {}
+        if not os.path.exists(self.journal_file):
+            return transactions, images
+        with open(self.journal_file, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # escritura en curso
+                offset += len(line)
+                entry = json.loads(line)
+                if entry.get("op") == "image":
+                    images[(entry["report_id"], _version(entry["version"]))] = entry
+                    transactions.append(([], offset))
+                    continue
+                entries = entry["entries"] if entry.get("op") == "batch" else [entry]
+                if entries:
+                    transactions.append((entries, offset))
+        return transactions, images
+
+    def pending_transactions(self):
+        """Transacciones del diario aún no incorporadas: ``(entradas, desplazamiento final)``
+
+        Una entrada suelta es una transacción de un elemento; un lote trae todas
+        las suyas.
+        """
+        return [(entries, offset) for entries, offset in self._read_pending()[0] if entries]
+
+    def pending_images(self):
+        """Rutas de las fotos ya procesadas cuyo informe aún no está en el CSV"""
+        return [line.get("imagen_path") for line in self._read_pending()[1].values()]
+
+    def pending_entries(self):
+        """Entradas del diario aún no incorporadas, con su desplazamiento final
+
+        Las transacciones se devuelven entrada a entrada; solo la última lleva el
+        desplazamiento (las demás, None) para no dar ninguna por incorporada a medias.
+        """
+        entries = []
+        for batch, offset in self.pending_transactions():
+            entries.extend((entry, None) for entry in batch[:-1])
+            entries.append((batch[-1], offset))
+        return entries
+
+    def apply_pending(self):
+        """Incorpora al CSV las entradas pendientes (un solo escritor entre procesos)"""
+        writer_lock = _FileLock(self.writer_lock_file, blocking=False)
+        if not writer_lock.acquire():
+            return 0
+        try:
+            transactions, images = self._read_pending()
+            known_versions = emitted = None
+            if transactions and not self._recovered:
+                # El proceso pudo detenerse tras escribir filas o eventos y antes del punto de control
+                known_versions = self._existing_versions()
+                emitted = self._emitted_versions(self._read_checkpoint()["seq"])
+            self._recovered = True
+
+            applied = 0
+            for entries, offset in transactions:
+                if not self._resolve_images(entries, images):
+                    break  # una foto sigue en proceso: lo posterior espera a la próxima pasada
+                self._apply_transaction(entries, known_versions, emitted)
+                self._write_checkpoint(offset)
+                applied += len(entries)
+
+            self._truncate_if_applied()
+            # También publica los cambios hechos por otras vías (restauración, migración)
+            self._publish()
+        except Exception:
+            # Una transacción pudo quedar a medias: la próxima pasada omite lo ya incorporado
+            self._recovered = False
+            raise
+        finally:
+            writer_lock.release()
+
+        with self._applied:
+            self._applied.notify_all()
+        return applied
+
+    def _resolve_images(self, entries, images):
+        """Pone en las entradas la ruta de su foto nueva; False si alguna aún se procesa
+
+        Si la foto falló o tardó más de ``IMAGE_WAIT_SECONDS`` el informe se
+        guarda con la foto que tenía (ninguna, si es nuevo).
+        """
+        for entry in entries:
+            if not entry.get("image_pending"):
+                continue
+            report_id, version = _entry_key(entry)
+            line = images.get((report_id, version))
+            if line is None:
+                if time.time() - entry.get("ts", 0) < IMAGE_WAIT_SECONDS:
+                    return False
+                print(f"La foto del informe {report_id} no terminó de procesarse en "
+                      f"{IMAGE_WAIT_SECONDS:.0f} s; se guarda sin la foto nueva")
+            elif line.get("imagen_path"):
+                entry["record"]["imagen_path"] = line["imagen_path"]
+            else:
+                print(f"La foto del informe {report_id} no es válida ({line.get('error')}); se guarda sin ella")
+        return True
+
+    def _apply_transaction(self, entries, known_versions=None, emitted=None):
+        """Incorpora una transacción: todas sus filas en una escritura y después sus eventos
+
+        Al recuperar, ``known_versions`` son los pares (report_id, versión) que ya
+        están en el CSV y ``emitted`` los que ya tienen evento; no se repiten.
+        """
+        pending = [entry for entry in entries
+                   if known_versions is None or _entry_key(entry) not in known_versions]
+        sizes = dict(zip(map(id, pending), self._append_rows([entry["record"] for entry in pending])))
+        size = os.path.getsize(self.database_file)
+
+        for entry in entries:
+            previous_size, new_size = sizes.get(id(entry), (size, size))
+            if emitted is None or _entry_key(entry) not in emitted:
+                self._emit(entry, previous_size, new_size)
+            if id(entry) not in sizes:
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(entry, previous_size, new_size)
+                except Exception as e:
+                    print(f"Error al actualizar un índice derivado: {e}")
+
+    def _emit(self, entry, previous_size, new_size):
+        """Publica en el registro de cambios una entrada ya incorporada al CSV"""
+        record = entry["record"]
+        self.events.append({
+            "op": entry.get("op", "insert"),
+            "report_id": record.get("report_id"),
+            "version": _version(record.get("version")),
+            "record": record,
+            "previous": entry.get("previous"),
+            "csv_size_before": previous_size,
+            "csv_size": new_size,
+        })
+
+    def _existing_versions(self):
+        """Pares (report_id, versión) ya presentes en el CSV (solo al recuperar tras un reinicio)"""
+        if not os.path.exists(self.database_file):
+            return set()
+        df = read_versions_csv(self.database_file, latest=False)
+        return set(zip(df.index, (_version(v) for v in df[VERSION_COLUMN])))
+
+    def _emitted_versions(self, after_seq):
+        """Pares (report_id, versión) con evento posterior al punto de control (solo al recuperar)
+
+        Sin secuencia en el punto de control se revisa todo el registro.
+        """
+        return {
+            (event["report_id"], _version(event.get("version")))
+            for event in self.events.events_after(after_seq or 0)
+            if event.get("report_id") is not None
+        }
+
+    def _append_rows(self, records):
+        """Añade filas al CSV en una sola escritura y devuelve (tamaño previo, tamaño nuevo) de cada una
+
+        Inserciones y ediciones se escriben igual: una edición es una fila nueva
+        con el mismo report_id y una versión mayor.
+        """
+        if not records:
+            return []
+        header = []
+        if os.path.exists(self.database_file):
+            with open(self.database_file, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f), [])
+
+        if not header or any(key not in header for record in records for key in record):
+            # Columna nueva: reescritura completa (ocurre solo al ampliar el esquema)
+            previous_size = os.path.getsize(self.database_file) if header else 0
+            df = pd.DataFrame()
+            if header:
+                # Como texto y sin convertir vacíos, para reescribir los valores tal cual
+                df = pd.read_csv(self.database_file, dtype=str, keep_default_na=False)
+                id_columns = [c for c in ["fecha_creacion", "jugador", "report_id"] if c in df.columns]
+                ids = df[id_columns].mask(df[id_columns] == "")
+                df["report_id"] = ensure_report_ids(ids)["report_id"]
+            rows = pd.DataFrame([{k: _csv_value(v) for k, v in record.items()} for record in records], dtype=object)
+            df = pd.concat([df, rows], ignore_index=True)
+            df.to_csv(self.database_file, index=False)
+            size = os.path.getsize(self.database_file)
+            return [(previous_size, size)] + [(size, size)] * (len(records) - 1)
+
+        lines = []
+        for record in records:
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow([_csv_value(record.get(column)) for column in header])
+            lines.append(buffer.getvalue().encode("utf-8"))
+
+        with open(self.database_file, "rb+") as f:
+            # Asegurar que el archivo termina en salto de línea antes de añadir
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            size = f.tell()
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+        sizes = []
+        for line in lines:
+            sizes.append((size, size + len(line)))
+            size += len(line)
+        return sizes
+
+    def _truncate_if_applied(self):
+        """Vacía el diario cuando todas sus entradas están incorporadas"""
+        with _FileLock(self.journal_lock_file):
+            size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+            if size and self._read_checkpoint()["offset"] == size:
+                os.truncate(self.journal_file, 0)
+                self._write_checkpoint(0)
+
+    def writer_lock(self):
+        """Bloqueo del escritor: mientras se mantiene nadie modifica el CSV"""
+        return _FileLock(self.writer_lock_file)
+
+    # ---------- Compactación ----------
+
+    def dead_rows(self):
+        """(filas muertas, filas totales) del CSV: versiones sustituidas y lápidas"""
+        if not os.path.exists(self.database_file):
+            return 0, 0
+        versions = self._versions.get(self.database_file)
+        live = int((versions[STATUS_COLUMN] != STATUS_DELETED).sum())
+        total = self._versions.total_rows
+        return total - live, total
+
+    def maybe_compact(self):
+        """Compacta si las filas muertas superan los umbrales; devuelve el resultado o None"""
+        dead, total = self.dead_rows()
+        if dead < COMPACT_MIN_DEAD_ROWS or dead < COMPACT_DEAD_RATIO * total:
+            return None
+        return self.compact()
+
+    def compact(self):
+        """Reescribe el CSV sin filas muertas y devuelve (filas antes, filas después)
+
+        Se conserva la última versión de cada informe activo o archivado. El
+        archivo nuevo se escribe aparte y sustituye al actual de forma atómica,
+        con el bloqueo del escritor tomado para que no se añadan filas a la vez.
+        """
+        with self.writer_lock():
+            if not os.path.exists(self.database_file):
+                return 0, 0
+            previous_size = os.path.getsize(self.database_file)
+            # Como texto y sin convertir vacíos, para reescribir los valores tal cual
+            df = pd.read_csv(self.database_file, dtype=str, keep_default_na=False)
+            rows_before = len(df)
+            # Los identificadores heredados dependen de la posición: se persisten antes de moverla
+            id_columns = [c for c in ["fecha_creacion", "jugador", "report_id"] if c in df.columns]
+            ids = df[id_columns].mask(df[id_columns] == "")
+            df["report_id"] = ensure_report_ids(ids)["report_id"]
+            df = df[~df["report_id"].duplicated(keep="last")]
+            if STATUS_COLUMN in df.columns:
+                df = df[df[STATUS_COLUMN] != STATUS_DELETED]
+
+            tmp_path = f"{self.database_file}.compact.tmp"
+            df.to_csv(tmp_path, index=False)
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.database_file)
+            new_size = os.path.getsize(self.database_file)
+            self.events.append({"op": "compact", "csv_size_before": previous_size, "csv_size": new_size})
+
+            for listener in self._listeners:
+                try:
+                    listener({"op": "compact"}, previous_size, new_size)
+                except Exception as e:
+                    print(f"Error al actualizar un índice derivado: {e}")
+            self._publish()
+        return rows_before, len(df)
+
+    def flush(self, timeout=10.0):
+        """Espera a que el diario quede incorporado; devuelve True si lo logró"""
+        deadline = time.monotonic() + timeout
+        self.start()
+        while True:
+            if not self.pending_entries():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self._wakeup.set()
+            with self._applied:
+                self._applied.wait(min(remaining, POLL_INTERVAL))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Almacén único del proceso"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ScoutingStore()
+        return _store
+
+def reset_store():
+    """Cierra y descarta el almacén del proceso (p. ej. al cambiar de directorio)"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la base de datos de informes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="Reescribir el CSV sin versiones sustituidas ni informes eliminados")
+    args = parser.parse_args(argv)
+
+    store = get_store()
+    if args.command == "compact":
+        store.apply_pending()
+        rows_before, rows_after = store.compact()
+        print(f"Compactado: {rows_before} filas -> {rows_after} filas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Calentamiento de cachés al arrancar y estado de preparación del servidor.
+
+Sin calentamiento, el primer usuario tras un despliegue paga el parseo del CSV,
+la construcción de los índices de filtros y búsquedas, el registro de las
+fuentes del PDF, la codificación de los logos y la lectura de las posiciones.
+``WarmUp`` ejecuta esos pasos una sola vez por proceso en un hilo en segundo
+plano; la aplicación espera a que termine (mostrando el progreso) en lugar de
+que cada sesión haga el trabajo en frío por su cuenta.
+
+Un paso que falla no bloquea el arranque: se registra y la aplicación lo hace
+bajo demanda como antes.
+
+El estado se escribe en ``scouting_ready.json`` tras cada paso, para que un
+script de despliegue o una sonda de disponibilidad sepa cuándo el proceso está
+listo. Antes de arrancar el servidor se puede además dejar preparado lo que se
+comparte en disco (diario incorporado y tablas publicadas), de modo que el
+servidor solo tenga que mapear la tabla:
+
+    python scouting_warmup.py preparar && streamlit run app_new.py
+    python scouting_warmup.py status [--esperar 120]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import scouting_store
+from shared_table import scouting_publishers
+
+# ====================================
+# CONSTANTES
+# ====================================
+READINESS_FILE = "scouting_ready.json"
+
+STATUS_PENDING = "pendiente"
+STATUS_RUNNING = "en curso"
+STATUS_DONE = "listo"
+STATUS_FAILED = "error"
+
+# Estado global del proceso
+STATUS_WARMING = "calentando"
+STATUS_READY = "listo"
+
+# ====================================
+# CALENTAMIENTO
+# ====================================
+
+class WarmUp:
+    """Ejecuta una lista de pasos ``(nombre, función)`` una vez, en segundo plano"""
+
+    def __init__(self, steps, readiness_file=READINESS_FILE):
+        self.steps = list(steps)
+        self.readiness_file = readiness_file
+        self.results = [{"name": name, "status": STATUS_PENDING, "seconds": None, "error": None}
+                        for name, _ in self.steps]
+        self.started_at = None
+        self.finished_at = None
+        self.seconds = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Arranca el calentamiento si aún no está en marcha; devuelve ``self``"""
+        with self._lock:
+            if self._thread is None:
+                self.started_at = datetime.now()
+                self._thread = threading.Thread(target=self._run, name="scouting-warmup", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.perf_counter()
+        for (name, func), result in zip(self.steps, self.results):
+            result["status"] = STATUS_RUNNING
+            self._write_report()
+            step_start = time.perf_counter()
+            try:
+                func()
+                result["status"] = STATUS_DONE
+            except Exception as e:
+                result["status"] = STATUS_FAILED
+                result["error"] = str(e)
+                print(f"Error al calentar '{name}': {e}")
+            result["seconds"] = round(time.perf_counter() - step_start, 3)
+        self.finished_at = datetime.now()
+        self.seconds = round(time.perf_counter() - start, 3)
+        self._ready.set()
+        self._write_report()
+
+    # ---------- Estado ----------
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """Espera a que termine; devuelve True si ya está listo"""
+        return self._ready.wait(timeout)
+
+    def progress(self):
+        """``(pasos terminados, pasos totales, nombre del paso en curso o None)``"""
+        done = sum(r["status"] in (STATUS_DONE, STATUS_FAILED) for r in self.results)
+        current = next((r["name"] for r in self.results if r["status"] == STATUS_RUNNING), None)
+        return done, len(self.results), current
+
+    def report(self):
+        return {
+            "status": STATUS_READY if self.ready else STATUS_WARMING,
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+            "seconds": self.seconds,
+            "steps": [dict(r) for r in self.results],
+        }
+
+    def _write_report(self):
+        try:
+            tmp_path = f"{self.readiness_file}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.readiness_file)
+        except OSError as e:
+            print(f"No se pudo escribir el estado de preparación: {e}")
+
+def read_readiness(readiness_file=READINESS_FILE):
+    """Último estado escrito por un servidor, o None si no hay ninguno"""
+    try:
+        with open(readiness_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def is_ready(report):
+    """True si el estado es de un proceso vivo que terminó de calentar"""
+    return bool(report) and report.get("status") == STATUS_READY and _process_alive(report.get("pid", -1))
+
+# ====================================
+# PREPARACIÓN EN DISCO (ANTES DE ARRANCAR)
+# ====================================
+
+def prepare_shared_state(database_file="scouting_database.csv"):
+    """Incorpora el diario pendiente y publica las tablas compartidas
+
+    Si otro proceso ya es el escritor no hace nada: ese proceso publica.
+    Devuelve las entradas del diario incorporadas.
+    """
+    store = scouting_store.get_store()
+    for publisher in scouting_publishers(database_file):
+        store.add_publisher(publisher)
+    try:
+        return store.apply_pending()
+    finally:
+        store.close()
+
+# ====================================
+# LÍNEA DE COMANDOS
+# ====================================
+
+def _print_report(report):
+    print(f"Estado: {report['status']} (proceso {report['pid']}, iniciado {report['started_at']})")
+    for step in report["steps"]:
+        seconds = f"{step['seconds']:.2f} s" if step["seconds"] is not None else ""
+        error = f"  {step['error']}" if step["error"] else ""
+        print(f"  {step['status']:<10} {step['name']:<28} {seconds}{error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calentamiento y estado de preparación del servidor")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("preparar", help="Incorporar el diario y publicar las tablas antes de arrancar")
+    status = sub.add_parser("status", help="Mostrar el estado; código 0 si el servidor está listo")
+    status.add_argument("--esperar", type=float, default=0, help="Segundos a esperar a que esté listo")
+    args = parser.parse_args(argv)
+
+    if args.command == "preparar":
+        start = time.perf_counter()
+        applied = prepare_shared_state()
+        print(f"Diario incorporado ({applied} entradas) y tablas publicadas en {time.perf_counter() - start:.2f} s")
+        return 0
+
+    deadline = time.monotonic() + args.esperar
+    report = read_readiness()
+    while not is_ready(report) and time.monotonic() < deadline:
+        time.sleep(0.5)
+        report = read_readiness()
+    if report is None:
+        print("Ningún servidor ha empezado a calentar")
+        return 1
+    _print_report(report)
+    if not _process_alive(report.get("pid", -1)):
+        print("El proceso que escribió este estado ya no está en marcha")
+    return 0 if is_ready(report) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Tabla de informes compartida entre procesos mediante archivos mapeados en memoria.
+
+Con varios procesos (workers de gunicorn o varias instancias de Streamlit) cada
+uno mantendría su propia copia parseada del CSV. En su lugar, el escritor del
+almacén (el proceso que tiene su bloqueo) publica la tabla tipada en formato
+Arrow IPC sin comprimir y el resto la mapea con ``mmap``: las columnas de texto,
+que son casi toda la memoria, quedan respaldadas por las páginas del archivo, que
+el sistema operativo comparte entre procesos. Añadir workers no multiplica la
+memoria. Esto requiere pandas 3: su tipo ``str`` guarda el texto en arrays de
+Arrow y ``to_pandas`` los envuelve sin copiarlos (con pandas 2 cada columna de
+texto se convertiría en objetos Python propios del proceso).
+
+Estructura:
+    scouting_shared/<nombre>.json            publicación vigente (puntero)
+    scouting_shared/<nombre>.<seq>.arrow     tabla publicada
+
+Cada publicación se escribe aparte y el puntero se sustituye de forma atómica,
+así que todos los procesos pasan a la versión nueva a la vez y nunca ven una a
+medio escribir. Las publicaciones antiguas se borran; en POSIX un archivo
+borrado sigue siendo válido para quien aún lo tenga mapeado.
+
+La tabla de jugadores se publica ordenada (activos, archivados y lápidas) para
+que las vistas habituales sean cortes de la tabla mapeada y no copias. Si el CSV
+cambió desde la última publicación (el escritor aún no ha publicado), cada
+proceso lee en local solo lo añadido sobre la publicación, hasta la siguiente.
+
+Las fotos no se comparten por aquí: son archivos pequeños y normalizados
+(``image_processing``) que ya comparte la caché de páginas del sistema.
+"""
+
+import json
+import os
+import threading
+import weakref
+
+import numpy as np
+import pyarrow as pa
+
+from incremental_table import IncrementalTable
+from scouting_schema import STATUS_ACTIVE, STATUS_ARCHIVED, STATUS_COLUMN, read_long_text_csv, read_players_csv
+
+# ====================================
+# CONSTANTES
+# ====================================
+SHARED_DIR = "scouting_shared"
+DATABASE_FILE = "scouting_database.csv"
+
+# Publicaciones que se conservan además de la vigente
+KEEP_PUBLICATIONS = 2
+
+
+def _pointer_path(shared_dir, name):
+    return os.path.join(shared_dir, f"{name}.json")
+
+def read_pointer(shared_dir, name):
+    """Publicación vigente de una tabla, o None si no hay ninguna"""
+    try:
+        with open(_pointer_path(shared_dir, name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def status_partitions(df):
+    """Ordena activos, archivados y lápidas; devuelve la tabla y dónde acaba cada vista"""
+    if STATUS_COLUMN not in df.columns:
+        return df, {"active": len(df), "stored": len(df)}
+    status = df[STATUS_COLUMN]
+    active = (status.isna() | (status == STATUS_ACTIVE)).to_numpy()
+    archived = (status == STATUS_ARCHIVED).to_numpy() & ~active
+    deleted = ~(active | archived)
+    if archived.any() or deleted.any():
+        df = df.iloc[np.concatenate([np.flatnonzero(active), np.flatnonzero(archived), np.flatnonzero(deleted)])]
+    n_active = int(active.sum())
+    return df, {"active": n_active, "stored": n_active + int(archived.sum())}
+
+# ====================================
+# PUBLICACIÓN (ESCRITOR)
+# ====================================
+
+class TablePublisher:
+    """Publica la tabla tipada del CSV para que otros procesos la mapeen
+
+    ``reader`` es el mismo lector tipado que usa ``IncrementalTable``; ``order``
+    (opcional) reordena la tabla y devuelve los cortes que la acompañan.
+    """
+
+    def __init__(self, name, reader, database_file=DATABASE_FILE, shared_dir=SHARED_DIR, order=None):
+        self.name = name
+        self.database_file = database_file
+        self.shared_dir = shared_dir
+        self.order = order
+        self.table = IncrementalTable(reader)
+        os.makedirs(shared_dir, exist_ok=True)
+
+    def publish(self):
+        """Publica la tabla si el CSV cambió; devuelve la publicación nueva o None
+
+        Debe llamarse con el bloqueo del escritor tomado, para que el CSV no
+        cambie mientras se publica.
+        """
+        if not os.path.exists(self.database_file):
+            return None
+        stat = os.stat(self.database_file)
+        current = read_pointer(self.shared_dir, self.name)
+        if current and current["csv_inode"] == stat.st_ino and current["csv_size"] == stat.st_size:
+            return None
+
+        df = self.table.get(self.database_file)
+        slices = {}
+        if self.order is not None:
+            df, slices = self.order(df)
+
+        seq = (current["seq"] if current else 0) + 1
+        data_file = f"{self.name}.{seq}.arrow"
+        path = os.path.join(self.shared_dir, data_file)
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            # Sin compresión: los lectores usan los buffers directamente desde el mapa
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        entry = {
+            "seq": seq,
+            "file": data_file,
+            "csv_inode": stat.st_ino,
+            "csv_size": stat.st_size,
+            "total_rows": self.table.total_rows,
+            "slices": slices,
+        }
+        pointer = _pointer_path(self.shared_dir, self.name)
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(f"{pointer}.tmp", pointer)
+        self._prune(seq)
+        return entry
+
+    def _prune(self, seq):
+        prefix = f"{self.name}."
+        for file_name in os.listdir(self.shared_dir):
+            if not (file_name.startswith(prefix) and file_name.endswith(".arrow")):
+                continue
+            try:
+                file_seq = int(file_name[len(prefix):-len(".arrow")])
+            except ValueError:
+                continue
+            if file_seq < seq - KEEP_PUBLICATIONS:
+                try:
+                    os.remove(os.path.join(self.shared_dir, file_name))
+                except OSError:
+                    pass  # Windows: aún mapeado por algún proceso
+
+def scouting_publishers(database_file=DATABASE_FILE, shared_dir=SHARED_DIR):
+    """Publicadores de las tablas que mapean los procesos de la aplicación"""
+    return [
+        TablePublisher("players", read_players_csv, database_file, shared_dir, order=status_partitions),
+        TablePublisher("long_text", read_long_text_csv, database_file, shared_dir),
+    ]
+
+# ====================================
+# LECTURA (TODOS LOS PROCESOS)
+# ====================================
+
+class SharedTable:
+    """Tabla publicada y mapeada en memoria, con la interfaz de ``IncrementalTable``
+
+    ``slice_views`` asocia funciones de vista (p. ej. ``active_reports``) con
+    los cortes que guarda la publicación: esas vistas se sirven como cortes de
+    la tabla mapeada, sin copiarla.
+    """
+
+    def __init__(self, name, reader, shared_dir=SHARED_DIR, slice_views=None):
+        self.name = name
+        self.shared_dir = shared_dir
+        self.slice_views = slice_views or {}
+        self._local = IncrementalTable(reader)
+        self._lock = threading.Lock()
+        self._pointer_stat = None
+        self._pointer = None
+        self._entry = None
+        self._df = None
+        self._views = {}
+        # (referencia débil a la tabla local, bytes) de la última medición
+        self._private_size = (None, 0)
+
+    @property
+    def published_seq(self):
+        """Publicación mapeada en este proceso (0 si ninguna)"""
+        return self._entry["seq"] if self._entry else 0
+
+    def _current(self):
+        """Publicación vigente; el puntero solo se relee si cambió"""
+        try:
+            stat = os.stat(_pointer_path(self.shared_dir, self.name))
+        except OSError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._pointer_stat:
+            self._pointer = read_pointer(self.shared_dir, self.name)
+            self._pointer_stat = key
+        return self._pointer
+
+    def _map(self, entry, path, stat):
+        """Mapea una publicación y la usa como base de las lecturas locales"""
+        source = pa.memory_map(os.path.join(self.shared_dir, entry["file"]))
+        table = pa.ipc.open_file(source).read_all()
+        df = table.to_pandas(split_blocks=True)
+        self._entry = entry
+        self._df = df
+        self._views = {}
+
+        header = b""
+        if stat.st_ino == entry["csv_inode"]:
+            with open(path, "rb") as f:
+                header = f.readline()
+        self._local.seed(df, entry["csv_inode"], entry["csv_size"], header, entry["total_rows"])
+
+    def _view(self, view):
+        if view is None:
+            return self._df
+        if view not in self._views:
+            end = self._entry.get("slices", {}).get(self.slice_views.get(view))
+            self._views[view] = self._df.iloc[:end] if end is not None else view(self._df)
+        return self._views[view]
+
+    def get(self, path, view=None):
+        """Devuelve la tabla vigente del CSV (solo lectura, no modificar)"""
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._current()
+            if entry is not None and (self._entry is None or entry["seq"] != self._entry["seq"]):
+                try:
+                    self._map(entry, path, stat)
+                except (OSError, pa.ArrowException) as e:
+                    # Publicación podada entre leer el puntero y abrirla: se usa la local
+                    print(f"No se pudo mapear la tabla publicada {entry['file']}: {e}")
+            if (self._entry is not None and self._entry["csv_inode"] == stat.st_ino
+                    and self._entry["csv_size"] == stat.st_size):
+                return self._view(view)
+        # Cambios aún sin publicar: solo se lee lo añadido sobre la publicación
+        return self._local.get(path, view)
+
+    def private_bytes(self):
+        """Memoria propia del proceso: la copia local si hay cambios aún sin publicar
+
+        La tabla mapeada no cuenta: sus páginas son del archivo y las comparte el
+        sistema operativo entre procesos.
+        """
+        local = self._local.df
+        if local is None or local is self._df:
+            return 0
+        measured = self._private_size[0]
+        if measured is None or measured() is not local:
+            self._private_size = (weakref.ref(local), int(local.memory_usage(deep=True).sum()))
+        return self._private_size[1]
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+            self._df = None
+            self._views = {}
+            self._pointer_stat = None
+        self._local.clear()
@@ -0,0 +1,49 @@
+"""Normalización en lote de club, liga y nacionalidad sobre el almacén"""
+
+import pandas as pd
+import pytest
+
+import canonical_entities
+import scouting_schema
+from scouting_schema import COLUMNS
+from scouting_store import ScoutingStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(columns=COLUMNS).to_csv("scouting_database.csv", index=False)
+    store = ScoutingStore("scouting_database.csv", "scouting_journal", "scouting_events")
+    # Sin escritor en segundo plano: flush incorpora el diario en el acto
+    monkeypatch.setattr(store, "start", lambda: None)
+
+    def flush(timeout=None):
+        store.apply_pending()
+        return True
+
+    monkeypatch.setattr(store, "flush", flush)
+    return store
+
+
+def test_edit_between_read_and_apply_is_skipped(store, monkeypatch):
+    report_id = store.submit({"jugador": "Uno", "club_actual": "audax italiano", "liga": "Primera",
+                              "estado": "activo", "fecha_creacion": "2026-10-01"})
+    store.apply_pending()
+    plan = {report_id: {"club_actual": ("audax italiano", "Audax Italiano")}}
+
+    read = scouting_schema.read_players_csv
+
+    def read_then_edit(*args, **kwargs):
+        df = read(*args, **kwargs)
+        # Otra persona guarda una edición justo después de la lectura
+        previous = scouting_schema.to_record(df.loc[report_id])
+        store.update(dict(previous, liga="Primera B"), previous["version"], previous)
+        return df
+
+    monkeypatch.setattr(scouting_schema, "read_players_csv", read_then_edit)
+    assert canonical_entities.apply_normalization(plan, store) == 0
+
+    df = read("scouting_database.csv")
+    assert int(df.loc[report_id, "version"]) == 2
+    assert df.loc[report_id, "liga"] == "Primera B"
+    assert df.loc[report_id, "club_actual"] == "audax italiano"
@@ -0,0 +1,129 @@
+"""Importación de paquetes sin conexión en la base central"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import field_bundles
+from image_store import get_image_store
+from scouting_schema import COLUMNS
+from scouting_store import ScoutingStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(columns=COLUMNS).to_csv("scouting_database.csv", index=False)
+    store = ScoutingStore("scouting_database.csv", "scouting_journal", "scouting_events")
+    monkeypatch.setattr(store, "start", lambda: None)
+    return store
+
+
+def report(report_id, jugador, version=1, **fields):
+    return dict({"report_id": report_id, "jugador": jugador, "version": version, "estado": "activo",
+                 "fecha_creacion": "2026-10-01", "club_actual": "Audax", "rendimiento": 4}, **fields)
+
+
+def make_bundle(records, path="paquete.zip"):
+    """Paquete exportado desde una base local con esos informes"""
+    pd.DataFrame(records, columns=COLUMNS).to_csv("local.csv", index=False)
+    field_bundles.export_bundle(path, database_file="local.csv", source="visita")
+    return path
+
+
+def import_bundle(store, path, **kwargs):
+    summary = field_bundles.import_bundle(path, store, "scouting_database.csv", **kwargs)
+    store.apply_pending()
+    return summary
+
+
+def central():
+    return pd.read_csv("scouting_database.csv", dtype=str)
+
+
+def test_import_then_reimport_is_idempotent(store):
+    path = make_bundle([report("a", "Uno"), report("b", "Dos")])
+
+    summary = import_bundle(store, path)
+    assert summary["insertados"] == 2
+    assert summary["origen"] == "visita"
+    assert sorted(central()["report_id"]) == ["a", "b"]
+
+    summary = import_bundle(store, path)
+    assert summary["insertados"] == 0 and summary["duplicados"] == 2
+    assert len(central()) == 2
+
+
+def test_dry_run_writes_nothing(store):
+    summary = import_bundle(store, make_bundle([report("a", "Uno")]), dry_run=True)
+    assert summary["insertados"] == 1
+    assert central().empty
+
+
+def test_same_content_with_other_id_is_not_duplicated(store):
+    import_bundle(store, make_bundle([report("a", "Uno")]))
+    summary = import_bundle(store, make_bundle([report("otro", "Uno")]))
+    assert summary["duplicados"] == 1
+    assert list(central()["report_id"]) == ["a"]
+
+
+def test_higher_version_wins_and_equal_version_is_a_conflict(store):
+    import_bundle(store, make_bundle([report("a", "Uno"), report("b", "Dos")]))
+
+    summary = import_bundle(store, make_bundle([
+        report("a", "Uno", version=2, rendimiento=6),
+        report("b", "Dos", version=1, rendimiento=1),
+    ]))
+    assert summary["actualizados"] == 1
+    assert [c[0] for c in summary["conflictos"]] == ["b"]
+
+    df = central()
+    latest = df.drop_duplicates("report_id", keep="last").set_index("report_id")
+    assert latest.loc["a", "rendimiento"] == "6" and latest.loc["a", "version"] == "2"
+    assert latest.loc["b", "rendimiento"] == "4"
+
+
+def test_missing_central_photo_is_restored(store):
+    photo = get_image_store().put(b"foto del jugador", ".jpg")
+    path = make_bundle([report("a", "Uno", imagen_path=photo)])
+    import_bundle(store, path)
+    assert central().loc[0, "imagen_path"] == photo
+
+    os.remove(photo)
+    summary = import_bundle(store, path)
+    assert summary["fotos_restauradas"] == 1
+    assert len(central()) == 1
+    with open(photo, "rb") as f:
+        assert f.read() == b"foto del jugador"
+
+
+def test_bundle_without_photo_matches_missing_central_photo(store):
+    photo = get_image_store().put(b"foto del jugador", ".jpg")
+    import_bundle(store, make_bundle([report("a", "Uno", imagen_path=photo)]))
+    os.remove(photo)
+
+    summary = import_bundle(store, make_bundle([report("a", "Uno", imagen_path=photo)]))
+    assert summary["duplicados"] == 1
+
+
+def test_invalid_bundle(store):
+    with open("roto.zip", "wb") as f:
+        f.write(b"no es un zip")
+    with pytest.raises(field_bundles.BundleError):
+        field_bundles.import_bundle("roto.zip", store, "scouting_database.csv")
+
+
+def test_export_since_carries_deletions(store):
+    # La lápida de "a" no tiene fecha: cuenta la de su primera versión
+    import_bundle(store, make_bundle([report("a", "Uno", fecha_creacion="2026-10-05")]))
+    records = [report("a", "Uno", fecha_creacion="2026-10-05"),
+               report("b", "Antiguo", fecha_creacion="2026-09-01"),
+               {"report_id": "a", "version": 2, "estado": "eliminado"}]
+    pd.DataFrame(records, columns=COLUMNS).to_csv("local.csv", index=False)
+    manifest = field_bundles.export_bundle("paquete.zip", database_file="local.csv", since="2026-10-01")
+    assert manifest["reports"] == 1
+
+    import_bundle(store, "paquete.zip")
+    estados = central().groupby("report_id")["estado"].last()
+    assert estados.to_dict() == {"a": "eliminado"}
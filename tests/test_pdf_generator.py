@@ -0,0 +1,45 @@
+"""PDF con la plantilla estática: se lee igual que el dibujado sin plantilla"""
+
+import re
+
+import pytest
+
+from pdf_generator_enhanced import FULL_SECTIONS, SUMMARY_SECTIONS, ReportRenderer
+
+pypdf = pytest.importorskip("pypdf")
+
+PLAYER = {
+    "jugador": "Íñigo Muñoz", "veredicto": "Fichar", "edad": 22, "nacionalidad": "Chile",
+    "pie": "Zurdo", "talla": 178, "club_actual": "Audax Italiano", "liga": "Primera División",
+    "fin_contrato": 2027, "agente": "Peña", "telefono_agente": "0034612345678",
+    "posicion_principal": "Mediocentro", "rendimiento": 5, "potencial": 6, "adaptabilidad": 4,
+    "evaluacion_tecnica": 5, "evaluacion_tactica": 4, "evaluacion_fisica": 3, "evaluacion_mental": 5,
+}
+
+
+def render(path, sections, players, use_template):
+    renderer = ReportRenderer(sections, use_template=use_template)
+    for player in players:
+        renderer.add_player(player)
+    renderer.output(str(path))
+    return pypdf.PdfReader(str(path), strict=True)
+
+
+def page_texts(reader):
+    return [re.sub(r"\s+", " ", page.extract_text()).strip() for page in reader.pages]
+
+
+@pytest.mark.parametrize("sections", [FULL_SECTIONS, SUMMARY_SECTIONS])
+def test_template_pdf_parses_like_replayed_one(tmp_path, sections):
+    players = [PLAYER, dict(PLAYER, jugador="Ana Pérez", veredicto="Seguir")]
+    pasted = render(tmp_path / "plantilla.pdf", sections, players, use_template=True)
+    replayed = render(tmp_path / "sin_plantilla.pdf", sections, players, use_template=False)
+
+    assert len(pasted.pages) == len(replayed.pages) >= 2
+    texts = page_texts(pasted)
+    assert texts == page_texts(replayed)
+    assert "Información Personal" in texts[0] and "Íñigo Muñoz" in texts[0]
+    assert "Ana Pérez" in " ".join(texts)
+    # Cada página declara las fuentes que usa la parte pegada
+    for page in pasted.pages:
+        assert page["/Resources"]["/Font"]
@@ -0,0 +1,42 @@
+"""Agregados de analítica: copia en memoria al día con el registro de cambios"""
+
+import os
+
+import pandas as pd
+
+import scouting_aggregates
+from scouting_events import EventLog
+
+COLUMNS = ["report_id", "version", "liga", "estado", "rendimiento"]
+
+
+def test_memory_copy_follows_event_cursor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    database_file = "scouting_database.csv"
+    pd.DataFrame([["a", 1, "Liga A", "activo", 4]], columns=COLUMNS).to_csv(database_file, index=False)
+    events = EventLog("scouting_events")
+
+    reads = []
+    read = scouting_aggregates._read
+    monkeypatch.setattr(scouting_aggregates, "_read", lambda path: reads.append(path) or read(path))
+
+    def load():
+        return scouting_aggregates.load_aggregates(database_file, lambda: pd.read_csv(database_file), events)
+
+    first = load()
+    assert first["total"] == 1 and len(reads) == 1
+    # Sin eventos nuevos no se relee el archivo ni se copia nada
+    assert load() is first and len(reads) == 1
+
+    size = os.path.getsize(database_file)
+    with open(database_file, "a", encoding="utf-8") as f:
+        f.write("b,1,Liga B,activo,5\n")
+    record = {"report_id": "b", "version": 1, "liga": "Liga B", "estado": "activo", "rendimiento": 5}
+    events.append({"op": "insert", "report_id": "b", "version": 1, "record": record,
+                   "csv_size_before": size, "csv_size": os.path.getsize(database_file)})
+
+    second = load()
+    assert second["total"] == 2 and second["counts"]["liga"]["Liga B"] == 1
+    assert len(reads) == 1
+    # La copia que ya tenían otras sesiones no cambia
+    assert first["total"] == 1
@@ -0,0 +1,176 @@
+"""Diario del almacén: transacciones y recuperación tras un fallo a medias"""
+
+from collections import Counter
+from concurrent.futures import Future
+
+import pandas as pd
+import pytest
+
+import scouting_store
+from scouting_store import ScoutingStore, VersionConflictError
+
+COLUMNS = ["fecha_creacion", "jugador", "report_id", "version", "estado"]
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(columns=COLUMNS).to_csv("scouting_database.csv", index=False)
+
+    def make():
+        store = ScoutingStore("scouting_database.csv", "scouting_journal", "scouting_events")
+        # Sin escritor en segundo plano: las pruebas incorporan el diario a mano
+        monkeypatch.setattr(store, "start", lambda: None)
+        return store
+
+    return make
+
+
+def batch(n):
+    return [{"op": "insert", "record": {"report_id": f"b{i}", "jugador": f"Jugador {i}",
+                                        "fecha_creacion": "2026-10-01", "estado": "activo"}}
+            for i in range(n)]
+
+
+def csv_keys():
+    df = pd.read_csv("scouting_database.csv", dtype=str)
+    return Counter(zip(df["report_id"], df["version"].astype(int)))
+
+
+def event_keys(store):
+    return Counter((e["report_id"], e["version"]) for e in store.events.events_after(0) if "report_id" in e)
+
+
+def expected(n):
+    return Counter({(f"b{i}", 1): 1 for i in range(n)})
+
+
+def test_batch_applied_once(make_store):
+    store = make_store()
+    store.submit_batch(batch(5))
+    assert store.apply_pending() == 5
+    assert csv_keys() == expected(5)
+    assert event_keys(store) == expected(5)
+    assert store.pending_entries() == []
+
+    # Los tamaños de cada evento encadenan las filas añadidas
+    events = store.events.events_after(0)
+    for before, after in zip(events, events[1:]):
+        assert after["csv_size_before"] == before["csv_size"]
+
+
+def test_retry_after_failure_while_emitting(make_store, monkeypatch):
+    store = make_store()
+    store.submit_batch(batch(5))
+
+    emit = store._emit
+    calls = []
+
+    def failing_emit(entry, previous_size, new_size):
+        calls.append(entry)
+        if len(calls) == 3:
+            raise OSError("disco lleno")
+        emit(entry, previous_size, new_size)
+
+    monkeypatch.setattr(store, "_emit", failing_emit)
+    with pytest.raises(OSError):
+        store.apply_pending()
+    assert len(store.pending_entries()) == 5
+
+    monkeypatch.setattr(store, "_emit", emit)
+    store.apply_pending()
+    assert csv_keys() == expected(5)
+    assert event_keys(store) == expected(5)
+    assert store.pending_entries() == []
+
+
+def test_restart_with_rows_written_but_no_checkpoint(make_store):
+    store = make_store()
+    store.submit_batch(batch(5))
+    # El proceso se detuvo tras escribir parte de las filas y ningún evento
+    store._append_rows([entry["record"] for entry, _ in store.pending_entries()[:2]])
+
+    restarted = make_store()
+    restarted.apply_pending()
+    assert csv_keys() == expected(5)
+    assert event_keys(restarted) == expected(5)
+
+
+def test_restart_after_everything_but_checkpoint(make_store, monkeypatch):
+    store = make_store()
+    store.submit_batch(batch(5))
+    monkeypatch.setattr(store, "_write_checkpoint", lambda offset: None)
+    store.apply_pending()
+
+    restarted = make_store()
+    restarted.apply_pending()
+    assert csv_keys() == expected(5)
+    assert event_keys(restarted) == expected(5)
+    assert restarted.pending_entries() == []
+
+
+def test_batch_conflict_registers_nothing(make_store):
+    store = make_store()
+    store.submit_batch(batch(2))
+    store.apply_pending()
+
+    entries = batch(3)
+    with pytest.raises(VersionConflictError):
+        store.submit_batch(entries)
+    assert store.pending_entries() == []
+
+    update = {"op": "update", "record": dict(entries[0]["record"]), "expected_version": 1}
+    assert store.submit_batch([update]) == [("b0", 2)]
+    store.apply_pending()
+    assert scouting_store.read_versions_csv("scouting_database.csv").loc["b0", "version"] == "2"
+
+
+def test_report_waits_for_its_photo(make_store):
+    store = make_store()
+    future = Future()
+    report_id = store.submit({"jugador": "Con foto", "estado": "activo"}, image_future=future)
+    store.submit({"jugador": "Después", "estado": "activo"})
+
+    # Mientras la foto se procesa no se incorpora nada, tampoco lo posterior
+    assert store.apply_pending() == 0
+    future.set_result((b"foto", ".jpg"))
+    assert store.apply_pending() == 2
+
+    df = pd.read_csv("scouting_database.csv", dtype=str).set_index("report_id")
+    path = df.loc[report_id, "imagen_path"]
+    with open(path, "rb") as f:
+        assert f.read() == b"foto"
+    assert store.pending_entries() == [] and store.pending_images() == []
+
+
+def test_report_saved_without_failed_or_stuck_photo(make_store, monkeypatch):
+    store = make_store()
+    failed = Future()
+    store.submit({"jugador": "Foto rota", "estado": "activo"}, image_future=failed)
+    failed.set_exception(ValueError("archivo truncado"))
+    assert store.apply_pending() == 1
+
+    store.submit({"jugador": "Foto atascada", "estado": "activo"}, image_future=Future())
+    assert store.apply_pending() == 0
+    monkeypatch.setattr(scouting_store, "IMAGE_WAIT_SECONDS", 0)
+    assert store.apply_pending() == 1
+
+    df = pd.read_csv("scouting_database.csv", dtype=str)
+    assert "imagen_path" not in df or df["imagen_path"].isna().all()
+
+
+def test_widening_legacy_csv_keeps_existing_values(make_store):
+    legacy = ("fecha_creacion,jugador,edad,fin_contrato,telefono_agente\n"
+              "2025-09-23 10:00:00,Lucas,25,2025,0034612345678\n")
+    with open("scouting_database.csv", "w", encoding="utf-8") as f:
+        f.write(legacy)
+    store = make_store()
+    report_id = scouting_store.read_versions_csv("scouting_database.csv").index[0]
+    # La lápida solo trae report_id y estado: amplía el esquema con celdas vacías
+    store.delete({"report_id": report_id, "version": 1})
+    store.apply_pending()
+
+    df = pd.read_csv("scouting_database.csv", dtype=str, keep_default_na=False)
+    assert df.loc[0, ["edad", "fin_contrato", "telefono_agente"]].tolist() == ["25", "2025", "0034612345678"]
+    assert df.loc[0, "report_id"] == report_id
+    assert df.loc[1, "estado"] == "eliminado" and df.loc[1, "edad"] == ""